@@ -1,9 +1,19 @@
 import logging
 import os
+from http import HTTPStatus
 
-from apiflask import APIFlask
+from apiflask import APIFlask, HTTPError, abort
+from cache import response_cache
+from constants import LOGOS_DIR, SNAPSHOT_PATH
+from flask import Response, send_from_directory
 from flask_cors import CORS
+from logos import LOGO_MAX_AGE, MANIFEST
+from metrics import metrics
+from prices import price_cache
+from profiling import profiler
+from registry import DataPathError, registry
 from routes import v1
+from snapshot import load_snapshot
 
 # Set logging level to INFO
 logging.getLogger().setLevel(logging.INFO)
@@ -22,11 +32,72 @@ app.servers = [{"url": "https://aldus-api.alleslabs.dev"}]
 app.config["SYNC_LOCAL_SPEC"] = True
 app.config["LOCAL_SPEC_PATH"] = os.path.join(app.root_path, "openapi.json")
 
+# Reject request bodies over 1 MiB, such as oversized batch resolve requests
+app.config["MAX_CONTENT_LENGTH"] = 1024 * 1024
+
 # Register the v1 blueprint with the app
 app.register_blueprint(v1.v1_bp, url_prefix="/v1")
 
 # Enable CORS for the app
-CORS(app)
+CORS(app, expose_headers=["X-Next-Cursor"])
+
+# Record request metrics, profile and sample slow requests, then serve
+# repeated GET requests from pre-encoded responses. Metrics go first so that
+# cache hits are measured too, and profiled requests skip the cache
+metrics.init_app(app)
+profiler.init_app(app)
+response_cache.init_app(app)
+# The asset lists include the fetched prices, which change without a reload
+response_cache.track(
+    ["v1.assets.get_assets", "v1.globals.get_globals_assets"], price_cache.version
+)
+
+
+@app.errorhandler(DataPathError)
+def handle_data_path_error(error: DataPathError):
+    # Chains and networks come from the URL, and only name data directories
+    logging.warning(str(error))
+    return app.error_callback(HTTPError(HTTPStatus.NOT_FOUND))
+
+
+@app.get("/cache")
+@app.doc(hide=True)
+def get_cache_stats():
+    return response_cache.stats()
+
+
+@app.get("/metrics")
+@app.doc(hide=True)
+def get_metrics():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.get("/logos/<path:filename>")
+@app.doc(hide=True)
+def get_logo(filename: str):
+    # Compiled logo names include a hash of their contents, see logos.py
+    if not LOGOS_DIR or filename == MANIFEST:
+        abort(HTTPStatus.NOT_FOUND)
+    response = send_from_directory(LOGOS_DIR, filename, max_age=LOGO_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+
+@app.get("/slow-requests")
+@app.doc(hide=True)
+def get_slow_requests():
+    return profiler.slow_requests()
+
+
+# Load the compiled registry snapshot, or parse the registry data and build
+# its indexes up front, then hot reload the data when it changes and record
+# the changed records. Under gunicorn this runs once in the master, see
+# gunicorn.conf.py
+if not load_snapshot(SNAPSHOT_PATH):
+    registry.preload()
+    v1.build_indexes()
+v1.changes.change_log.track()
+registry.start_watcher()
 
 if __name__ == "__main__":
     app.run(
@@ -0,0 +1,867 @@
+"""Benchmark every /v1 route against synthetic registries of growing size.
+
+The synthetic registry is the real data/ tree cloned onto more chains and
+with more entries per network, keeping every cross reference (slugs, code
+IDs, denoms) valid. Run from the api/ directory:
+
+    python benchmark.py generate --scale 100 --output /tmp/aldus-100x
+    python benchmark.py run --scale 1 10 100 1000 --output results.json
+    python benchmark.py compare before.json after.json
+
+``generate`` only replaces an output directory that is empty or that it
+generated before, so pointing it at a real directory by mistake is an error.
+
+``run`` drives each route through the Flask test client and through a local
+gunicorn, and writes throughput, p50/p95/p99 latency and peak RSS per
+endpoint as JSON, so that results can be compared across commits. Memory is
+read from /proc, and for gunicorn it is the proportional set size of the
+master and its workers, so pages they share are only counted once.
+"""
+
+import argparse
+import hashlib
+import http.client
+import json
+import logging
+import math
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, urlencode
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(API_DIR, "..", "data")
+
+# Per-network data types that are multiplied, other files are copied as is
+SCALED_DATA_TYPES = ("accounts", "codes", "contracts", "modules", "pools")
+# Query strings sent to routes that need more than their path parameters
+ROUTE_QUERIES = {
+    "v1.entities.get_entites_details": {
+        "accounts": "true",
+        "codes": "true",
+        "contracts": "true",
+        "modules": "true",
+    },
+    "v1.entities.get_entity_by_network": {
+        "accounts": "true",
+        "codes": "true",
+        "contracts": "true",
+        "modules": "true",
+    },
+}
+# Path parameters of the detail routes of each data type, from a sample entry.
+# Routes of data types without any entry are not benchmarked
+SAMPLE_ARGS = {
+    "accounts": lambda account: {"address": account["address"]},
+    "codes": lambda code: {"code_id": code["id"]},
+    "contracts": lambda contract: {"contract_address": contract["address"]},
+    "modules": lambda module: {
+        "module_address": module["address"],
+        "module_name": module["name"],
+    },
+    "pools": lambda pool: {"pool_id": pool["id"], "pool_address": pool["address"]},
+    "verified": lambda verified: {
+        "code_id": verified["id"],
+        "checksum": verified["checksum"],
+    },
+}
+# Written in every generated data directory, which is only replaced if it has it
+GENERATED_MARKER = ".aldus-benchmark"
+PERCENTILES = (50, 95, 99)
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def read_json(path: str) -> Any:
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_json(path: str, data: Any):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(data, file)
+
+
+def mutate(value: str, tag: str) -> str:
+    """
+    Derive a distinct, deterministic address or denom from an existing one.
+
+    The bech32 prefix, or the 0x of hex addresses, is kept so that the value
+    still looks like an address of the same chain.
+
+    Args:
+        value (str): The original address or denom.
+        tag (str): Identifies the copy, the same tag always gives the same value.
+
+    Returns:
+        str: The new value.
+    """
+    digest = hashlib.sha256(f"{tag}:{value}".encode()).hexdigest()
+    if value.startswith("0x"):
+        return "0x" + digest[: max(len(value) - 2, 40)]
+    prefix, separator, rest = value.rpartition("1")
+    if not separator or not rest:
+        return f"{value}-{digest[:8]}"
+    digest = digest * math.ceil(len(rest) / len(digest))
+    return f"{prefix}1{digest[: len(rest)]}"
+
+
+def scale_factors(scale: int) -> Tuple[int, int]:
+    """
+    Split a scale into chain copies and entry copies per network.
+
+    Growing both keeps the number of networks and the size of each file
+    realistic, instead of only adding networks or only growing files.
+
+    Args:
+        scale (int): The overall size multiplier.
+
+    Returns:
+        Tuple[int, int]: The number of copies of every chain, and of every entry of a network file.
+    """
+    copies = max(1, round(math.sqrt(scale)))
+    return copies, max(1, round(scale / copies))
+
+
+def chain_name(chain: str, copy: int) -> str:
+    return chain if copy == 0 else f"{chain}{copy}"
+
+
+def slug_name(slug: str, copy: int) -> str:
+    return slug if copy == 0 else f"{slug}-{copy}"
+
+
+def scale_entry(data_type: str, entry: dict, copy: int, tag: str, stride: int):
+    """
+    Get a copy of a network file entry with unique keys.
+
+    Args:
+        data_type (str): The type of data (e.g., "accounts", "codes").
+        entry (dict): The original entry.
+        copy (int): The index of the copy within the network, 0 for the original.
+        tag (str): Identifies the chain copy and the entry copy.
+        stride (int): Added to numeric IDs once per copy, larger than every original ID.
+
+    Returns:
+        dict: The copied entry.
+    """
+    entry = dict(entry)
+    if "slug" in entry:
+        entry["slug"] = slug_name(entry["slug"], copy)
+    if "address" in entry and tag:
+        entry["address"] = mutate(entry["address"], tag)
+    if data_type in ("codes", "pools"):
+        entry["id"] = entry["id"] + copy * stride
+    if data_type == "contracts":
+        entry["code"] = int(entry["code"]) + copy * stride
+    return entry
+
+
+def generate(scale: int, output: str, source: str = DATA_DIR) -> dict:
+    """
+    Write a synthetic registry about ``scale`` times the size of the real one.
+
+    Args:
+        scale (int): The size multiplier.
+        output (str): The data directory to write, replaced if it was generated before.
+        source (str, optional): The registry to grow. Defaults to the repository's data/ directory.
+
+    Raises:
+        FileExistsError: If the output is a non-empty directory that was not generated.
+
+    Returns:
+        dict: The number of files and of entries of each data type written.
+    """
+    copies, multiplier = scale_factors(scale)
+    if os.path.exists(output):
+        if os.listdir(output) and not os.path.exists(
+            os.path.join(output, GENERATED_MARKER)
+        ):
+            raise FileExistsError(
+                f"Not replacing {output}: it is not empty and was not generated "
+                f"by this script"
+            )
+        shutil.rmtree(output)
+    os.makedirs(output)
+    with open(os.path.join(output, GENERATED_MARKER), "w"):
+        pass
+    counts: Dict[str, int] = {}
+
+    entities = read_json(os.path.join(source, "entities.json"))
+    write_json(
+        os.path.join(output, "entities.json"),
+        [
+            dict(
+                entity,
+                slug=slug_name(entity["slug"], copy),
+                name=f"{entity['name']} {copy}" if copy else entity["name"],
+            )
+            for copy in range(scale)
+            for entity in entities
+        ],
+    )
+    counts["entities"] = len(entities) * scale
+
+    chains = read_json(os.path.join(source, "chains.json"))
+    write_json(
+        os.path.join(output, "chains.json"),
+        {
+            chain_name(name, copy): dict(
+                chain, name=f"{chain['name']} {copy}" if copy else chain["name"]
+            )
+            for copy in range(copies)
+            for name, chain in chains.items()
+        },
+    )
+    counts["chains"] = len(chains) * copies
+
+    assets = []
+    for copy in range(multiplier):
+        for asset in read_json(os.path.join(source, "assets.json")):
+            ids = {}
+            for chain, networks in asset["id"].items():
+                for chain_copy in range(copies):
+                    tag = f"{chain_copy}:{copy}" if chain_copy or copy else ""
+                    ids[chain_name(chain, chain_copy)] = {
+                        network: mutate(denom, tag) if tag else denom
+                        for network, denom in networks.items()
+                    }
+            assets.append(
+                dict(
+                    asset,
+                    id=ids,
+                    symbol=f"{asset['symbol']}{copy}" if copy else asset["symbol"],
+                    name=f"{asset['name']} {copy}" if copy else asset["name"],
+                    slugs=[slug_name(slug, copy) for slug in asset["slugs"]],
+                )
+            )
+    write_json(os.path.join(output, "assets.json"), assets)
+    counts["assets"] = len(assets)
+
+    files = 3
+    for chain in sorted(os.listdir(source)):
+        chain_dir = os.path.join(source, chain)
+        if not os.path.isdir(chain_dir) or chain.startswith((".", "_")):
+            continue
+        for network in sorted(os.listdir(chain_dir)):
+            network_dir = os.path.join(chain_dir, network)
+            if not os.path.isdir(network_dir):
+                continue
+            for file in sorted(os.listdir(network_dir)):
+                data_type, extension = os.path.splitext(file)
+                if extension != ".json":
+                    continue
+                data = read_json(os.path.join(network_dir, file))
+                ids = [entry.get("id", 0) for entry in data if isinstance(entry, dict)]
+                stride = max(ids, default=0) + 1
+                for chain_copy in range(copies):
+                    if data_type in SCALED_DATA_TYPES:
+                        scaled = [
+                            scale_entry(
+                                data_type,
+                                entry,
+                                copy,
+                                f"{chain_copy}:{copy}" if chain_copy or copy else "",
+                                stride,
+                            )
+                            for copy in range(multiplier)
+                            for entry in data
+                        ]
+                    else:
+                        scaled = data
+                    path = os.path.join(
+                        output, chain_name(chain, chain_copy), network, file
+                    )
+                    write_json(path, scaled)
+                    files += 1
+                    counts[data_type] = counts.get(data_type, 0) + len(scaled)
+
+    logging.info(
+        f"Generated {files} files at {scale}x ({copies} chain copies, "
+        f"{multiplier}x entries per network) in {output}"
+    )
+    return {"files": files, "copies": copies, "multiplier": multiplier, **counts}
+
+
+def sample_requests(data_dir: str, url_map) -> List[dict]:
+    """
+    Build one request for every /v1 route, with path parameters taken from
+    the registry so that detail routes find their entry.
+
+    Args:
+        data_dir (str): The data directory the API serves.
+        url_map: The application's URL map.
+
+    Returns:
+        List[dict]: The endpoint, method, URL and JSON body of each request.
+    """
+    samples: Dict[str, Tuple[str, str, dict]] = {}
+    for chain in sorted(os.listdir(data_dir)):
+        chain_dir = os.path.join(data_dir, chain)
+        if not os.path.isdir(chain_dir):
+            continue
+        for network in sorted(os.listdir(chain_dir)):
+            for data_type in SAMPLE_ARGS:
+                path = os.path.join(chain_dir, network, f"{data_type}.json")
+                if data_type in samples or not os.path.exists(path):
+                    continue
+                data = read_json(path)
+                if data:
+                    # The middle entry, to avoid best cases of linear scans
+                    samples[data_type] = (chain, network, data[len(data) // 2])
+
+    chain, network, contract = samples["contracts"]
+    entities = {entity["slug"] for entity in read_json(f"{data_dir}/entities.json")}
+    slug = contract["slug"] if contract["slug"] in entities else sorted(entities)[0]
+    denoms = [
+        (asset_chain, asset_network, denom)
+        for asset in read_json(f"{data_dir}/assets.json")
+        for asset_chain, networks in asset["id"].items()
+        for asset_network, denom in networks.items()
+    ]
+    denom = denoms[len(denoms) // 2][2]
+    account = samples["accounts"][2]["address"]
+    code_id = samples["codes"][2]["id"]
+    values = {
+        data_type: sample_args(samples[data_type][2])
+        for data_type, sample_args in SAMPLE_ARGS.items()
+        if data_type in samples
+    }
+    bodies = {
+        "v1.assets.post_assets_by_id": {"ids": [denom, "unknown"]},
+        "v1.resolve.post_resolve": {
+            "addresses": [account, contract["address"], "unknown"],
+            "code_ids": [code_id, -1],
+        },
+        "v1.resolve.post_resolve_networks": {
+            "addresses": [account, contract["address"]],
+            "code_ids": [code_id],
+            "networks": [
+                {"chain": sample[0], "network": sample[1]}
+                for sample in samples.values()
+            ],
+        },
+    }
+    queries = dict(ROUTE_QUERIES, **{"v1.search.get_search": {"q": slug[:4]}})
+
+    adapter = url_map.bind("localhost")
+    requests = []
+    for rule in sorted(url_map.iter_rules(), key=lambda rule: rule.rule):
+        if not rule.endpoint.startswith("v1."):
+            continue
+        method = "POST" if "POST" in rule.methods else "GET"
+        args = {"chain": chain, "network": network}
+        # The routes of a data type only take its own values, as code_id is
+        # both a code and a verified code parameter
+        blueprint = rule.endpoint.split(".")[1]
+        for data_type, data_values in values.items():
+            if set(data_values) & set(rule.arguments) and (
+                blueprint == data_type or blueprint not in SAMPLE_ARGS
+            ):
+                args.update(data_values)
+                args["chain"], args["network"] = samples[data_type][:2]
+        args.update(
+            {
+                "entity_slug": slug,
+                "asset_id": denom,
+                "address": args.get("address", contract["address"]),
+            }
+        )
+        args = {name: value for name, value in args.items() if name in rule.arguments}
+        if set(rule.arguments) - set(args):
+            logging.info(f"Skipping {rule.rule}: no {blueprint} to sample")
+            continue
+        url = adapter.build(rule.endpoint, args, method=method)
+        if rule.endpoint in queries:
+            url = f"{url}?{urlencode(queries[rule.endpoint])}"
+        requests.append(
+            {
+                "endpoint": rule.endpoint,
+                "method": method,
+                "url": quote(url, safe="/?=&:"),
+                "body": bodies.get(rule.endpoint),
+            }
+        )
+    return requests
+
+
+def percentile(values: List[float], rank: int) -> float:
+    """
+    Get a nearest-rank percentile.
+
+    Args:
+        values (List[float]): The sorted values.
+        rank (int): The percentile, from 0 to 100.
+
+    Returns:
+        float: The value below which ``rank`` percent of the values are.
+    """
+    if not values:
+        return 0.0
+    index = max(0, math.ceil(rank / 100 * len(values)) - 1)
+    return values[index]
+
+
+def summarize(
+    request: dict, latencies: List[float], elapsed: float, statuses: Dict, rss: int
+) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "endpoint": request["endpoint"],
+        "method": request["method"],
+        "url": request["url"],
+        "requests": len(latencies),
+        "statuses": {str(status): count for status, count in statuses.items()},
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            **{f"p{rank}": percentile(latencies, rank) * 1000 for rank in PERCENTILES},
+        },
+        "peak_rss_bytes": rss,
+    }
+
+
+def process_rss(pid: int, proportional: bool = False) -> int:
+    """
+    Get the resident memory of a process and its children, in bytes.
+
+    Args:
+        pid (int): The process ID.
+        proportional (bool, optional): Whether to count pages shared between processes, such as the copy-on-write registry of gunicorn workers, once in total rather than once per process. Defaults to False.
+
+    Returns:
+        int: The memory in bytes, 0 if the process is gone.
+    """
+    total = 0
+    try:
+        if proportional:
+            with open(f"/proc/{pid}/smaps_rollup") as file:
+                for line in file:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1]) * 1024
+                        break
+        else:
+            with open(f"/proc/{pid}/statm") as file:
+                total += int(file.read().split()[1]) * PAGE_SIZE
+        with open(f"/proc/{pid}/task/{pid}/children") as file:
+            children = [int(child) for child in file.read().split()]
+    except (FileNotFoundError, ProcessLookupError):
+        return total
+    return total + sum(process_rss(child, proportional) for child in children)
+
+
+def run_client(data_dir: str, requests: int, cache: bool) -> dict:
+    """
+    Benchmark every route in this process through the Flask test client.
+
+    Args:
+        data_dir (str): The data directory to serve.
+        requests (int): The number of timed requests per route.
+        cache (bool): Whether to serve repeated requests from the response cache.
+
+    Returns:
+        dict: The startup timings and the results of each route.
+    """
+    os.environ["ALDUS_DATA_DIR"] = data_dir
+    os.environ["ALDUS_RELOAD_INTERVAL"] = "0"
+    os.environ["ALDUS_SNAPSHOT"] = ""
+    os.environ.setdefault("ALDUS_URL", "http://localhost:8080")
+    if not cache:
+        os.environ["ALDUS_CACHE_MAX_BYTES"] = "0"
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # The API reads its configuration at import, after the environment is set
+    start = time.perf_counter()
+    from registry import registry
+    from routes import v1
+
+    imported = time.perf_counter()
+    registry.preload()
+    loaded = time.perf_counter()
+    v1.build_indexes()
+    indexed = time.perf_counter()
+    from app import app
+
+    startup = {
+        "import_s": imported - start,
+        "load_s": loaded - imported,
+        "index_s": indexed - loaded,
+        "total_s": time.perf_counter() - start,
+        "rss_bytes": process_rss(os.getpid()),
+    }
+
+    client = app.test_client()
+    results = []
+    for request in sample_requests(data_dir, app.url_map):
+        send = client.post if request["method"] == "POST" else client.get
+        # Warm up derived values that are only built on first use
+        send(request["url"], json=request["body"])
+        latencies = []
+        statuses: Dict[int, int] = {}
+        peak = 0
+        begin = time.perf_counter()
+        for _ in range(requests):
+            sent = time.perf_counter()
+            response = send(request["url"], json=request["body"])
+            response.get_data()
+            latencies.append(time.perf_counter() - sent)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+            peak = max(peak, process_rss(os.getpid()))
+        elapsed = time.perf_counter() - begin
+        results.append(summarize(request, latencies, elapsed, statuses, peak))
+    return {
+        "startup": startup,
+        "max_rss_bytes": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        "endpoints": results,
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_gunicorn(
+    data_dir: str, requests: int, cache: bool, workers: int, concurrency: int
+) -> dict:
+    """
+    Benchmark every route through a local gunicorn started with the API's
+    gunicorn.conf.py.
+
+    Args:
+        data_dir (str): The data directory to serve.
+        requests (int): The number of timed requests per route.
+        cache (bool): Whether to serve repeated requests from the response cache.
+        workers (int): The number of gunicorn workers.
+        concurrency (int): The number of client connections sending requests in parallel.
+
+    Returns:
+        dict: The startup time and the results of each route.
+    """
+    port = free_port()
+    env = dict(
+        os.environ,
+        ALDUS_DATA_DIR=data_dir,
+        ALDUS_RELOAD_INTERVAL="0",
+        ALDUS_SNAPSHOT="",
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+    )
+    env.setdefault("ALDUS_URL", f"http://localhost:{port}")
+    if not cache:
+        env["ALDUS_CACHE_MAX_BYTES"] = "0"
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app"],
+        cwd=API_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+            try:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                connection.request("GET", "/v1/globals/chains?limit=1")
+                connection.getresponse().read()
+                break
+            except OSError:
+                time.sleep(0.1)
+        startup = {
+            "total_s": time.perf_counter() - start,
+            "rss_bytes": process_rss(server.pid, proportional=True),
+        }
+
+        results = []
+        for request in sample_requests(data_dir, route_map()):
+            results.append(drive(request, port, requests, concurrency, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
+    return {"startup": startup, "endpoints": results}
+
+
+def route_map():
+    """
+    Get the URL map of the API without loading any registry data.
+
+    Importing ``app`` would preload the data directory it was configured
+    with, so the v1 blueprint is registered on a bare application instead.
+
+    Returns:
+        Map: The URL map.
+    """
+    os.environ.setdefault("ALDUS_URL", "http://localhost:8080")
+    from apiflask import APIFlask
+    from routes import v1
+
+    app = APIFlask(__name__)
+    app.register_blueprint(v1.v1_bp, url_prefix="/v1")
+    return app.url_map
+
+
+def drive(request: dict, port: int, requests: int, concurrency: int, pid: int):
+    """
+    Send a request repeatedly from parallel keep-alive connections.
+
+    Args:
+        request (dict): The endpoint, method, URL and JSON body.
+        port (int): The port gunicorn listens on.
+        requests (int): The number of timed requests.
+        concurrency (int): The number of parallel connections.
+        pid (int): The gunicorn master, whose process tree memory is sampled.
+
+    Returns:
+        dict: The results of the route.
+    """
+    body = json.dumps(request["body"]) if request["body"] is not None else None
+    headers = {"Content-Type": "application/json"} if body is not None else {}
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    remaining = [requests]
+    lock = threading.Lock()
+    done = threading.Event()
+    peak = [process_rss(pid, proportional=True)]
+
+    def send(connection: http.client.HTTPConnection) -> int:
+        connection.request(request["method"], request["url"], body, headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def client():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        send(connection)
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            sent = time.perf_counter()
+            try:
+                status = send(connection)
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                status = 0
+            elapsed = time.perf_counter() - sent
+            with lock:
+                latencies.append(elapsed)
+                statuses[status] = statuses.get(status, 0) + 1
+        connection.close()
+
+    def sample():
+        while not done.wait(0.05):
+            peak[0] = max(peak[0], process_rss(pid, proportional=True))
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    begin = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - begin
+    done.set()
+    sampler.join()
+    return summarize(request, latencies, elapsed, statuses, peak[0])
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=API_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> dict:
+    """
+    Generate each scale and benchmark it in every mode.
+
+    Client runs happen in a fresh interpreter per scale, since the API reads
+    its data directory once at import.
+
+    Args:
+        args (argparse.Namespace): The parsed ``run`` arguments.
+
+    Returns:
+        dict: The benchmark report.
+    """
+    report = {
+        "revision": git_revision(),
+        "python": ".".join(map(str, sys.version_info[:3])),
+        "started_at": time.time(),
+        "requests": args.requests,
+        "cache": args.cache,
+        "runs": [],
+    }
+    workdir = args.workdir or tempfile.mkdtemp(prefix="aldus-benchmark-")
+    try:
+        for scale in args.scale:
+            data_dir = os.path.join(workdir, f"{scale}x")
+            start = time.perf_counter()
+            counts = generate(scale, data_dir)
+            logging.info(f"Generated {scale}x in {time.perf_counter() - start:.1f}s")
+            for mode in args.mode:
+                logging.info(f"Benchmarking {scale}x through {mode}")
+                if mode == "client":
+                    command = [
+                        sys.executable,
+                        os.path.abspath(__file__),
+                        "client",
+                        "--data",
+                        data_dir,
+                        "--requests",
+                        str(args.requests),
+                    ]
+                    if args.cache:
+                        command.append("--cache")
+                    output = subprocess.run(
+                        command, cwd=API_DIR, capture_output=True, text=True, check=True
+                    ).stdout
+                    result = json.loads(output)
+                else:
+                    result = run_gunicorn(
+                        data_dir,
+                        args.requests,
+                        args.cache,
+                        args.workers,
+                        args.concurrency,
+                    )
+                    result["workers"] = args.workers
+                    result["concurrency"] = args.concurrency
+                report["runs"].append(
+                    {"scale": scale, "mode": mode, "data": counts, **result}
+                )
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return report
+
+
+def compare(before: dict, after: dict) -> List[dict]:
+    """
+    Compare two benchmark reports endpoint by endpoint.
+
+    Args:
+        before (dict): The baseline report.
+        after (dict): The new report.
+
+    Returns:
+        List[dict]: The ratio of the new to the baseline throughput, p50 and p99 latency and peak RSS of every endpoint in both reports.
+    """
+
+    def index(report: dict) -> Dict[tuple, dict]:
+        return {
+            (run["scale"], run["mode"], result["endpoint"]): result
+            for run in report["runs"]
+            for result in run["endpoints"]
+        }
+
+    def ratio(new: float, old: float) -> Optional[float]:
+        return round(new / old, 3) if old else None
+
+    old, new = index(before), index(after)
+    rows = []
+    for key in sorted(old.keys() & new.keys(), key=str):
+        rows.append(
+            {
+                "scale": key[0],
+                "mode": key[1],
+                "endpoint": key[2],
+                "throughput": ratio(
+                    new[key]["throughput_rps"], old[key]["throughput_rps"]
+                ),
+                "p50": ratio(
+                    new[key]["latency_ms"]["p50"], old[key]["latency_ms"]["p50"]
+                ),
+                "p99": ratio(
+                    new[key]["latency_ms"]["p99"], old[key]["latency_ms"]["p99"]
+                ),
+                "peak_rss": ratio(
+                    new[key]["peak_rss_bytes"], old[key]["peak_rss_bytes"]
+                ),
+            }
+        )
+    return rows
+
+
+def dump(data: Any, output: Optional[str]):
+    if output:
+        with open(output, "w") as file:
+            json.dump(data, file, indent=2)
+    else:
+        json.dump(data, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="write a synthetic registry")
+    generate_parser.add_argument("--scale", type=int, default=10)
+    generate_parser.add_argument("--output", required=True)
+
+    run_parser = commands.add_parser("run", help="generate and benchmark registries")
+    run_parser.add_argument("--scale", type=int, nargs="+", default=[1, 10, 100, 1000])
+    run_parser.add_argument(
+        "--mode",
+        nargs="+",
+        choices=["client", "gunicorn"],
+        default=["client", "gunicorn"],
+    )
+    run_parser.add_argument("--requests", type=int, default=200, help="per endpoint")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="serve repeated requests from the response cache, which otherwise "
+        "is disabled so that every request is rendered",
+    )
+    run_parser.add_argument("--workdir", help="keep the generated registries here")
+    run_parser.add_argument("--output", help="write the report here instead of stdout")
+
+    client_parser = commands.add_parser(
+        "client", help="benchmark one registry through the Flask test client"
+    )
+    client_parser.add_argument("--data", required=True)
+    client_parser.add_argument("--requests", type=int, default=200)
+    client_parser.add_argument("--cache", action="store_true")
+
+    compare_parser = commands.add_parser("compare", help="compare two reports")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+    compare_parser.add_argument("--output")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        try:
+            dump(generate(args.scale, args.output), None)
+        except FileExistsError as e:
+            parser.error(str(e))
+    elif args.command == "run":
+        dump(run(args), args.output)
+    elif args.command == "client":
+        dump(run_client(os.path.abspath(args.data), args.requests, args.cache), None)
+    else:
+        dump(compare(read_json(args.before), read_json(args.after)), args.output)
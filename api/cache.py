@@ -0,0 +1,258 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, Response, g, request
+
+from constants import CACHE_MAX_BYTES, COMPRESS_MIN_BYTES
+from metrics import metrics, route_label
+from registry import registry
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BROTLI_QUALITY = 9
+GZIP_LEVEL = 9
+
+
+def compress(body: bytes) -> Dict[str, bytes]:
+    """Encode a response body with every supported content encoding.
+
+    Args:
+        body (bytes): The uncompressed body.
+
+    Returns:
+        Dict[str, bytes]: The encoded bodies by content encoding, best first.
+    """
+    encodings = {}
+    if brotli is not None:
+        encodings["br"] = brotli.compress(
+            body, mode=brotli.MODE_TEXT, quality=BROTLI_QUALITY
+        )
+    encodings["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return encodings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    """The final encoded body of a response, its strong ETag and its
+    precompressed variants."""
+
+    body: bytes
+    content_type: str
+    etag: str
+    version: Any
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encodings.values())
+
+
+class ResponseCache:
+    """LRU cache of encoded GET responses for the read-only API routes.
+
+    Responses are keyed by endpoint, path parameters and the normalized query
+    string, and tagged with the registry version they were rendered from.
+    Entries from an older version are never served and the whole cache is
+    dropped whenever the registry reloads a data file.
+
+    Bodies of at least ``COMPRESS_MIN_BYTES`` are compressed once when they
+    are cached, and each request is answered with the variant its
+    Accept-Encoding header prefers, by q-value.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self._entries: "OrderedDict[tuple, CachedResponse]" = OrderedDict()
+        self._versions: Dict[str, Callable[[], int]] = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app: Flask):
+        """Serve the app's GET routes through the cache.
+
+        Args:
+            app (Flask): The application.
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        registry.subscribe(lambda changed: self.clear())
+        metrics.add_collector(self._metric_samples)
+
+    def track(self, endpoints: Iterable[str], version: Callable[[], int]):
+        """Also tag the responses of some endpoints with the version of data
+        that is not in the registry, such as the fetched asset prices, so
+        that they are rendered again when it changes.
+
+        Args:
+            endpoints (Iterable[str]): The endpoint names.
+            version (Callable[[], int]): Gets the current version of the data.
+        """
+        for endpoint in endpoints:
+            self._versions[endpoint] = version
+
+    def version(self, endpoint: str) -> Any:
+        """Get the version of the data the responses of an endpoint depend on.
+
+        Args:
+            endpoint (str): The endpoint name.
+
+        Returns:
+            Any: The registry version, with the version of any tracked data.
+        """
+        version = self._versions.get(endpoint)
+        if version is None:
+            return registry.version
+        return (registry.version, version())
+
+    def get(self, key: tuple) -> Optional[CachedResponse]:
+        version = self.version(key[0])
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.version != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: tuple, entry: CachedResponse):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous.size
+            self._entries[key] = entry
+            self.size += entry.size
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted.size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> dict:
+        """Get the cache counters.
+
+        Returns:
+            dict: Hits, misses, hit ratio, entry count and size in bytes.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "size": self.size,
+                "max_size": self.max_bytes,
+            }
+
+    def _metric_samples(self) -> List[Tuple[str, tuple, float]]:
+        with self._lock:
+            return [
+                ("aldus_response_cache_hits_total", (), self.hits),
+                ("aldus_response_cache_misses_total", (), self.misses),
+                ("aldus_response_cache_entries", (), len(self._entries)),
+                ("aldus_response_cache_size_bytes", (), self.size),
+            ]
+
+    def _key(self) -> Optional[Tuple]:
+        if request.method != "GET" or request.blueprint is None:
+            return None
+        # Set by hooks that need the response rendered, such as profiling
+        if g.get("cache_bypass"):
+            return None
+        if not request.blueprint.startswith("v1"):
+            return None
+        view_args = tuple(sorted((request.view_args or {}).items()))
+        query = tuple(sorted(request.args.items(multi=True)))
+        return (request.endpoint, view_args, query)
+
+    def _before_request(self):
+        key = self._key()
+        if key is None:
+            return None
+        g.cache_key = key
+        g.cache_version = self.version(key[0])
+        entry = self.get(key)
+        if entry is None:
+            return None
+        g.cache_hit = True
+        return self._respond(entry, "HIT")
+
+    def _after_request(self, response: Response) -> Response:
+        key = g.pop("cache_key", None)
+        version = g.pop("cache_version", None)
+        if key is None or g.pop("cache_hit", False):
+            return response
+        # Buffering a streamed response would defeat its bounded memory use
+        if response.status_code != 200 or response.direct_passthrough:
+            return response
+        if response.is_streamed:
+            return response
+        body = response.get_data()
+        # A reload during rendering would cache stale data under the new
+        # version, and bodies over the cache size are never cached. Only
+        # bodies that are cached are worth compressing
+        cacheable = version == self.version(key[0]) and len(body) <= self.max_bytes
+        encodings = {}
+        if cacheable and len(body) >= COMPRESS_MIN_BYTES:
+            start = time.perf_counter()
+            encodings = compress(body)
+            metrics.observe(
+                "aldus_response_compress_seconds",
+                (("route", route_label()),),
+                time.perf_counter() - start,
+            )
+        entry = CachedResponse(
+            body=body,
+            content_type=response.content_type,
+            etag=hashlib.sha256(body).hexdigest(),
+            version=version,
+            encodings=encodings,
+            headers=tuple(
+                (name, value)
+                for name, value in response.headers.items()
+                if name not in ("Content-Type", "Content-Length")
+            ),
+        )
+        if cacheable:
+            self.put(key, entry)
+        return self._respond(entry, "MISS", response)
+
+    def _respond(
+        self, entry: CachedResponse, status: str, response: Response = None
+    ) -> Response:
+        if response is None:
+            response = Response(content_type=entry.content_type)
+            response.headers.extend(entry.headers)
+        body, etag = entry.body, entry.etag
+        # Ties between q-values go to the first, best compressed encoding
+        encoding = request.accept_encodings.best_match(
+            list(entry.encodings) + ["identity"]
+        )
+        if encoding in entry.encodings:
+            body, etag = entry.encodings[encoding], f"{entry.etag}-{encoding}"
+            response.headers["Content-Encoding"] = encoding
+        response.set_data(body)
+        response.set_etag(etag)
+        response.vary.add("Accept-Encoding")
+        response.headers["X-Cache"] = status
+        return response.make_conditional(request)
+
+
+response_cache = ResponseCache(CACHE_MAX_BYTES)
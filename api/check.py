@@ -0,0 +1,316 @@
+"""Check the registry data files against the API schemas and each other.
+
+Every data file is validated against the schema of its route, its values
+are checked to be in the types of the schema, and the entity slugs and
+code IDs it refers to are checked to exist. Run from the api/ directory:
+
+    python check.py
+    python check.py --fix
+
+--fix rewrites the files whose values can be converted, e.g. a code ID
+stored as "98", in their original indentation. The results of each file
+are cached by the hash of its contents, so that only the files that
+changed since the last run are parsed and validated again. Cross-references
+are checked on every run, from the cached slugs and code IDs of each file.
+
+Errors already in the data are listed in .check-baseline.json, and only
+errors beyond those fail the check. Messages are compared without their list
+indexes, so inserting entries does not turn baselined errors into new ones.
+After fixing data, or to accept its current errors, rewrite the baseline:
+
+    python check.py --update-baseline
+
+The exit status is 1 if any error outside the baseline is found, or any
+warning with --strict, which makes the script usable as a pre-commit hook.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+
+# Only the data directory is needed, not the URL the API is served at
+os.environ.setdefault("ALDUS_URL", "")
+
+import validation  # noqa: E402
+from constants import DATA_DIR  # noqa: E402
+from validation import (  # noqa: E402
+    SCHEMAS,
+    check_references,
+    collect_references,
+    normalize_data,
+    validate_data,
+)
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CACHE = os.path.join(API_DIR, "..", ".check-cache.json")
+DEFAULT_BASELINE = os.path.join(API_DIR, "..", ".check-baseline.json")
+# Bumped whenever the layout of the cached results changes
+CACHE_FORMAT = 1
+
+
+def schemas_digest() -> str:
+    """
+    Get a hash of the source of the validation and of the modules defining
+    the schemas, so that the cached results are discarded when the checks,
+    a validator or a schema change.
+
+    Returns:
+        str: The hex digest of the source files.
+    """
+    paths = {os.path.abspath(validation.__file__)}
+    for schema in SCHEMAS.values():
+        for cls in schema.__mro__:
+            path = os.path.abspath(getattr(sys.modules[cls.__module__], "__file__", ""))
+            if path.startswith(API_DIR + os.sep):
+                paths.add(path)
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(os.path.relpath(path, API_DIR).encode() + b"\0")
+        with open(path, "rb") as file:
+            digest.update(file.read() + b"\0")
+    return digest.hexdigest()
+
+
+def strip_indexes(message: str) -> str:
+    """
+    Remove the list indexes from an error message, e.g. the "[52]" of
+    "accounts.json[52].slug: ...", so that it still matches its baseline
+    once entries are inserted before it.
+
+    Args:
+        message (str): The error message.
+
+    Returns:
+        str: The message with every index replaced by "[]".
+    """
+    return re.sub(r"\[\d+\]", "[]", message)
+
+
+def load_baseline(path: str) -> Counter:
+    """
+    Read the errors accepted in the data.
+
+    Args:
+        path (str): The baseline file, or an empty string for no baseline.
+
+    Returns:
+        Counter: How many times each error, without its indexes, is accepted.
+    """
+    if not path or not os.path.exists(path):
+        return Counter()
+    with open(path) as file:
+        return Counter(json.load(file)["errors"])
+
+
+def write_baseline(path: str, errors: List[str]) -> None:
+    """
+    Accept the current errors in the data.
+
+    Args:
+        path (str): The baseline file.
+        errors (List[str]): The errors found.
+    """
+    with open(path, "w") as file:
+        json.dump({"errors": sorted(map(strip_indexes, errors))}, file, indent=2)
+        file.write("\n")
+
+
+def new_errors(errors: List[str], baseline: Counter) -> List[str]:
+    """
+    Get the errors that are not accepted by the baseline. Each baselined
+    message accepts as many errors as it is listed, so that a repeated error
+    in new data is still reported.
+
+    Args:
+        errors (List[str]): The errors found.
+        baseline (Counter): The accepted errors, see ``load_baseline``.
+
+    Returns:
+        List[str]: The errors beyond the baseline, in their original order.
+    """
+    accepted = Counter(baseline)
+    found = []
+    for error in errors:
+        key = strip_indexes(error)
+        if accepted[key]:
+            accepted[key] -= 1
+        else:
+            found.append(error)
+    return found
+
+
+def dump_like(data: Any, text: str) -> str:
+    """
+    Encode data as JSON, indented like the file it was read from.
+
+    Args:
+        data (Any): The data.
+        text (str): The original contents of the file.
+
+    Returns:
+        str: The encoded data.
+    """
+    match = re.search(r"\n([ \t]+)\S", text)
+    body = json.dumps(data, indent=match.group(1) if match else 2, ensure_ascii=False)
+    return f"{body}\n" if text.endswith("\n") else body
+
+
+def check_file(root: str, path: str, body: bytes, fix: bool) -> Tuple[dict, bytes]:
+    """
+    Validate, and normalize if asked to, one data file.
+
+    Args:
+        root (str): The data directory.
+        path (str): The path of the file, relative to the data directory.
+        body (bytes): The contents of the file.
+        fix (bool): Whether to rewrite the file with its values normalized.
+
+    Returns:
+        Tuple[dict, bytes]: The results to cache, and the contents of the file after any fix.
+    """
+    try:
+        text = body.decode()
+        data = json.loads(text)
+    except ValueError as e:
+        return {
+            "conversions": 0,
+            "errors": [f"{path}: invalid JSON: {e}"],
+            "references": collect_references(path, None),
+        }, body
+    normalized, conversions = normalize_data(path, data)
+    if conversions and fix:
+        body = dump_like(normalized, text).encode()
+        with open(os.path.join(root, path), "wb") as file:
+            file.write(body)
+        logging.info(f"Fixed {len(conversions)} values in {path}")
+        conversions = []
+    return {
+        "conversions": len(conversions),
+        "errors": conversions + validate_data(path, normalized),
+        "references": collect_references(path, normalized),
+    }, body
+
+
+def check(
+    root: str = DATA_DIR, cache_path: str = DEFAULT_CACHE, fix: bool = False
+) -> Tuple[List[str], List[str]]:
+    """
+    Check every data file, reusing the cached results of unchanged files.
+
+    Args:
+        root (str, optional): The data directory. Defaults to ALDUS_DATA_DIR.
+        cache_path (str, optional): The cache file, or an empty string for no cache. Defaults to .check-cache.json at the repository root.
+        fix (bool, optional): Whether to rewrite files with their values normalized. Defaults to False.
+
+    Returns:
+        Tuple[List[str], List[str]]: The errors and the warnings.
+    """
+    start = time.perf_counter()
+    digest = schemas_digest()
+    cached: Dict[str, dict] = {}
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as file:
+                cache = json.load(file)
+            if cache.get("format") == CACHE_FORMAT and cache.get("schemas") == digest:
+                cached = cache["files"]
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f"Ignoring unreadable cache {cache_path}: {e}")
+
+    files = {}
+    checked = 0
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            if not name.endswith(".json"):
+                continue
+            full_path = os.path.join(directory, name)
+            path = os.path.relpath(full_path, root).replace(os.sep, "/")
+            with open(full_path, "rb") as file:
+                body = file.read()
+            source = hashlib.sha256(body).hexdigest()
+            entry = cached.get(path)
+            # Cached conversions are fixed by checking the file again
+            if (
+                entry is not None
+                and entry["source"] == source
+                and not (fix and entry["conversions"])
+            ):
+                files[path] = entry
+                continue
+            result, body = check_file(root, path, body, fix)
+            files[path] = {"source": hashlib.sha256(body).hexdigest(), **result}
+            checked += 1
+
+    errors = [error for entry in files.values() for error in entry["errors"]]
+    reference_errors, warnings = check_references(
+        {path: entry["references"] for path, entry in files.items()}
+    )
+    errors += reference_errors
+
+    if cache_path:
+        temp = f"{cache_path}.tmp"
+        with open(temp, "w") as file:
+            json.dump(
+                {
+                    "format": CACHE_FORMAT,
+                    "schemas": digest,
+                    "files": dict(sorted(files.items())),
+                },
+                file,
+            )
+        os.replace(temp, cache_path)
+    logging.info(
+        f"Checked {checked} of {len(files)} data files in "
+        f"{time.perf_counter() - start:.3f}s"
+    )
+    return errors, warnings
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--fix", action="store_true", help="rewrite files with their values normalized"
+    )
+    parser.add_argument(
+        "--strict", action="store_true", help="exit with an error on warnings too"
+    )
+    parser.add_argument("--data", default=DATA_DIR, help="the data directory")
+    parser.add_argument(
+        "--cache",
+        default=DEFAULT_CACHE,
+        help="the file caching the results of each data file, empty for no cache",
+    )
+    parser.add_argument(
+        "--baseline",
+        default=DEFAULT_BASELINE,
+        help="the file listing the accepted errors, empty for no baseline",
+    )
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="accept every error currently found by rewriting the baseline",
+    )
+    args = parser.parse_args()
+    errors, warnings = check(args.data, args.cache, args.fix)
+    if args.update_baseline:
+        write_baseline(args.baseline, errors)
+        logging.info(f"Wrote {len(errors)} errors to {args.baseline}")
+        sys.exit(0)
+    found = new_errors(errors, load_baseline(args.baseline))
+    if len(found) < len(errors):
+        logging.info(f"Ignoring {len(errors) - len(found)} errors in the baseline")
+    errors = found
+    for warning in warnings:
+        logging.warning(warning)
+    for error in errors:
+        logging.error(error)
+    logging.info(f"Found {len(errors)} errors and {len(warnings)} warnings")
+    sys.exit(1 if errors or (args.strict and warnings) else 0)
@@ -1,3 +1,53 @@
 import os
 
 ALDUS_URL = os.environ["ALDUS_URL"]
+
+# Root of the registry data tree, relative to the api/ directory by default
+DATA_DIR = os.environ.get(
+    "ALDUS_DATA_DIR", os.path.join(os.path.dirname(__file__), "..", "data")
+)
+
+# Seconds between checks for changed data files, 0 disables hot reloading
+RELOAD_INTERVAL = float(os.environ.get("ALDUS_RELOAD_INTERVAL", 5))
+
+# Upper bound in bytes for the encoded responses kept in memory
+CACHE_MAX_BYTES = int(os.environ.get("ALDUS_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+# Cached responses at least this large are also kept gzip and brotli encoded
+COMPRESS_MIN_BYTES = int(os.environ.get("ALDUS_COMPRESS_MIN_BYTES", 1024))
+
+# Compiled registry snapshot loaded at startup, raw JSON is parsed if unset
+SNAPSHOT_PATH = os.environ.get("ALDUS_SNAPSHOT", "")
+
+# Directory where each gunicorn worker shares its request metrics, so that
+# /metrics reports the totals of every worker, its slow requests and the
+# prices it fetched. Unset for a single process
+METRICS_DIR = os.environ.get("ALDUS_METRICS_DIR", "")
+
+# Secret that lets an operator profile a request and read the slow request
+# log. Profiling is disabled and the log is not served while it is unset
+PROFILE_TOKEN = os.environ.get("ALDUS_PROFILE_TOKEN", "")
+
+# Requests taking at least this many seconds have their stacks recorded in
+# the slow request log. The sampler costs CPU while requests are in flight, so
+# it is off by default, 0 disables it
+SLOW_REQUEST_SECONDS = float(os.environ.get("ALDUS_SLOW_REQUEST_SECONDS", 0))
+
+# Number of slow requests kept in the log
+SLOW_REQUEST_HISTORY = int(os.environ.get("ALDUS_SLOW_REQUEST_HISTORY", 50))
+
+# Number of reloads whose record level changes are kept for /v1/changes
+CHANGES_HISTORY = int(os.environ.get("ALDUS_CHANGES_HISTORY", 100))
+
+# Directory of the content-hashed logos compiled by logos.py, and the public
+# URL it is served from. Logos keep their original URLs while either is unset
+LOGOS_DIR = os.environ.get("ALDUS_LOGOS_DIR", "")
+LOGO_URL = os.environ.get("ALDUS_LOGO_URL", "").rstrip("/")
+
+# CoinGecko simple price endpoint the asset prices are fetched from, such as
+# https://api.coingecko.com/api/v3/simple/price. Prices are off while unset
+PRICES_URL = os.environ.get("ALDUS_PRICES_URL", "")
+
+# Seconds fetched prices are fresh for, and after which they are no longer served
+PRICES_TTL = float(os.environ.get("ALDUS_PRICES_TTL", 60))
+PRICES_MAX_AGE = float(os.environ.get("ALDUS_PRICES_MAX_AGE", 3600))
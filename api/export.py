@@ -0,0 +1,346 @@
+"""Pre-render every GET response of the v1 API to a static directory tree.
+
+The v1 routes only depend on the data directory, so their responses can be
+served from object storage or a CDN, leaving the long tail of paginated,
+projected and search requests to the API. Run from the api/ directory:
+
+    python export.py --output ../export
+
+Each response is written to a file named after its URL, with its query
+string, sorted like the response cache sorts it, appended to the name:
+
+    v1/terra/phoenix-1/contracts.json
+    v1/terra/phoenix-1/entities__accounts%3Dtrue%26codes%3Dtrue.json
+
+Bodies of at least ALDUS_COMPRESS_MIN_BYTES also get .br and .gz variants.
+manifest.json maps every exported URL to its files, content type, ETag and
+sizes, which is what the CDN routing is generated from. Files of a previous
+export to the same directory that are no longer rendered are removed.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote, urlencode
+
+# Serve one consistent version of the data for the whole export
+os.environ["ALDUS_RELOAD_INTERVAL"] = "0"
+
+from app import app  # noqa: E402
+from registry import registry  # noqa: E402
+from routes.v1 import entities  # noqa: E402
+from routes.v1.lookup import address_index  # noqa: E402
+from utils import list_networks, load_aldus_data  # noqa: E402
+
+MANIFEST = "manifest.json"
+# File suffix of each precompressed variant
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+# Routes that are not exported, with the reason
+SKIPPED_ENDPOINTS = {
+    "v1.search.get_search": "depends on a free text query",
+    "v1.changes.get_changes": "depends on the client's version",
+}
+# Flags of the network entities routes, each adds the entities' records
+ENTITY_FLAGS = ("accounts", "codes", "contracts", "modules")
+ENTITY_ENDPOINTS = (
+    "v1.entities.get_entites_details",
+    "v1.entities.get_entity_by_network",
+)
+# Routes also exported with the verified flag of their codes
+VERIFIED_ENDPOINTS = (
+    "v1.codes.get_codes",
+    "v1.codes.get_code",
+    "v1.contracts.get_contracts",
+    "v1.contracts.get_contract",
+)
+
+Args = Dict[str, object]
+
+
+def entity_flag_queries(all_combinations: bool) -> List[Dict[str, str]]:
+    """
+    Get the query strings exported for the network entities routes.
+
+    Args:
+        all_combinations (bool): Whether to export every combination of flags, rather than none, each one alone and all of them.
+
+    Returns:
+        List[Dict[str, str]]: The query parameters of each variant.
+    """
+    if all_combinations:
+        combinations = [
+            flags
+            for count in range(len(ENTITY_FLAGS) + 1)
+            for flags in itertools.combinations(ENTITY_FLAGS, count)
+        ]
+    else:
+        combinations = [()] + [(flag,) for flag in ENTITY_FLAGS] + [ENTITY_FLAGS]
+    return [{flag: "true" for flag in flags} for flags in combinations]
+
+
+def entries(data_type: str, chain: str, network: str, key: Callable[[dict], Args]):
+    """Get the path parameters of every entry of a network data file."""
+    return [key(entry) for entry in load_aldus_data(data_type, chain, network)]
+
+
+# Path parameters of every entry of the network detail routes, besides the
+# chain and network
+NETWORK_PATH_ARGS: Dict[str, Callable[[str, str], List[Args]]] = {
+    "v1.accounts.get_account": lambda chain, network: entries(
+        "accounts", chain, network, lambda account: {"address": account["address"]}
+    ),
+    "v1.codes.get_code": lambda chain, network: entries(
+        "codes", chain, network, lambda code: {"code_id": code["id"]}
+    ),
+    "v1.contracts.get_contract": lambda chain, network: entries(
+        "contracts",
+        chain,
+        network,
+        lambda contract: {"contract_address": contract["address"]},
+    ),
+    "v1.modules.get_module": lambda chain, network: entries(
+        "modules",
+        chain,
+        network,
+        lambda module: {
+            "module_address": module["address"],
+            "module_name": module["name"],
+        },
+    ),
+    "v1.pools.get_pool": lambda chain, network: entries(
+        "pools", chain, network, lambda pool: {"pool_id": pool["id"]}
+    ),
+    "v1.pools.get_pool_by_address": lambda chain, network: entries(
+        "pools", chain, network, lambda pool: {"pool_address": pool["address"]}
+    ),
+    "v1.verified.get_verified_code": lambda chain, network: entries(
+        "verified", chain, network, lambda verified: {"code_id": verified["id"]}
+    ),
+    "v1.verified.get_verified_by_checksum": lambda chain, network: entries(
+        "verified",
+        chain,
+        network,
+        lambda verified: {"checksum": verified["checksum"]},
+    ),
+    # Only the entities with data on the network
+    "v1.entities.get_entity_by_network": lambda chain, network: [
+        {"entity_slug": join["slug"]}
+        for join in entities.load_entity_joins(chain, network)
+    ],
+}
+
+# Path parameters of every entry of the global detail routes
+GLOBAL_PATH_ARGS: Dict[str, Callable[[], List[Args]]] = {
+    "v1.assets.get_assets_by_id": lambda: [
+        {"asset_id": asset_id}
+        for asset_id in sorted(
+            {
+                asset_id
+                for asset in load_aldus_data("assets")
+                for networks in asset["id"].values()
+                for asset_id in networks.values()
+            }
+        )
+    ],
+    "v1.entities.get_entity_footprint": lambda: [
+        {"entity_slug": entity["slug"]} for entity in load_aldus_data("entities")
+    ],
+    "v1.lookup.get_lookup": lambda: [
+        {"address": address} for address in address_index.addresses()
+    ],
+}
+
+
+def export_urls(all_entity_flags: bool = False) -> Iterator[str]:
+    """
+    List the URL of every response to export.
+
+    Every GET route of the v1 blueprint is exported for every chain and
+    network, and detail routes for every entry. Routes that take other
+    parameters than the ones known here are skipped with a warning.
+
+    Args:
+        all_entity_flags (bool, optional): Whether to export every combination of the entities flags. Defaults to False.
+
+    Yields:
+        str: The URL, with its sorted query string.
+    """
+    adapter = app.url_map.bind("localhost")
+    flag_queries = entity_flag_queries(all_entity_flags)
+    networks = list_networks()
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        endpoint = rule.endpoint
+        if not endpoint.startswith("v1.") or "GET" not in rule.methods:
+            continue
+        if endpoint in SKIPPED_ENDPOINTS:
+            logging.info(f"Skipping {rule.rule}: {SKIPPED_ENDPOINTS[endpoint]}")
+            continue
+        if endpoint in ENTITY_ENDPOINTS:
+            queries = flag_queries
+        elif endpoint in VERIFIED_ENDPOINTS:
+            queries = [{}, {"verified": "true"}]
+        else:
+            queries = [{}]
+        arguments = set(rule.arguments)
+        if arguments == {"chain", "network"}:
+            targets = [
+                {"chain": chain, "network": network} for chain, network in networks
+            ]
+        elif {"chain", "network"} <= arguments and endpoint in NETWORK_PATH_ARGS:
+            targets = [
+                dict(args, chain=chain, network=network)
+                for chain, network in networks
+                for args in NETWORK_PATH_ARGS[endpoint](chain, network)
+            ]
+        elif not arguments:
+            targets = [{}]
+        elif endpoint in GLOBAL_PATH_ARGS:
+            targets = GLOBAL_PATH_ARGS[endpoint]()
+        else:
+            logging.warning(f"Skipping {rule.rule}: unknown path parameters")
+            continue
+        for args in targets:
+            path = adapter.build(endpoint, args, method="GET")
+            for query in queries:
+                yield f"{path}?{urlencode(sorted(query.items()))}" if query else path
+
+
+def file_name(url: str) -> str:
+    """
+    Get the file an exported URL is written to, relative to the output.
+
+    Args:
+        url (str): The URL, with its sorted query string.
+
+    Returns:
+        str: The relative file path.
+    """
+    path, _, query = url.partition("?")
+    name = quote(unquote(path.lstrip("/")), safe="/-_.~")
+    if query:
+        name = f"{name}__{quote(query, safe='')}"
+    return f"{name}.json"
+
+
+def entry_files(entry: dict) -> List[str]:
+    """
+    List the files of a manifest entry.
+
+    Args:
+        entry (dict): The manifest entry of a URL.
+
+    Returns:
+        List[str]: The uncompressed file and its precompressed variants.
+    """
+    return [entry["file"]] + [
+        variant["file"] for variant in entry["encodings"].values()
+    ]
+
+
+def write_file(output: str, name: str, body: bytes):
+    path = os.path.join(output, name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(body)
+
+
+def export(output: str, all_entity_flags: bool = False) -> dict:
+    """
+    Render every exported response to a directory, with a manifest.
+
+    Args:
+        output (str): The output directory.
+        all_entity_flags (bool, optional): Whether to export every combination of the entities flags. Defaults to False.
+
+    Returns:
+        dict: The manifest.
+    """
+    start = time.perf_counter()
+    manifest_path = os.path.join(output, MANIFEST)
+    previous: Optional[dict] = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            previous = json.load(file)
+    elif os.path.isdir(output) and os.listdir(output):
+        raise SystemExit(f"{output} is not empty and holds no previous export")
+
+    client = app.test_client()
+    files: Dict[str, dict] = {}
+    failed: List[Tuple[str, int]] = []
+    for url in export_urls(all_entity_flags):
+        response = client.get(url, headers={"Accept-Encoding": "identity"})
+        if response.status_code != 200:
+            failed.append((url, response.status_code))
+            continue
+        body = response.get_data()
+        name = file_name(url)
+        write_file(output, name, body)
+        entry = {
+            "file": name,
+            "content_type": response.content_type,
+            "etag": response.get_etag()[0] or hashlib.sha256(body).hexdigest(),
+            "size": len(body),
+            "encodings": {},
+        }
+        # The response cache compressed the body once, so the variants are
+        # cache hits
+        for encoding, suffix in ENCODING_SUFFIXES.items():
+            encoded = client.get(url, headers={"Accept-Encoding": encoding})
+            if encoded.headers.get("Content-Encoding") != encoding:
+                continue
+            write_file(output, name + suffix, encoded.get_data())
+            entry["encodings"][encoding] = {
+                "file": name + suffix,
+                "size": len(encoded.get_data()),
+            }
+        files[url] = entry
+
+    for url, status in failed:
+        logging.warning(f"Not exported, {url} answered {status}")
+    manifest = {
+        "version": registry.version,
+        "generated_at": time.time(),
+        "files": files,
+    }
+    temp = f"{manifest_path}.tmp"
+    with open(temp, "w") as file:
+        json.dump(manifest, file, indent=2, sort_keys=True)
+    os.replace(temp, manifest_path)
+
+    if previous is not None:
+        written = {name for entry in files.values() for name in entry_files(entry)}
+        for entry in previous.get("files", {}).values():
+            for name in entry_files(entry):
+                if name not in written:
+                    try:
+                        os.remove(os.path.join(output, name))
+                    except FileNotFoundError:
+                        pass
+
+    size = sum(entry["size"] for entry in files.values())
+    logging.info(
+        f"Exported {len(files)} responses ({size / 1024 / 1024:.1f} MiB) to "
+        f"{output} in {time.perf_counter() - start:.1f}s"
+    )
+    return manifest
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", required=True, help="directory to export to")
+    parser.add_argument(
+        "--all-entity-flags",
+        action="store_true",
+        help="export every combination of the entities flags, rather than none, "
+        "each one alone and all of them",
+    )
+    args = parser.parse_args()
+    manifest = export(args.output, args.all_entity_flags)
+    sys.exit(0 if manifest["files"] else 1)
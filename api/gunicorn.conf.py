@@ -0,0 +1,66 @@
+"""Gunicorn settings for serving the API from several worker processes.
+
+The app, and with it the registry data and every index, is loaded once in
+the master process and shared copy-on-write by the forked workers, so adding
+workers barely adds resident memory. Workers do not watch the data files.
+The master does, and when a file changes it rebuilds its registry and rolls
+the workers over to fresh forks of it, so every worker serves the same data.
+"""
+
+import gc
+import glob
+import os
+import signal
+import tempfile
+
+bind = f":{os.environ.get('PORT', 8080)}"
+# Containers are often limited to fewer CPUs than the host has, and
+# os.cpu_count() reports the host's
+if hasattr(os, "sched_getaffinity"):
+    cpus = len(os.sched_getaffinity(0))
+else:
+    cpus = os.cpu_count() or 1
+workers = int(os.environ.get("WEB_CONCURRENCY", cpus))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+# Disable worker timeouts to allow Cloud Run to handle instance scaling
+timeout = 0
+preload_app = True
+
+# Workers share their request metrics and slow requests through this
+# directory, see metrics.py and profiling.py.
+# The settings are read again on reload, when the directory already exists
+if not os.environ.get("ALDUS_METRICS_DIR"):
+    os.environ["ALDUS_METRICS_DIR"] = tempfile.mkdtemp(prefix="aldus-metrics-")
+
+
+def when_ready(server):
+    from registry import registry
+
+    master = os.getpid()
+
+    def reload_workers(changed):
+        # Forked workers inherit this listener, only the master reloads
+        if os.getpid() != master:
+            return
+        server.log.info("Registry data changed, reloading workers")
+        # A HUP spawns new workers from the refreshed master, then stops the
+        # old ones once their requests are done
+        os.kill(master, signal.SIGHUP)
+
+    registry.subscribe(reload_workers)
+
+
+def pre_fork(server, worker):
+    # Move every object loaded so far out of the collector's reach, so that
+    # collections in the workers do not write to, and thus copy, shared pages
+    gc.freeze()
+
+
+def on_exit(server):
+    directory = os.environ["ALDUS_METRICS_DIR"]
+    for file in glob.glob(os.path.join(directory, "*.json")):
+        os.remove(file)
+    try:
+        os.rmdir(directory)
+    except OSError:
+        pass
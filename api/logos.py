@@ -0,0 +1,321 @@
+"""Compile the logos in assets/ into content-hashed, pre-resized files.
+
+Every image is copied under a name that includes a hash of its contents,
+and raster images are also resized to each of ``LOGO_SIZES`` pixels, as PNG
+and WebP. A file name never refers to other contents, so the files can be
+cached forever. Run from the api/ directory:
+
+    python logos.py --output ../logos
+
+and point the API at the directory with the ALDUS_LOGOS_DIR environment
+variable, and at the public URL of its /logos route, or of a copy of the
+directory, with ALDUS_LOGO_URL. Resizing needs Pillow, without it only the
+originals are compiled. Images whose contents did not change since the last
+compilation to the same directory are not processed again.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from apiflask import Schema
+from apiflask.fields import Integer, String
+from apiflask.validators import OneOf
+
+from constants import ALDUS_URL, LOGO_URL, LOGOS_DIR
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+SOURCE_DIR = os.path.join(os.path.dirname(__file__), "..", "assets")
+MANIFEST = "manifest.json"
+# Widths and heights in pixels of the resized logos, which keep their aspect
+LOGO_SIZES = (32, 64, 128, 256)
+LOGO_FORMATS = ("png", "webp")
+RASTER_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+# Other files in the assets directory, e.g. .DS_Store, are not logos
+IMAGE_EXTENSIONS = RASTER_EXTENSIONS + (".svg",)
+HASH_LENGTH = 16
+# Seconds the compiled logos may be cached for, since their contents never change
+LOGO_MAX_AGE = 365 * 24 * 60 * 60
+WEBP_QUALITY = 90
+
+
+def hashed_name(path: str, body: bytes, extension: str, label: str = "") -> str:
+    """
+    Get the content-hashed name of a compiled logo.
+
+    Args:
+        path (str): The source path, relative to the assets directory, e.g. "entities/aave.png".
+        body (bytes): The contents of the compiled file.
+        extension (str): The extension of the compiled file, e.g. ".webp".
+        label (str, optional): Distinguishes the resized files, e.g. "32". Defaults to no label.
+
+    Returns:
+        str: The relative path of the compiled file, e.g. "entities/aave.32.0123456789abcdef.webp".
+    """
+    stem = os.path.splitext(path)[0]
+    digest = hashlib.sha256(body).hexdigest()[:HASH_LENGTH]
+    return (
+        f"{stem}.{label}.{digest}{extension}"
+        if label
+        else f"{stem}.{digest}{extension}"
+    )
+
+
+def encode(image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    if format == "webp":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY)
+    else:
+        image.save(buffer, "PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def compile_logo(path: str, body: bytes) -> Tuple[dict, Dict[str, bytes]]:
+    """
+    Compile one logo into its content-hashed original and resized variants.
+
+    Args:
+        path (str): The source path, relative to the assets directory.
+        body (bytes): The source image.
+
+    Returns:
+        Tuple[dict, Dict[str, bytes]]: The manifest entry, and the contents of every compiled file by name.
+    """
+    original = hashed_name(path, body, os.path.splitext(path)[1].lower())
+    entry = {
+        "source": hashlib.sha256(body).hexdigest(),
+        "original": original,
+        # Whether Pillow was available to resize the image, if it is raster
+        "resized": Image is not None,
+        "sizes": {},
+    }
+    files = {original: body}
+    if Image is None or not path.lower().endswith(RASTER_EXTENSIONS):
+        return entry, files
+    try:
+        with Image.open(io.BytesIO(body)) as source:
+            source.load()
+            image = source.convert("RGBA")
+    except Exception as e:
+        logging.warning(f"Not resizing {path}: {e}")
+        return entry, files
+    entry["width"], entry["height"] = image.size
+    for size in LOGO_SIZES:
+        # Never upscale, larger sizes are served the original instead
+        if size >= max(image.size):
+            break
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        variants = {}
+        for format in LOGO_FORMATS:
+            data = encode(resized, format)
+            name = hashed_name(path, data, f".{format}", str(size))
+            files[name] = data
+            variants[format] = name
+        entry["sizes"][str(size)] = variants
+    return entry, files
+
+
+def compile_logos(output: str, source: str = SOURCE_DIR) -> dict:
+    """
+    Compile every image under the assets directory and write the manifest.
+
+    Args:
+        output (str): The directory to write the logos and the manifest to.
+        source (str, optional): The assets directory. Defaults to assets/ at the repository root.
+
+    Returns:
+        dict: The manifest, with the compiled files of each source image.
+    """
+    start = time.perf_counter()
+    manifest_path = os.path.join(output, MANIFEST)
+    previous = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as file:
+            previous = json.load(file).get("images", {})
+    resized = Image is not None
+    if not resized:
+        logging.warning("Pillow is not installed, only compiling the originals")
+
+    images = {}
+    compiled = 0
+    for directory, _, names in os.walk(source):
+        for name in sorted(names):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            full_path = os.path.join(directory, name)
+            path = os.path.relpath(full_path, source).replace(os.sep, "/")
+            with open(full_path, "rb") as file:
+                body = file.read()
+            cached = previous.get(path)
+            if (
+                cached is not None
+                and cached["source"] == hashlib.sha256(body).hexdigest()
+                and (cached.get("resized") or not resized)
+                and all(
+                    os.path.exists(os.path.join(output, compiled_name))
+                    for compiled_name in entry_files(cached)
+                )
+            ):
+                images[path] = cached
+                continue
+            entry, files = compile_logo(path, body)
+            for compiled_name, data in files.items():
+                target = os.path.join(output, compiled_name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, "wb") as file:
+                    file.write(data)
+            images[path] = entry
+            compiled += 1
+
+    written = {name for entry in images.values() for name in entry_files(entry)}
+    for entry in previous.values():
+        for name in entry_files(entry):
+            if name not in written:
+                try:
+                    os.remove(os.path.join(output, name))
+                except FileNotFoundError:
+                    pass
+
+    manifest = {"sizes": list(LOGO_SIZES), "images": dict(sorted(images.items()))}
+    temp = f"{manifest_path}.tmp"
+    with open(temp, "w") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(temp, manifest_path)
+    logging.info(
+        f"Compiled {compiled} of {len(images)} logos to {output} in "
+        f"{time.perf_counter() - start:.1f}s"
+    )
+    return manifest
+
+
+def entry_files(entry: dict) -> list:
+    """
+    List the compiled files of a manifest entry.
+
+    Args:
+        entry (dict): The manifest entry of a source image.
+
+    Returns:
+        list: The original and every resized file.
+    """
+    return [entry["original"]] + [
+        name for variants in entry["sizes"].values() for name in variants.values()
+    ]
+
+
+class Logos:
+    """The compiled logos, mapping source images to cache-forever URLs.
+
+    The manifest is read once, on first use, since the logos only change
+    with a new compilation and deployment.
+    """
+
+    def __init__(self, directory: str, url: str):
+        self.directory = directory
+        self.url = url
+        self._images: Optional[Dict[str, dict]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def images(self) -> Dict[str, dict]:
+        if self._images is None:
+            with self._lock:
+                if self._images is None:
+                    self._images = self._load()
+        return self._images
+
+    def get(self, path: str, size: int = None, format: str = "png") -> Optional[str]:
+        """
+        Get the URL of a compiled logo.
+
+        Args:
+            path (str): The source path, relative to the assets directory, e.g. "entities/aave.png".
+            size (int, optional): The size in pixels, the smallest variant at least as large is picked. Defaults to the original.
+            format (str, optional): The format of the resized variants, "png" or "webp". Defaults to "png".
+
+        Returns:
+            Optional[str]: The URL, or None if the logo was not compiled.
+        """
+        if not self.url:
+            return None
+        entry = self.images.get(path)
+        if entry is None:
+            return None
+        file = entry["original"]
+        if size is not None:
+            for variant_size in LOGO_SIZES:
+                variants = entry["sizes"].get(str(variant_size))
+                if variant_size >= size and variants is not None:
+                    file = variants[format]
+                    break
+        return f"{self.url}/{file}"
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.directory:
+            return {}
+        try:
+            with open(os.path.join(self.directory, MANIFEST)) as file:
+                return json.load(file)["images"]
+        except FileNotFoundError:
+            logging.warning(f"Logo manifest not found in {self.directory}")
+        except Exception as e:
+            logging.error(f"Error reading logo manifest: {e}")
+        return {}
+
+
+logos = Logos(LOGOS_DIR, LOGO_URL)
+
+
+def logo_url(path: str, size: int = None, format: str = "png") -> str:
+    """
+    Get the URL of a logo in the assets directory.
+
+    Args:
+        path (str): The path relative to the assets directory, e.g. "entities/aave.png".
+        size (int, optional): The size in pixels. Defaults to the original.
+        format (str, optional): "png" or "webp". Defaults to "png".
+
+    Returns:
+        str: The URL of the compiled logo, or of the original if it was not compiled.
+    """
+    return logos.get(path, size, format) or f"{ALDUS_URL}/assets/{path}"
+
+
+class LogoQuery(Schema):
+    logo_size = Integer(
+        validate=OneOf(LOGO_SIZES),
+        metadata={"description": "Size in pixels of the logos, the original if unset"},
+    )
+    logo_format = String(
+        load_default="png",
+        validate=OneOf(LOGO_FORMATS),
+        metadata={"description": "Format of the resized logos"},
+    )
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        default=LOGOS_DIR or "../logos",
+        help="directory to write the logos and their manifest to",
+    )
+    parser.add_argument(
+        "--source", default=SOURCE_DIR, help="directory of the source images"
+    )
+    args = parser.parse_args()
+    manifest = compile_logos(args.output, args.source)
+    sys.exit(0 if manifest["images"] else 1)
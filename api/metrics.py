@@ -0,0 +1,408 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, Response, g, has_request_context, request
+
+from constants import METRICS_DIR
+from registry import registry
+
+# Upper bounds of the latency histograms, in seconds
+DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    math.inf,
+)
+# Upper bounds of the response size histogram, in bytes
+SIZE_BUCKETS = tuple(float(4**power) * 64 for power in range(10)) + (math.inf,)
+# Seconds between writes of a worker's metrics to METRICS_DIR
+FLUSH_INTERVAL = 5.0
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def route_label() -> str:
+    """Get the route pattern of the current request, which unlike the path
+    has a bounded number of values."""
+    if not has_request_context():
+        return ""
+    if request.url_rule is None:
+        return "<unmatched>"
+    return request.url_rule.rule
+
+
+class Metrics:
+    """In-process counters and histograms exported in the Prometheus text format.
+
+    Every sample is additive: counters, histogram buckets, sums and counts.
+    Updates take one lock for a handful of dict increments, so they are
+    cheap and safe from the request threads of a gunicorn worker. When
+    ``METRICS_DIR`` is set, each worker also writes its samples there, and
+    ``render`` adds up the samples of every live worker, so a scrape reports
+    the totals of the whole server whichever worker answers it.
+
+    Data layer gauges, such as file load times and snapshot ages, are read
+    from the registry when rendering instead of being recorded.
+    """
+
+    def __init__(self, directory: str = ""):
+        self.directory = directory
+        self._samples: Dict[Tuple[str, Labels], float] = {}
+        self._families: Dict[str, Tuple[str, str]] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, Labels, float]]]] = []
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid = 0
+
+    def describe(self, name: str, kind: str, help: str):
+        """Declare a metric family.
+
+        Args:
+            name (str): The metric name.
+            kind (str): "counter", "gauge" or "histogram".
+            help (str): The description.
+        """
+        self._families[name] = (kind, help)
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0):
+        """Add to a counter.
+
+        Args:
+            name (str): The counter name.
+            labels (Labels, optional): The label names and values. Defaults to no labels.
+            value (float, optional): The increment. Defaults to 1.
+        """
+        key = (name, labels)
+        with self._lock:
+            self._samples[key] = self._samples.get(key, 0.0) + value
+
+    def observe(
+        self,
+        name: str,
+        labels: Labels,
+        value: float,
+        buckets: Tuple[float, ...] = DURATION_BUCKETS,
+    ):
+        """Record an observation in a histogram.
+
+        Args:
+            name (str): The histogram name.
+            labels (Labels): The label names and values.
+            value (float): The observed value.
+            buckets (Tuple[float, ...], optional): The bucket upper bounds, ending with infinity. Defaults to ``DURATION_BUCKETS``.
+        """
+        samples = self._samples
+        with self._lock:
+            # Every bucket is written, so that each series has all of them
+            for bound in buckets:
+                key = (f"{name}_bucket", labels + (("le", format_value(bound)),))
+                samples[key] = samples.get(key, 0.0) + (value <= bound)
+            key = (f"{name}_sum", labels)
+            samples[key] = samples.get(key, 0.0) + value
+            key = (f"{name}_count", labels)
+            samples[key] = samples.get(key, 0.0) + 1
+
+    def add_collector(
+        self, collector: Callable[[], Iterable[Tuple[str, Labels, float]]]
+    ):
+        """Register a callback returning additive samples computed when the
+        metrics are exported, such as the counters of the response cache.
+
+        Args:
+            collector (Callable[[], Iterable[Tuple[str, Labels, float]]]): Returns (name, labels, value) samples.
+        """
+        self._collectors.append(collector)
+
+    def samples(self) -> Dict[Tuple[str, Labels], float]:
+        """Get the additive samples of this process.
+
+        Returns:
+            Dict[Tuple[str, Labels], float]: The value of every (name, labels) sample.
+        """
+        with self._lock:
+            samples = dict(self._samples)
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                samples[(name, labels)] = samples.get((name, labels), 0.0) + value
+        return samples
+
+    def init_app(self, app: Flask):
+        """Record the requests of an app and export the metrics.
+
+        Register this before any other ``before_request`` hook, such as the
+        response cache's, so that their time is measured too.
+
+        Args:
+            app (Flask): The application.
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def render(self) -> str:
+        """Render the metrics of every worker in the Prometheus text format.
+
+        Returns:
+            str: The exposition.
+        """
+        samples = self.samples()
+        for pid, worker_samples in self._read_workers().items():
+            for key, value in worker_samples.items():
+                samples[key] = samples.get(key, 0.0) + value
+        gauges = list(self._data_layer_samples())
+
+        def family_of(name: str) -> str:
+            for suffix in ("_bucket", "_sum", "_count"):
+                if name.endswith(suffix) and name[: -len(suffix)] in self._families:
+                    return name[: -len(suffix)]
+            return name
+
+        def order(sample: Tuple[Tuple[str, Labels], float]) -> tuple:
+            # Group the buckets, sum and count of each series, buckets ascending
+            name, labels = sample[0]
+            series = tuple(label for label in labels if label[0] != "le")
+            bound = dict(labels).get("le", "0").replace("+Inf", "inf")
+            return (family_of(name), series, name, float(bound))
+
+        families: Dict[str, List[str]] = {}
+        for (name, labels), value in sorted(samples.items(), key=order) + gauges:
+            families.setdefault(family_of(name), []).append(
+                f"{name}{format_labels(labels)} {format_value(value)}"
+            )
+        lines = []
+        for family, family_lines in sorted(families.items()):
+            kind, help = self._families.get(family, ("untyped", ""))
+            lines.append(f"# HELP {family} {help}")
+            lines.append(f"# TYPE {family} {kind}")
+            lines.extend(family_lines)
+        return "\n".join(lines) + "\n"
+
+    def _data_layer_samples(self) -> Iterable[Tuple[Tuple[str, Labels], float]]:
+        now = time.time()
+        snapshots = registry.export()["snapshots"]
+        for path, snapshot in sorted(snapshots.items()):
+            if not snapshot.exists:
+                continue
+            labels = (("path", path),)
+            yield ("aldus_data_load_seconds", labels), snapshot.load_seconds
+            yield ("aldus_data_size_bytes", labels), snapshot.size
+            yield ("aldus_data_snapshot_age_seconds", labels), now - snapshot.loaded_at
+        yield ("aldus_data_files", ()), len(snapshots)
+        yield ("aldus_data_version", ()), registry.version
+        yield ("aldus_data_reloads_total", ()), registry.reloads
+        # Names include chains, networks and files, which would give a series
+        # per network, so builds are summed per kind, e.g. "index" or "sorted"
+        kinds: Dict[str, float] = {}
+        for name, seconds in list(registry.build_seconds.items()):
+            kind = name.split(":", 1)[0]
+            kinds[kind] = kinds.get(kind, 0.0) + seconds
+        for kind, seconds in sorted(kinds.items()):
+            yield ("aldus_index_build_seconds", (("index", kind),)), seconds
+
+    def _before_request(self):
+        g.metrics_start = time.perf_counter()
+
+    def _after_request(self, response: Response) -> Response:
+        start = g.pop("metrics_start", None)
+        if start is None:
+            return response
+        route = route_label()
+        labels = (("blueprint", request.blueprint or ""), ("route", route))
+        self.inc(
+            "aldus_http_requests_total",
+            labels
+            + (("method", request.method), ("status", str(response.status_code))),
+        )
+        self.observe(
+            "aldus_http_request_duration_seconds",
+            labels,
+            time.perf_counter() - start,
+        )
+        # The size of streamed responses is not known up front
+        if not response.is_streamed:
+            self.observe(
+                "aldus_http_response_size_bytes",
+                labels,
+                response.calculate_content_length() or 0,
+                SIZE_BUCKETS,
+            )
+        if self.directory:
+            self._start_flusher()
+        return response
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def _start_flusher(self):
+        # Threads do not survive fork, so each worker starts its own
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            self._flusher = threading.Thread(
+                target=self._flush_forever, name="metrics-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Error writing metrics: {e}")
+
+    def flush(self):
+        """Write the samples of this process to ``METRICS_DIR``."""
+        if not self.directory:
+            return
+        path = self._path(os.getpid())
+        temp = f"{path}.tmp"
+        with open(temp, "w") as file:
+            json.dump(
+                [
+                    [name, labels, value]
+                    for (name, labels), value in self.samples().items()
+                ],
+                file,
+            )
+        os.replace(temp, path)
+
+    def _read_workers(self) -> Dict[int, Dict[Tuple[str, Labels], float]]:
+        if not self.directory:
+            return {}
+        workers = {}
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return {}
+        for file in files:
+            name, extension = os.path.splitext(file)
+            if extension != ".json" or not name.isdigit():
+                continue
+            pid = int(name)
+            if pid == os.getpid():
+                continue
+            path = self._path(pid)
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                # The worker exited, its counters go with it like on a restart
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                continue
+            except PermissionError:
+                pass
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            workers[pid] = {
+                (name, tuple(tuple(label) for label in labels)): value
+                for name, labels, value in data
+            }
+        return workers
+
+
+metrics = Metrics(METRICS_DIR)
+
+metrics.describe(
+    "aldus_http_requests_total", "counter", "Requests by route, method and status."
+)
+metrics.describe(
+    "aldus_http_request_duration_seconds",
+    "histogram",
+    "Time from receiving a request to sending its response headers.",
+)
+metrics.describe(
+    "aldus_http_response_size_bytes",
+    "histogram",
+    "Size of the response bodies as sent, after compression.",
+)
+metrics.describe(
+    "aldus_json_encode_seconds",
+    "histogram",
+    "Time spent encoding response bodies that skip their output schema.",
+)
+metrics.describe(
+    "aldus_response_compress_seconds",
+    "histogram",
+    "Time spent compressing responses before caching them.",
+)
+metrics.describe(
+    "aldus_response_cache_hits_total",
+    "counter",
+    "Requests answered from the response cache.",
+)
+metrics.describe(
+    "aldus_response_cache_misses_total",
+    "counter",
+    "Cacheable requests that had to be rendered.",
+)
+metrics.describe(
+    "aldus_response_cache_entries", "gauge", "Responses in the response cache."
+)
+metrics.describe(
+    "aldus_response_cache_size_bytes",
+    "gauge",
+    "Size of the responses in the response cache, with their compressed variants.",
+)
+metrics.describe(
+    "aldus_data_load_seconds", "gauge", "Time spent reading and parsing a data file."
+)
+metrics.describe("aldus_data_size_bytes", "gauge", "Size of a data file.")
+metrics.describe(
+    "aldus_data_snapshot_age_seconds",
+    "gauge",
+    "Seconds since the served snapshot of a data file was loaded.",
+)
+metrics.describe("aldus_data_files", "gauge", "Number of data files in memory.")
+metrics.describe(
+    "aldus_data_version", "gauge", "Version of the most recently loaded data file."
+)
+metrics.describe(
+    "aldus_data_reloads_total",
+    "counter",
+    "Number of hot reloads that replaced at least one data file.",
+)
+metrics.describe(
+    "aldus_index_build_seconds",
+    "gauge",
+    "Time the last builds of the derived values or indexes of a kind took in total.",
+)
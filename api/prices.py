@@ -0,0 +1,257 @@
+import http.client
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from constants import METRICS_DIR, PRICES_MAX_AGE, PRICES_TTL, PRICES_URL
+from utils import load_aldus_data
+
+# Currency the prices are quoted in
+PRICE_CURRENCY = "usd"
+# CoinGecko IDs per upstream request
+PRICE_BATCH_SIZE = 250
+# Seconds before an upstream request is abandoned
+PRICE_TIMEOUT = 10.0
+# Bounds of the exponential backoff after failed refreshes, in seconds
+BACKOFF_MIN = 5.0
+BACKOFF_MAX = 600.0
+# File in METRICS_DIR where the workers of a server share the fetched prices
+SHARED_FILE = "prices.json"
+
+
+class PriceFetchError(Exception):
+    """An upstream price request failed.
+
+    Attributes:
+        retry_after (Optional[float]): The seconds the upstream asked to wait.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def fetch_prices(url: str, ids: List[str]) -> Dict[str, float]:
+    """
+    Fetch the prices of CoinGecko IDs from a simple price endpoint.
+
+    Args:
+        url (str): The endpoint, query parameters such as an API key are kept.
+        ids (List[str]): The CoinGecko IDs.
+
+    Returns:
+        Dict[str, float]: The price of every ID the upstream knows.
+
+    Raises:
+        PriceFetchError: If a request fails.
+    """
+    prices = {}
+    for start in range(0, len(ids), PRICE_BATCH_SIZE):
+        batch = ids[start : start + PRICE_BATCH_SIZE]
+        query = urllib.parse.urlencode(
+            {"ids": ",".join(batch), "vs_currencies": PRICE_CURRENCY}
+        )
+        separator = "&" if urllib.parse.urlparse(url).query else "?"
+        try:
+            with urllib.request.urlopen(
+                f"{url}{separator}{query}", timeout=PRICE_TIMEOUT
+            ) as response:
+                quotes = json.load(response)
+        except urllib.error.HTTPError as e:
+            retry_after = e.headers.get("Retry-After")
+            raise PriceFetchError(
+                f"HTTP {e.code}",
+                float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            raise PriceFetchError(str(e).strip() or type(e).__name__)
+        if not isinstance(quotes, dict):
+            raise PriceFetchError("Unexpected response")
+        for coingecko, quote in quotes.items():
+            price = quote.get(PRICE_CURRENCY) if isinstance(quote, dict) else None
+            if isinstance(price, (int, float)):
+                prices[coingecko] = float(price)
+    return prices
+
+
+class PriceCache:
+    """Asset prices fetched from CoinGecko in the background.
+
+    A worker thread fetches the price of every ``coingecko`` ID in
+    assets.json, in batches, and fetches them again once they are older than
+    ``PRICES_TTL``. Requests are never blocked by it: they are served the
+    last fetched prices, stale ones included while they are refreshed, until
+    they are older than ``PRICES_MAX_AGE``. Failed refreshes are retried with
+    exponential backoff, or after the upstream's Retry-After.
+
+    When ``METRICS_DIR`` is set, the prices are shared through it, so that
+    the gunicorn workers of a server fetch them once per TTL between them.
+    """
+
+    def __init__(self, url: str, ttl: float, max_age: float, directory: str = ""):
+        self.url = url
+        self.ttl = ttl
+        self.max_age = max_age
+        self.directory = directory
+        self.failures = 0
+        self._prices: Dict[str, float] = {}
+        self._fetched_at = 0.0
+        self._version = 0
+        self._joined: Dict[str, Tuple[list, int, list]] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_pid = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def version(self) -> int:
+        """Get a number that changes whenever the served prices change.
+
+        Returns:
+            int: The version of the prices, -1 while none are served.
+        """
+        if time.time() - self._fetched_at > self.max_age:
+            return -1
+        return self._version
+
+    def get(self) -> Dict[str, float]:
+        """
+        Get the served prices, starting the worker on first use.
+
+        Returns:
+            Dict[str, float]: The price of each CoinGecko ID, empty while none are fetched or they are too old.
+        """
+        if not self.enabled:
+            return {}
+        self._start_worker()
+        if self.version() < 0:
+            return {}
+        return self._prices
+
+    def join(self, assets: List[dict], name: Optional[str] = None) -> List[dict]:
+        """
+        Add the price of each asset to a copy of the assets.
+
+        With a name, the copy of an unchanged list is reused until the prices
+        change. Names must come from a fixed set, such as the known networks,
+        since the copies are never removed.
+
+        Args:
+            assets (List[dict]): The assets.
+            name (str, optional): A unique name for the list of assets, or None to not keep the copy, e.g. for a page of a list. Defaults to None.
+
+        Returns:
+            List[dict]: The assets with a price, None when unknown, or the assets themselves when prices are disabled.
+        """
+        if not self.enabled:
+            return assets
+        prices = self.get()
+        version = self.version()
+        cached = self._joined.get(name) if name is not None else None
+        if cached is not None and cached[0] is assets and cached[1] == version:
+            return cached[2]
+        joined = [
+            dict(asset, price=prices.get(asset.get("coingecko"))) for asset in assets
+        ]
+        if name is not None:
+            self._joined[name] = (assets, version, joined)
+        return joined
+
+    def refresh(self) -> float:
+        """
+        Update the prices, from the other workers if they fetched them
+        recently, from the upstream otherwise.
+
+        Returns:
+            float: The time the prices were fetched at.
+
+        Raises:
+            PriceFetchError: If the upstream could not be reached.
+        """
+        shared = self._read_shared()
+        if shared is not None and time.time() - shared[0] < self.ttl:
+            self._update(*shared)
+            return shared[0]
+        ids = sorted(
+            {
+                asset["coingecko"]
+                for asset in load_aldus_data("assets")
+                if asset.get("coingecko")
+            }
+        )
+        fetched_at = time.time()
+        prices = fetch_prices(self.url, ids)
+        self._update(fetched_at, prices)
+        self._write_shared(fetched_at, prices)
+        logging.info(f"Fetched {len(prices)} of {len(ids)} asset prices")
+        return fetched_at
+
+    def _update(self, fetched_at: float, prices: Dict[str, float]):
+        with self._lock:
+            if prices != self._prices:
+                self._version += 1
+            self._prices = prices
+            self._fetched_at = fetched_at
+
+    def _start_worker(self):
+        # Threads do not survive fork, so each worker starts its own
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+            self._worker_pid = os.getpid()
+            self._worker = threading.Thread(
+                target=self._refresh_forever, name="price-fetcher", daemon=True
+            )
+            self._worker.start()
+
+    def _refresh_forever(self):
+        backoff = 0.0
+        while True:
+            try:
+                fetched_at = self.refresh()
+            except Exception as e:
+                # The thread is never restarted, so it must survive any error
+                self.failures += 1
+                backoff = min(max(backoff * 2, BACKOFF_MIN), BACKOFF_MAX)
+                retry_after = e.retry_after if isinstance(e, PriceFetchError) else None
+                delay = max(retry_after or 0.0, backoff)
+                logging.warning(f"Error fetching prices, retrying in {delay:.0f}s: {e}")
+            else:
+                backoff = 0.0
+                delay = max(fetched_at + self.ttl - time.time(), 1.0)
+            time.sleep(delay)
+
+    def _read_shared(self) -> Optional[Tuple[float, Dict[str, float]]]:
+        if not self.directory:
+            return None
+        try:
+            with open(os.path.join(self.directory, SHARED_FILE)) as file:
+                shared = json.load(file)
+            return shared["fetched_at"], shared["prices"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _write_shared(self, fetched_at: float, prices: Dict[str, float]):
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, SHARED_FILE)
+        temp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp, "w") as file:
+                json.dump({"fetched_at": fetched_at, "prices": prices}, file)
+            os.replace(temp, path)
+        except OSError as e:
+            logging.error(f"Error sharing prices: {e}")
+
+
+price_cache = PriceCache(PRICES_URL, PRICES_TTL, PRICES_MAX_AGE, METRICS_DIR)
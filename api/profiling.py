@@ -0,0 +1,335 @@
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, deque
+from http import HTTPStatus
+from typing import Deque, Dict, List, Optional, Tuple
+
+from apiflask import abort
+from flask import Flask, Response, g, request
+
+from constants import (
+    METRICS_DIR,
+    PROFILE_TOKEN,
+    SLOW_REQUEST_HISTORY,
+    SLOW_REQUEST_SECONDS,
+)
+from metrics import route_label
+
+# Request header, or query parameter, holding the token to profile a request
+PROFILE_HEADER = "X-Aldus-Profile"
+PROFILE_PARAM = "profile"
+# Lines of the profile report, by cumulative time
+PROFILE_LINES = 60
+# Seconds between stack samples of the requests in flight
+SAMPLE_INTERVAL = 0.02
+# Stacks and functions kept in each slow request breakdown
+TOP_STACKS = 20
+
+Stack = Tuple[str, ...]
+
+
+def frame_stack(frame) -> Stack:
+    """Get the call stack of a frame, outermost call first, starting at the
+    Flask request dispatch so that server frames are left out.
+
+    Args:
+        frame (FrameType): The innermost frame.
+
+    Returns:
+        Stack: The "function (file:line)" of every call, with the line where
+            the function is defined so that samples add up per function.
+    """
+    calls = []
+    while frame is not None:
+        code = frame.f_code
+        file = os.path.basename(code.co_filename)
+        calls.append(f"{code.co_name} ({file}:{code.co_firstlineno})")
+        if code.co_name == "full_dispatch_request":
+            break
+        frame = frame.f_back
+    return tuple(reversed(calls))
+
+
+class Profiler:
+    """Operator gated request profiles and a log of slow requests.
+
+    A request carrying ``PROFILE_TOKEN`` in the ``X-Aldus-Profile`` header,
+    or the ``profile`` query parameter, runs under cProfile and is answered
+    with the profile report instead of its body. The original status is in
+    the ``X-Profile-Status`` header. Such requests skip the response cache,
+    so the report covers the actual rendering. For streamed responses, only
+    the work done before the first chunk is profiled.
+
+    When ``SLOW_REQUEST_SECONDS`` is set, a sampler thread records the stack
+    of every request in flight every ``SAMPLE_INTERVAL`` seconds, and sleeps
+    while no request is in flight. Requests that take at least
+    ``SLOW_REQUEST_SECONDS`` are logged, and their aggregated stacks, with
+    the time spent in each, are kept in a ring buffer of the last
+    ``SLOW_REQUEST_HISTORY`` slow requests. When ``METRICS_DIR`` is set, each
+    gunicorn worker also writes its buffer there, so that the log lists the
+    slow requests of every worker.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        slow_seconds: float,
+        history: int,
+        directory: str = "",
+    ):
+        self.token = token
+        self.slow_seconds = slow_seconds
+        self.history = history
+        self.directory = directory
+        self._slow: Deque[dict] = deque(maxlen=history)
+        self._captured = 0
+        self._in_flight: Dict[int, Tuple[float, Counter]] = {}
+        self._lock = threading.Lock()
+        # Set while any request is in flight, so that the sampler only wakes then
+        self._busy = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._sampler_pid = 0
+
+    def init_app(self, app: Flask):
+        """Profile and sample the requests of an app.
+
+        Register this after the metrics, so that they still measure profiled
+        requests, and before the response cache, which profiled requests skip.
+
+        Args:
+            app (Flask): The application.
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def authorize(self, token: str) -> bool:
+        """Check a token against ``PROFILE_TOKEN`` in constant time.
+
+        Args:
+            token (str): The token sent by the client.
+
+        Returns:
+            bool: Whether the token is set and matches.
+        """
+        if not self.token or not token:
+            return False
+        return hmac.compare_digest(token.encode(), self.token.encode())
+
+    def slow_requests(self) -> List[dict]:
+        """Get the slow request log, after checking the request's bearer token.
+
+        Returns:
+            List[dict]: The slow requests of every worker, most recent first.
+        """
+        if not self.token:
+            abort(HTTPStatus.NOT_FOUND)
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not self.authorize(token):
+            abort(HTTPStatus.UNAUTHORIZED, message="Invalid profiling token")
+        with self._lock:
+            entries = list(self._slow)
+        workers = self._read_workers()
+        for worker_entries in workers.values():
+            entries.extend(worker_entries)
+        entries.sort(key=lambda entry: entry["time"], reverse=True)
+        entries = entries[: self.history]
+        # The slow requests of exited workers are kept until more recent
+        # ones push them out of the log, then their file is removed
+        shown = {entry["id"] for entry in entries}
+        for pid, worker_entries in workers.items():
+            if any(entry["id"] in shown for entry in worker_entries):
+                continue
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                try:
+                    os.remove(self._path(pid))
+                except FileNotFoundError:
+                    pass
+            except PermissionError:
+                pass
+        return entries
+
+    def _before_request(self):
+        token = request.headers.get(PROFILE_HEADER) or request.args.get(
+            PROFILE_PARAM, ""
+        )
+        if self.authorize(token):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:
+                # Another profiler is already running in this process
+                logging.warning(f"Not profiling {request.path}: {e}")
+            else:
+                g.profile = profile
+                g.cache_bypass = True
+        if self.slow_seconds > 0:
+            self._start_sampler()
+            with self._lock:
+                self._in_flight[threading.get_ident()] = (
+                    time.perf_counter(),
+                    Counter(),
+                )
+                self._busy.set()
+
+    def _after_request(self, response: Response) -> Response:
+        g.profiler_status = response.status_code
+        profile = g.pop("profile", None)
+        if profile is None:
+            return response
+        profile.disable()
+        report = io.StringIO()
+        stats = pstats.Stats(profile, stream=report)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(
+            PROFILE_LINES
+        )
+        profiled = Response(report.getvalue(), mimetype="text/plain")
+        profiled.headers["X-Profile-Status"] = str(response.status_code)
+        profiled.headers["Cache-Control"] = "no-store"
+        return profiled
+
+    def _teardown_request(self, error: Optional[BaseException]):
+        # Never leave this thread profiled, even when the request failed
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.disable()
+        with self._lock:
+            in_flight = self._in_flight.pop(threading.get_ident(), None)
+            if not self._in_flight:
+                self._busy.clear()
+        if in_flight is None:
+            return
+        start, stacks = in_flight
+        seconds = time.perf_counter() - start
+        if seconds < self.slow_seconds:
+            return
+        status = g.pop("profiler_status", HTTPStatus.INTERNAL_SERVER_ERROR)
+        logging.warning(
+            f"Slow request: {request.method} {request.path} took {seconds:.3f}s"
+        )
+        self._capture(seconds, status, stacks)
+
+    def _capture(self, seconds: float, status: int, stacks: Counter):
+        functions: Counter = Counter()
+        for stack, samples in stacks.items():
+            if stack:
+                functions[stack[-1]] += samples
+        with self._lock:
+            self._captured += 1
+            self._slow.appendleft(
+                {
+                    "id": f"{os.getpid()}-{self._captured}",
+                    "time": time.time(),
+                    "method": request.method,
+                    "path": request.path,
+                    # The profiling token must not end up in the log
+                    "query": {
+                        name: value
+                        for name, value in request.args.items(multi=True)
+                        if name != PROFILE_PARAM
+                    },
+                    "route": route_label(),
+                    "status": status,
+                    "seconds": seconds,
+                    "samples": sum(stacks.values()),
+                    "sample_interval": SAMPLE_INTERVAL,
+                    # The time spent in each call stack, and in each function
+                    # as the innermost call, estimated from the samples
+                    "stacks": [
+                        {
+                            "stack": ";".join(stack),
+                            "samples": samples,
+                            "seconds": samples * SAMPLE_INTERVAL,
+                        }
+                        for stack, samples in stacks.most_common(TOP_STACKS)
+                    ],
+                    "functions": [
+                        {
+                            "function": function,
+                            "samples": samples,
+                            "seconds": samples * SAMPLE_INTERVAL,
+                        }
+                        for function, samples in functions.most_common(TOP_STACKS)
+                    ],
+                }
+            )
+            entries = list(self._slow)
+        if self.directory:
+            try:
+                self._write(entries)
+            except OSError as e:
+                logging.error(f"Error writing slow requests: {e}")
+
+    def _start_sampler(self):
+        # Threads do not survive fork, so each worker starts its own
+        if self._sampler_pid == os.getpid():
+            return
+        with self._lock:
+            if self._sampler_pid == os.getpid():
+                return
+            self._sampler_pid = os.getpid()
+            self._sampler = threading.Thread(
+                target=self._sample_forever, name="slow-request-sampler", daemon=True
+            )
+            self._sampler.start()
+
+    def _sample_forever(self):
+        while True:
+            self._busy.wait()
+            time.sleep(SAMPLE_INTERVAL)
+            with self._lock:
+                if not self._in_flight:
+                    continue
+                frames = sys._current_frames()
+                for ident, (_, stacks) in self._in_flight.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[frame_stack(frame)] += 1
+                del frames
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f"{pid}.slow.json")
+
+    def _write(self, entries: List[dict]):
+        path = self._path(os.getpid())
+        temp = f"{path}.tmp"
+        with open(temp, "w") as file:
+            json.dump(entries, file)
+        os.replace(temp, path)
+
+    def _read_workers(self) -> Dict[int, List[dict]]:
+        if not self.directory:
+            return {}
+        try:
+            files = os.listdir(self.directory)
+        except FileNotFoundError:
+            return {}
+        workers = {}
+        for file in files:
+            name = file[: -len(".slow.json")]
+            if not file.endswith(".slow.json") or not name.isdigit():
+                continue
+            pid = int(name)
+            if pid == os.getpid():
+                continue
+            try:
+                with open(self._path(pid)) as f:
+                    workers[pid] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return workers
+
+
+profiler = Profiler(
+    PROFILE_TOKEN, SLOW_REQUEST_SECONDS, SLOW_REQUEST_HISTORY, METRICS_DIR
+)
@@ -0,0 +1,347 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from constants import DATA_DIR, RELOAD_INTERVAL
+
+
+class DataPathError(ValueError):
+    """A data file path resolves outside of the data directory."""
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """An immutable, parsed view of a single registry data file.
+
+    Snapshots are shared between request threads, so ``data`` must be treated
+    as read-only by callers.
+    """
+
+    path: str
+    data: Any
+    digest: str
+    mtime_ns: int
+    size: int
+    version: int
+    loaded_at: float
+    # Seconds spent reading and parsing the file
+    load_seconds: float = 0.0
+
+    @property
+    def exists(self) -> bool:
+        return self.size >= 0
+
+
+class Registry:
+    """Process-wide store that serves registry data files from memory.
+
+    Every file under the data directory is parsed once and kept as a
+    ``Snapshot``. A background watcher polls the files' mtime and size and,
+    when either changes, re-reads the file and swaps in a new snapshot. The
+    swap is a single dict assignment, so request threads always see either
+    the old or the new snapshot and never a partially loaded one.
+
+    Values computed from one or more files (indexes, joins) are registered
+    with ``derive`` and rebuilt whenever one of their source files changes.
+    """
+
+    def __init__(self, root: str, interval: float):
+        self.root = root
+        self._real_root = os.path.realpath(root)
+        self.interval = interval
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._derived: Dict[str, Tuple[Tuple[int, ...], Any]] = {}
+        self._builders: Dict[str, Tuple[Tuple[str, ...], Callable[[], Any]]] = {}
+        self._listeners: List[Callable[[List[str]], None]] = []
+        self._lock = threading.RLock()
+        # Versions count up from the start time in milliseconds, so that they
+        # keep increasing across restarts and rarely coincide between two
+        # instances, whose versions then cannot be mistaken for each other
+        self._version = time.time_ns() // 1_000_000
+        self._watcher: Optional[threading.Thread] = None
+        # Number of refreshes that replaced at least one snapshot
+        self.reloads = 0
+        # Seconds the last build of each derived value or index took
+        self.build_seconds: Dict[str, float] = {}
+        # Hold the lock across fork, so that a worker process never inherits
+        # a registry the watcher thread was halfway through refreshing
+        os.register_at_fork(
+            before=self._lock.acquire,
+            after_in_parent=self._lock.release,
+            after_in_child=self._lock.release,
+        )
+
+    @property
+    def version(self) -> int:
+        """The version of the most recently loaded snapshot."""
+        return self._version
+
+    def get(self, path: str) -> Snapshot:
+        """Get the current snapshot of a data file.
+
+        Args:
+            path (str): The file path relative to the data directory.
+
+        Returns:
+            Snapshot: The current snapshot, loaded on first access.
+
+        Raises:
+            DataPathError: If the path resolves outside of the data directory.
+        """
+        snapshot = self._snapshots.get(path)
+        if snapshot is None:
+            self._check_path(path)
+            with self._lock:
+                snapshot = self._snapshots.get(path)
+                if snapshot is None:
+                    snapshot = self._load(path, None)
+                    # Only remember missing files of known networks, so that
+                    # requests for arbitrary chains cannot grow the store
+                    directory = os.path.dirname(os.path.join(self.root, path))
+                    if not snapshot.exists and not os.path.isdir(directory):
+                        logging.error(f"File not found: {path}")
+                        return self._missing(path)
+                    self._snapshots[path] = snapshot
+        return snapshot
+
+    def load(self, path: str) -> Any:
+        """Get the parsed contents of a data file.
+
+        Args:
+            path (str): The file path relative to the data directory.
+
+        Returns:
+            Any: The parsed data, or an empty list if the file could not be read.
+        """
+        return self.get(path).data
+
+    def derive(self, name: str, paths: Iterable[str], builder: Callable[[], Any]):
+        """Get a value computed from one or more data files.
+
+        The value is cached under ``name`` and rebuilt only when one of the
+        source files has been reloaded since it was last built.
+
+        Args:
+            name (str): A unique name for the derived value.
+            paths (Iterable[str]): The data files the value is computed from.
+            builder (Callable[[], Any]): Computes the value from the current snapshots.
+
+        Returns:
+            Any: The derived value.
+        """
+        paths = tuple(paths)
+        key = tuple(self.get(path).version for path in paths)
+        if 0 in key:
+            # Unknown networks are not cached, see ``get``
+            return builder()
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] == key:
+            if name not in self._builders:
+                # Values restored from a compiled snapshot have no builder yet
+                self._builders[name] = (paths, builder)
+            return cached[1]
+        with self._lock:
+            self._builders[name] = (paths, builder)
+            key = tuple(self.get(path).version for path in paths)
+            cached = self._derived.get(name)
+            if cached is None or cached[0] != key:
+                start = time.perf_counter()
+                cached = (key, builder())
+                self._derived[name] = cached
+                self.record_build(name, time.perf_counter() - start)
+        return cached[1]
+
+    def record_build(self, name: str, seconds: float):
+        """Record how long building a derived value or an index took.
+
+        Args:
+            name (str): The name of the value or index.
+            seconds (float): The build time.
+        """
+        self.build_seconds[name] = seconds
+
+    def subscribe(self, listener: Callable[[List[str]], None]):
+        """Register a callback invoked with the paths changed by each reload.
+
+        Callbacks run in the reloading thread with the registry lock held.
+
+        Args:
+            listener (Callable[[List[str]], None]): The callback.
+        """
+        self._listeners.append(listener)
+
+    def discover(self) -> List[str]:
+        """List every JSON data file under the data directory.
+
+        Returns:
+            List[str]: File paths relative to the data directory.
+        """
+        paths = []
+        for directory, _, files in os.walk(self.root):
+            for file in files:
+                if file.endswith(".json"):
+                    path = os.path.join(directory, file)
+                    paths.append(os.path.relpath(path, self.root))
+        return sorted(paths)
+
+    def preload(self):
+        """Load every data file so that no request has to parse one."""
+        start = time.perf_counter()
+        for path in self.discover():
+            self.get(path)
+        logging.info(
+            f"Loaded {len(self._snapshots)} data files in "
+            f"{time.perf_counter() - start:.3f}s"
+        )
+
+    def refresh(self) -> List[str]:
+        """Reload every data file that changed on disk since it was loaded.
+
+        Returns:
+            List[str]: The paths whose snapshots were replaced.
+        """
+        changed = []
+        with self._lock:
+            for path in sorted(set(self._snapshots) | set(self.discover())):
+                previous = self._snapshots.get(path)
+                snapshot = self._load(path, previous)
+                if snapshot is not previous:
+                    self._snapshots[path] = snapshot
+                    if previous is None or snapshot.version != previous.version:
+                        changed.append(path)
+            if changed:
+                self.reloads += 1
+                for name, (paths, builder) in list(self._builders.items()):
+                    self.derive(name, paths, builder)
+                logging.info(f"Reloaded data files: {', '.join(changed)}")
+                for listener in self._listeners:
+                    try:
+                        listener(changed)
+                    except Exception as e:
+                        logging.error(f"Error notifying reload listener: {e}")
+        return changed
+
+    def export(self) -> dict:
+        """Get the loaded snapshots and derived values for compilation.
+
+        Returns:
+            dict: The picklable state of the registry.
+        """
+        with self._lock:
+            return {
+                "version": self._version,
+                "snapshots": dict(self._snapshots),
+                "derived": dict(self._derived),
+            }
+
+    def restore(self, state: dict):
+        """Replace the registry contents with an exported state.
+
+        Args:
+            state (dict): A state returned by ``export``.
+        """
+        with self._lock:
+            self._snapshots = dict(state["snapshots"])
+            self._derived = dict(state["derived"])
+            self._version = max(self._version, state["version"])
+
+    def start_watcher(self):
+        """Start the background thread that hot reloads changed data files."""
+        if self.interval <= 0 or (self._watcher and self._watcher.is_alive()):
+            return
+        self._watcher = threading.Thread(
+            target=self._watch, name="registry-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.error(f"Error refreshing data files: {e}")
+
+    def _check_path(self, path: str):
+        # Absolute paths and ".." components, symlinks included, must not
+        # reach files outside of the data directory
+        full_path = os.path.realpath(os.path.join(self.root, path))
+        if os.path.commonpath([full_path, self._real_root]) != self._real_root:
+            raise DataPathError(f"Path outside of the data directory: {path}")
+
+    def _load(self, path: str, previous: Optional[Snapshot]) -> Snapshot:
+        full_path = os.path.join(self.root, path)
+        start = time.perf_counter()
+        try:
+            stat = os.stat(full_path)
+        except FileNotFoundError:
+            if previous is not None and not previous.exists:
+                return previous
+            # A file first looked up while missing changes no data, so it
+            # must not invalidate what was built from the current version
+            return self._snapshot(path, [], "", 0, -1, bump=previous is not None)
+
+        if (
+            previous is not None
+            and previous.mtime_ns == stat.st_mtime_ns
+            and previous.size == stat.st_size
+        ):
+            return previous
+
+        try:
+            with open(full_path, "rb") as file:
+                raw = file.read()
+            digest = hashlib.sha256(raw).hexdigest()
+            if previous is not None and previous.digest == digest:
+                return replace(previous, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+            data = json.loads(raw)
+        except Exception as e:
+            logging.error(f"Error reading file {full_path}: {e}")
+            if previous is not None:
+                return previous
+            return self._snapshot(path, [], "", 0, -1)
+        return self._snapshot(
+            path,
+            data,
+            digest,
+            stat.st_mtime_ns,
+            stat.st_size,
+            time.perf_counter() - start,
+        )
+
+    def _missing(self, path: str) -> Snapshot:
+        return Snapshot(
+            path=path, data=[], digest="", mtime_ns=0, size=-1, version=0, loaded_at=0
+        )
+
+    def _snapshot(
+        self,
+        path: str,
+        data: Any,
+        digest: str,
+        mtime_ns: int,
+        size: int,
+        load_seconds: float = 0.0,
+        bump: bool = True,
+    ) -> Snapshot:
+        with self._lock:
+            if bump:
+                self._version += 1
+            return Snapshot(
+                path=path,
+                data=data,
+                digest=digest,
+                mtime_ns=mtime_ns,
+                size=size,
+                version=self._version,
+                loaded_at=time.time(),
+                load_seconds=load_seconds,
+            )
+
+
+registry = Registry(DATA_DIR, RELOAD_INTERVAL)
@@ -1,6 +1,22 @@
 from apiflask import APIBlueprint
 
-from . import accounts, codes, contracts, globals, modules, entities, assets
+from utils import is_aldus_data_prevalidated, list_networks
+
+from . import (
+    accounts,
+    changes,
+    codes,
+    contracts,
+    globals,
+    modules,
+    entities,
+    assets,
+    lookup,
+    resolve,
+    pools,
+    search,
+    verified,
+)
 
 v1_bp = APIBlueprint("v1", __name__, url_prefix="/v1")
 
@@ -11,3 +27,46 @@ v1_bp.register_blueprint(globals.globals_bp)
 v1_bp.register_blueprint(modules.modules_bp)
 v1_bp.register_blueprint(entities.entities_bp)
 v1_bp.register_blueprint(assets.assets_bp)
+v1_bp.register_blueprint(lookup.lookup_bp)
+v1_bp.register_blueprint(resolve.resolve_bp)
+v1_bp.register_blueprint(pools.pools_bp)
+v1_bp.register_blueprint(search.search_bp)
+v1_bp.register_blueprint(changes.changes_bp)
+v1_bp.register_blueprint(verified.verified_bp)
+
+
+# Output schema of each data file served through ``serialize_aldus_data``
+NETWORK_SCHEMAS = {
+    "accounts": accounts.Account,
+    "codes": codes.Code,
+    "contracts": contracts.Contract,
+    "modules": modules.Module,
+    "pools": pools.Pool,
+    "verified": verified.Verified,
+}
+
+
+def build_indexes():
+    """Build the lookup indexes of every network ahead of the first request,
+    and validate the data files against their output schemas."""
+    is_aldus_data_prevalidated(entities.RawEntity, "entities")
+    for chain, network in list_networks():
+        for data_type, schema in NETWORK_SCHEMAS.items():
+            is_aldus_data_prevalidated(schema, data_type, chain, network)
+        assets.is_network_assets_prevalidated(chain, network)
+        accounts.load_accounts_index(chain, network)
+        codes.load_codes_index(chain, network)
+        contracts.load_contracts_index(chain, network)
+        contracts.load_contracts_by_code(chain, network)
+        modules.load_modules_index(chain, network)
+        modules.load_modules_by_address(chain, network)
+        pools.load_pools_index(chain, network)
+        pools.load_pools_by_address(chain, network)
+        pools.load_pools_by_denom(chain, network)
+        verified.load_verified_index(chain, network)
+        verified.load_verified_by_checksum(chain, network)
+    assets.load_assets_by_id()
+    assets.load_assets_by_slug()
+    entities.entity_footprints.build()
+    lookup.address_index.build()
+    search.search_index.build()
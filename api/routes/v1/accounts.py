@@ -2,8 +2,13 @@ import logging
 from http import HTTPStatus
 from apiflask import APIBlueprint, Schema, abort
 from apiflask.fields import String
-from utils import load_aldus_data
-from typing import List, Union
+from utils import (
+    PaginationQuery,
+    load_aldus_index,
+    paginate_aldus_data,
+    serialize_aldus_data,
+)
+from typing import Dict, List, Union
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,12 +25,8 @@ class Account(Schema):
 accounts_bp = APIBlueprint("accounts", __name__)
 
 
-def load_accounts(chain: str, network: str) -> List[dict]:
-    try:
-        return load_aldus_data("accounts", chain, network)
-    except Exception as e:
-        logging.error(f"Error loading data: {e}")
-        abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Internal server error")
+def load_accounts_index(chain: str, network: str) -> Dict[str, dict]:
+    return load_aldus_index("accounts", ("address",), chain, network)
 
 
 @accounts_bp.route("/<chain>/<network>/accounts", methods=["GET"])
@@ -33,19 +34,27 @@ def load_accounts(chain: str, network: str) -> List[dict]:
     summary="Get all accounts",
     description="Get all account entries for a given chain and network",
 )
+@accounts_bp.input(PaginationQuery, location="query")
 @accounts_bp.output(Account(many=True), status_code=HTTPStatus.OK)
-def get_accounts(chain: str, network: str) -> List[Account]:
+def get_accounts(chain: str, network: str, query_data: dict) -> List[Account]:
     """Get all accounts for a given chain and network.
 
     Args:
         chain (str): Chain name.
         network (str): Network name.
+        query_data (dict): Pagination and field projection parameters.
 
     Returns:
-        List[Account]: List of accounts.
+        List[Account]: List of accounts, ordered by address when paginated.
     """
-    accounts_data = load_accounts(chain, network)
-    return accounts_data
+    return paginate_aldus_data(
+        "accounts",
+        lambda account: account["address"],
+        query_data,
+        chain,
+        network,
+        Account,
+    )
 
 
 @accounts_bp.route("/<chain>/<network>/accounts/<address>", methods=["GET"])
@@ -65,8 +74,7 @@ def get_account(chain: str, network: str, address: str) -> Union[Account, tuple]
     Returns:
         Account or tuple: Account data if found, otherwise error message and 404 status.
     """
-    accounts_data = load_accounts(chain, network)
-    account = next((acc for acc in accounts_data if acc["address"] == address), None)
+    account = load_accounts_index(chain, network).get(address)
     if account:
-        return account
-    abort(HTTPStatus.NOT_FOUND, description="Account not found")
+        return serialize_aldus_data(account, Account, "accounts", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Account not found")
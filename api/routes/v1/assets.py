@@ -1,14 +1,35 @@
-from apiflask import APIBlueprint, Schema
+from http import HTTPStatus
+from apiflask import APIBlueprint, Schema, abort
 from apiflask.fields import (
+    Boolean,
+    Dict as DictField,
+    Float,
     String,
     Integer,
     List as ListField,
+    Nested,
 )
-from utils import load_aldus_data
-from typing import List
+from apiflask.validators import Length
+from prices import price_cache
+from registry import registry
+from utils import (
+    PaginationQuery,
+    data_path,
+    is_paginated,
+    is_prevalidated,
+    json_response,
+    load_aldus_data,
+    paginate,
+    parse_fields,
+    project_fields,
+)
+from typing import Dict, List, Set, Tuple
 
 assets_bp = APIBlueprint("assets", __name__)
 
+# Maximum number of asset IDs resolved in one bulk request
+MAX_ASSET_IDS = 1000
+
 
 class Asset(Schema):
     coingecko = String(required=True)
@@ -20,6 +41,222 @@ class Asset(Schema):
     slugs = ListField(String, required=True)
     symbol = String(required=True)
     type = String(required=True)
+    price = Float(
+        allow_none=True,
+        metadata={
+            "description": "USD price from CoinGecko, only returned by the asset "
+            "lists when prices are enabled, null when unknown"
+        },
+    )
+
+
+class RawAsset(Asset):
+    id = DictField(
+        keys=String(), values=DictField(keys=String(), values=String()), required=True
+    )
+    coinmarketcap = String(required=False)
+
+
+class NetworkAsset(Asset):
+    chain = String(required=True)
+    network = String(required=True)
+
+
+class AssetIdQuery(Schema):
+    chain = String(metadata={"description": "Only match IDs on this chain"})
+    network = String(metadata={"description": "Only match IDs on this network"})
+
+
+class AssetIdsQuery(AssetIdQuery):
+    ids = ListField(String(), required=True, validate=Length(max=MAX_ASSET_IDS))
+
+
+class ResolvedAsset(Schema):
+    id = String(required=True)
+    found = Boolean(required=True)
+    assets = ListField(Nested(NetworkAsset), required=True)
+
+
+def load_asset_networks() -> Set[Tuple[str, str]]:
+    """
+    Get every chain and network that has at least one asset.
+
+    Returns:
+      Set[Tuple[str, str]]: The (chain, network) pairs.
+    """
+
+    def build() -> Set[Tuple[str, str]]:
+        return {
+            (chain, network)
+            for item in load_aldus_data("assets")
+            for chain, networks in item["id"].items()
+            for network in networks
+        }
+
+    return registry.derive("assets:networks", [data_path("assets")], build)
+
+
+def load_network_assets(chain: str, network: str) -> List[dict]:
+    """
+    Get the assets of a chain and network, with their ID on that network.
+
+    Args:
+      chain (str): The chain name.
+      network (str): The network name.
+
+    Returns:
+      List[Asset]: The assets, computed once per reload of assets.json.
+    """
+    if (chain, network) not in load_asset_networks():
+        return []
+
+    def build() -> List[dict]:
+        return [
+            dict(item, id=item["id"][chain][network])
+            for item in load_aldus_data("assets")
+            if chain in item["id"] and network in item["id"][chain]
+        ]
+
+    return registry.derive(f"assets:{chain}/{network}", [data_path("assets")], build)
+
+
+def is_network_assets_prevalidated(chain: str, network: str) -> bool:
+    """
+    Check whether the assets of a chain and network can be served without
+    the Asset schema, see ``is_prevalidated``.
+
+    Args:
+      chain (str): The chain name.
+      network (str): The network name.
+
+    Returns:
+      bool: Whether the assets are already in their serialized form.
+    """
+    # Chains and networks come from the URL, only known ones may add a derived
+    # value, and the empty list of an unknown one needs no validation
+    if (chain, network) not in load_asset_networks():
+        return True
+    return is_prevalidated(
+        Asset,
+        f"assets:{chain}/{network}",
+        [data_path("assets")],
+        lambda: load_network_assets(chain, network),
+    )
+
+
+def load_assets_by_id() -> Dict[str, List[dict]]:
+    """
+    Get the index from every denom and cw20 address to its assets.
+
+    Returns:
+      Dict[str, List[NetworkAsset]]: The assets of each ID, with the chain and network the ID is used on.
+    """
+
+    def build() -> Dict[str, List[dict]]:
+        index = {}
+        for item in load_aldus_data("assets"):
+            for chain, networks in item["id"].items():
+                for network, asset_id in networks.items():
+                    index.setdefault(asset_id, []).append(
+                        dict(item, id=asset_id, chain=chain, network=network)
+                    )
+        return index
+
+    return registry.derive("assets:by_id", [data_path("assets")], build)
+
+
+def load_assets_by_slug() -> Dict[str, Dict[Tuple[str, str], List[dict]]]:
+    """
+    Get the index from every entity slug to its assets on each network.
+
+    Returns:
+      Dict[str, Dict[Tuple[str, str], List[Asset]]]: The assets of each slug, by (chain, network), with their ID on that network.
+    """
+
+    def build() -> Dict[str, Dict[Tuple[str, str], List[dict]]]:
+        index = {}
+        for item in load_aldus_data("assets"):
+            for chain, networks in item["id"].items():
+                for network, asset_id in networks.items():
+                    for slug in dict.fromkeys(item["slugs"]):
+                        index.setdefault(slug, {}).setdefault(
+                            (chain, network), []
+                        ).append(dict(item, id=asset_id))
+        return index
+
+    return registry.derive("assets:by_slug", [data_path("assets")], build)
+
+
+def find_assets(asset_id: str, query_data: dict) -> List[dict]:
+    """
+    Get the assets with the given ID, optionally only on a chain or network.
+
+    Args:
+      asset_id (str): The denom or cw20 address.
+      query_data (dict): The optional chain and network filters.
+
+    Returns:
+      List[NetworkAsset]: The matching assets.
+    """
+    chain = query_data.get("chain")
+    network = query_data.get("network")
+    return [
+        asset
+        for asset in load_assets_by_id().get(asset_id, [])
+        if (chain is None or asset["chain"] == chain)
+        and (network is None or asset["network"] == network)
+    ]
+
+
+@assets_bp.route("/assets/by-id/<path:asset_id>", methods=["GET"])
+@assets_bp.doc(
+    summary="Get assets by ID",
+    description="Get the asset entries whose denom or cw20 address on any chain "
+    "and network is the given ID",
+)
+@assets_bp.input(AssetIdQuery, location="query")
+@assets_bp.output(NetworkAsset(many=True), status_code=200)
+def get_assets_by_id(asset_id: str, query_data: dict) -> List[NetworkAsset]:
+    """
+    Get the assets with a given denom or cw20 address.
+
+    Args:
+      asset_id (str): The denom or cw20 address.
+      query_data (dict): The optional chain and network filters.
+
+    Returns:
+      List[NetworkAsset]: The matching assets with the chain and network of the ID.
+    """
+    assets = find_assets(asset_id, query_data)
+    if not assets:
+        abort(HTTPStatus.NOT_FOUND, message="Asset not found")
+    return assets
+
+
+@assets_bp.route("/assets/by-id", methods=["POST"])
+@assets_bp.doc(
+    summary="Get assets by IDs",
+    description=f"Get the asset entries for a batch of up to {MAX_ASSET_IDS} "
+    "denoms or cw20 addresses. IDs that are not found are marked instead of "
+    "failing the request.",
+)
+@assets_bp.input(AssetIdsQuery)
+@assets_bp.output(ResolvedAsset(many=True), status_code=200)
+def post_assets_by_id(json_data: dict) -> List[ResolvedAsset]:
+    """
+    Get the assets of a batch of denoms or cw20 addresses.
+
+    Args:
+      json_data (dict): The IDs and the optional chain and network filters.
+
+    Returns:
+      List[ResolvedAsset]: One entry per requested ID, in request order.
+    """
+    resolved = []
+    for asset_id in json_data["ids"]:
+        assets = find_assets(asset_id, json_data)
+        resolved.append({"id": asset_id, "found": bool(assets), "assets": assets})
+    return resolved
 
 
 @assets_bp.route("/<chain>/<network>/assets", methods=["GET"])
@@ -27,22 +264,37 @@ class Asset(Schema):
     summary="Get assets",
     description="Get all assets entries for a given chain and network",
 )
+@assets_bp.input(PaginationQuery, location="query")
 @assets_bp.output(Asset(many=True), status_code=200)
-def get_assets(chain: str, network: str) -> List[Asset]:
+def get_assets(chain: str, network: str, query_data: dict) -> List[Asset]:
     """
     Get assets for a specific chain and network.
 
     Args:
       chain (str): The chain name.
       network (str): The network name.
+      query_data (dict): Pagination and field projection parameters.
 
     Returns:
-      List[Asset]: A list of assets with their corresponding IDs and price set to 0.00.
+      List[Asset]: A list of assets with their corresponding IDs and cached prices, ordered by ID when paginated.
     """
-    all_assets = load_aldus_data("assets")
-    filtered_assets = [
-        dict(item, id=item["id"][chain][network])
-        for item in all_assets
-        if chain in item["id"] and network in item["id"][chain]
-    ]
-    return filtered_assets
+    # Chains and networks come from the URL, only known ones may add a sorted
+    # copy to the registry or a priced copy to the price cache
+    if (chain, network) not in load_asset_networks():
+        assets, headers = [], {}
+    else:
+        assets, headers = paginate(
+            f"assets:{chain}/{network}",
+            [data_path("assets")],
+            lambda: load_network_assets(chain, network),
+            lambda asset: asset["id"],
+            query_data,
+        )
+        # Pages are new lists on every request, only whole lists are kept
+        name = None if is_paginated(query_data) else f"assets:{chain}/{network}"
+        assets = price_cache.join(assets, name)
+    fields = parse_fields(query_data)
+    assets = [project_fields(asset, fields) for asset in assets]
+    if is_network_assets_prevalidated(chain, network):
+        return json_response(assets, headers=headers)
+    return assets, 200, headers
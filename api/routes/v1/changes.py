@@ -0,0 +1,293 @@
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from apiflask import APIBlueprint, Schema, abort
+from apiflask.fields import Integer, List as ListField, Nested, Raw, String
+from apiflask.validators import OneOf
+from constants import CHANGES_HISTORY
+from registry import Snapshot, registry
+from utils import DATA_TYPES, dump_json, json_response
+
+changes_bp = APIBlueprint("changes", __name__)
+
+# Fields identifying a record of each data type. Records of the other list
+# types, such as assets, have no unique key and are identified by their whole
+# content, so an edit shows as a removal and an addition. Chains are keyed by
+# their name
+KEY_FIELDS = {
+    "accounts": ("address",),
+    "codes": ("id",),
+    "contracts": ("address",),
+    "entities": ("slug",),
+    "modules": ("address", "name"),
+    "pools": ("id",),
+    "verified": ("id",),
+}
+
+# The records with a key before and after a change. Keys are unique in valid
+# data, but duplicates are kept together rather than silently dropped
+Change = Tuple[List[Any], List[Any]]
+
+
+class ChangesQuery(Schema):
+    since = Integer(
+        metadata={
+            "description": "The version returned by the previous sync. Without it, "
+            "only the current version is returned"
+        }
+    )
+    collection = String(
+        validate=OneOf(DATA_TYPES),
+        metadata={"description": "Only return changes of this collection"},
+    )
+    chain = String(metadata={"description": "Only return changes on this chain"})
+    network = String(metadata={"description": "Only return changes on this network"})
+
+
+class CollectionChanges(Schema):
+    collection = String(required=True)
+    chain = String(allow_none=True)
+    network = String(allow_none=True)
+    added = ListField(Raw(), required=True)
+    updated = ListField(Raw(), required=True)
+    removed = ListField(Raw(), required=True)
+
+
+class Changes(Schema):
+    version = Integer(required=True)
+    since = Integer(allow_none=True)
+    changes = ListField(Nested(CollectionChanges), required=True)
+
+
+@dataclass(frozen=True)
+class ChangeSet:
+    """The records of one data file changed by one reload."""
+
+    path: str
+    collection: str
+    chain: Optional[str]
+    network: Optional[str]
+    changes: Dict[Any, Change]
+
+
+def group_records(collection: str, data: Any) -> Dict[Any, List[Any]]:
+    """
+    Group the records of a data file by key.
+
+    Args:
+        collection (str): The data type of the file, e.g. "codes".
+        data (Any): The parsed contents of the file.
+
+    Returns:
+        Dict[Any, List[Any]]: The records with each key. Entries of a JSON object, such as the chains, are records of a single entry.
+    """
+    groups: Dict[Any, List[Any]] = {}
+    if isinstance(data, dict):
+        for name, value in data.items():
+            groups[name] = [{name: value}]
+        return groups
+    if not isinstance(data, list):
+        return groups
+    fields = KEY_FIELDS.get(collection)
+    for record in data:
+        if fields is not None and isinstance(record, dict):
+            key = tuple(record.get(field) for field in fields)
+        else:
+            key = dump_json(record, newline=False)
+        groups.setdefault(key, []).append(record)
+    return groups
+
+
+def diff_records(collection: str, old: Any, new: Any) -> Dict[Any, Change]:
+    """
+    Compare two versions of a data file record by record.
+
+    Args:
+        collection (str): The data type of the file, e.g. "codes".
+        old (Any): The previous contents of the file.
+        new (Any): The current contents of the file.
+
+    Returns:
+        Dict[Any, Change]: The records before and after, for every key whose records differ.
+    """
+    before = group_records(collection, old)
+    after = group_records(collection, new)
+    changes = {}
+    for key in before.keys() | after.keys():
+        old_records = before.get(key, [])
+        new_records = after.get(key, [])
+        if dump_json(old_records) != dump_json(new_records):
+            changes[key] = (old_records, new_records)
+    return changes
+
+
+class ChangeLog:
+    """Bounded history of the records changed by each registry reload.
+
+    The changes are computed once, when a reload replaces data files, by
+    comparing the new snapshots with the ones they replace. Clients that
+    synced at a registry version then fetch the records added, updated or
+    removed since, at a cost proportional to the changes, until the version
+    falls out of the last ``CHANGES_HISTORY`` reloads.
+    """
+
+    def __init__(self, history: int):
+        self._history: Deque[Tuple[int, List[ChangeSet]]] = deque(maxlen=history)
+        self._snapshots: Dict[str, Snapshot] = {}
+        self._oldest: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def oldest(self) -> Optional[int]:
+        """The oldest version changes can be listed from, None until tracking."""
+        return self._oldest
+
+    def track(self):
+        """Record the changes of every reload from now on, starting from the
+        data currently loaded."""
+        self._snapshots = dict(registry.export()["snapshots"])
+        self._oldest = registry.version
+        registry.subscribe(self._record)
+
+    def changes_since(
+        self,
+        since: int,
+        collection: str = None,
+        chain: str = None,
+        network: str = None,
+    ) -> List[dict]:
+        """
+        Get the records that changed after a registry version.
+
+        Args:
+            since (int): The version the client synced at, at least ``oldest``.
+            collection (str, optional): Only list changes of this data type. Defaults to None.
+            chain (str, optional): Only list changes of this chain. Defaults to None.
+            network (str, optional): Only list changes of this network. Defaults to None.
+
+        Returns:
+            List[dict]: The added, updated and removed records of each changed file, sorted by path. Removed records are listed as they were last served.
+        """
+        with self._lock:
+            reloads = [sets for version, sets in self._history if version > since]
+        merged: Dict[str, Tuple[ChangeSet, Dict[Any, Change]]] = {}
+        for change_sets in reloads:
+            for change_set in change_sets:
+                if (
+                    (collection and change_set.collection != collection)
+                    or (chain and change_set.chain != chain)
+                    or (network and change_set.network != network)
+                ):
+                    continue
+                _, records = merged.setdefault(change_set.path, (change_set, {}))
+                for key, (old_records, new_records) in change_set.changes.items():
+                    # Keep the records from before the first change of a key
+                    if key in records:
+                        old_records = records[key][0]
+                    records[key] = (old_records, new_records)
+
+        changes = []
+        for path, (change_set, records) in sorted(merged.items()):
+            added, updated, removed = [], [], []
+            for old_records, new_records in records.values():
+                if dump_json(old_records) == dump_json(new_records):
+                    continue
+                if len(old_records) == len(new_records) == 1:
+                    updated.extend(new_records)
+                else:
+                    removed.extend(old_records)
+                    added.extend(new_records)
+            if added or updated or removed:
+                changes.append(
+                    {
+                        "collection": change_set.collection,
+                        "chain": change_set.chain,
+                        "network": change_set.network,
+                        "added": added,
+                        "updated": updated,
+                        "removed": removed,
+                    }
+                )
+        return changes
+
+    def _record(self, changed: List[str]):
+        version = registry.version
+        change_sets = []
+        for path in changed:
+            snapshot = registry.get(path)
+            previous = self._snapshots.get(path)
+            self._snapshots[path] = snapshot
+            collection = os.path.splitext(os.path.basename(path))[0]
+            changes = diff_records(
+                collection, previous.data if previous else [], snapshot.data
+            )
+            if not changes:
+                continue
+            parts = path.split(os.sep)
+            change_sets.append(
+                ChangeSet(
+                    path=path,
+                    collection=collection,
+                    chain=parts[0] if len(parts) == 3 else None,
+                    network=parts[1] if len(parts) == 3 else None,
+                    changes=changes,
+                )
+            )
+        if not change_sets:
+            return
+        with self._lock:
+            if len(self._history) == self._history.maxlen:
+                # The oldest reload is about to be dropped, or this one if no
+                # history is kept
+                self._oldest = self._history[0][0] if self._history else version
+            self._history.append((version, change_sets))
+
+
+change_log = ChangeLog(CHANGES_HISTORY)
+
+
+@changes_bp.route("/changes", methods=["GET"])
+@changes_bp.doc(
+    summary="Get changes since a version",
+    description="Get the records added, updated or removed in each collection and "
+    "network since a version. Sync by fetching the current version, then the full "
+    "collections, then the changes since that version. Updated records replace the "
+    "record with the same key, removed records are listed as they were last served. "
+    "A version that is too old, or from another server, is answered with 410 Gone: "
+    "sync again from the full collections.",
+)
+@changes_bp.input(ChangesQuery, location="query")
+@changes_bp.output(Changes, status_code=200)
+def get_changes(query_data: dict) -> Changes:
+    """Get the records changed since a version.
+
+    Args:
+        query_data (dict): The version to list changes from and optional collection, chain and network filters.
+
+    Returns:
+        Changes: The current version and the changed records of each collection.
+    """
+    # Read before the history, so that a reload in between is listed again
+    # on the next sync rather than missed
+    version = registry.version
+    since = query_data.get("since")
+    if since is None:
+        return json_response({"version": version, "since": None, "changes": []})
+    oldest = change_log.oldest
+    if oldest is None or since < oldest or since > version:
+        abort(
+            HTTPStatus.GONE,
+            message=f"Changes since version {since} are not available, "
+            "download the full collections again",
+        )
+    changes = change_log.changes_since(
+        since,
+        query_data.get("collection"),
+        query_data.get("chain"),
+        query_data.get("network"),
+    )
+    return json_response({"version": version, "since": since, "changes": changes})
@@ -1,7 +1,17 @@
 from apiflask import APIBlueprint, Schema, abort
-from utils import load_aldus_data
-from apiflask.fields import String, Integer
-from typing import List
+from routes.v1.verified import VerifiedFlagQuery, load_with_verified, with_verified
+from utils import (
+    PaginationQuery,
+    data_path,
+    load_aldus_index,
+    paginate,
+    paginate_aldus_data,
+    parse_fields,
+    project_fields,
+    serialize_aldus_data,
+)
+from apiflask.fields import Boolean, String, Integer
+from typing import Dict, List
 import logging
 from http import HTTPStatus
 
@@ -12,17 +22,23 @@ class Code(Schema):
     name = String(required=True)
     description = String(required=True)
     github = String(required=True)
+    verified = Boolean(
+        metadata={
+            "description": "Whether the code is verified, only returned with the "
+            "`verified` query parameter"
+        }
+    )
+
+
+class CodesQuery(PaginationQuery, VerifiedFlagQuery):
+    pass
 
 
 codes_bp = APIBlueprint("codes", __name__)
 
 
-def load_codes(chain: str, network: str) -> List[dict]:
-    try:
-        return load_aldus_data("codes", chain, network)
-    except Exception as e:
-        logging.error(f"Error loading data: {e}")
-        abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Internal server error")
+def load_codes_index(chain: str, network: str) -> Dict[int, dict]:
+    return load_aldus_index("codes", ("id",), chain, network)
 
 
 @codes_bp.route("/<chain>/<network>/codes", methods=["GET"])
@@ -30,19 +46,40 @@ def load_codes(chain: str, network: str) -> List[dict]:
     summary="Get all codes",
     description="Get all code entries for a given chain and network.",
 )
+@codes_bp.input(CodesQuery, location="query")
 @codes_bp.output(Code(many=True), status_code=200)
-def get_codes(chain: str, network: str) -> List[Code]:
+def get_codes(chain: str, network: str, query_data: dict) -> List[Code]:
     """Get codes for a given chain and network.
 
     Args:
         chain (str): Chain name.
         network (str): Network name.
+        query_data (dict): Verified flag, pagination and field projection parameters.
 
     Returns:
-        List[Code]: List of codes.
+        List[Code]: List of codes, ordered by code ID when paginated.
     """
-    codes_data = load_codes(chain, network)
-    return codes_data
+    if not query_data["verified"]:
+        return paginate_aldus_data(
+            "codes", lambda code: code["id"], query_data, chain, network, Code
+        )
+    path = data_path("codes", chain, network)
+    codes, headers = paginate(
+        f"{path}:verified",
+        [path, data_path("verified", chain, network)],
+        lambda: load_with_verified("codes", chain, network),
+        lambda code: code["id"],
+        query_data,
+    )
+    fields = parse_fields(query_data)
+    return serialize_aldus_data(
+        [project_fields(code, fields) for code in codes],
+        Code,
+        "codes",
+        chain,
+        network,
+        headers,
+    )
 
 
 @codes_bp.route("/<chain>/<network>/codes/<int:code_id>", methods=["GET"])
@@ -50,17 +87,20 @@ def get_codes(chain: str, network: str) -> List[Code]:
     summary="Get code by ID",
     description="Get a code entry for a given chain, network, and code ID",
 )
+@codes_bp.input(VerifiedFlagQuery, location="query")
 @codes_bp.output(Code, status_code=200)
-def get_code(chain: str, network: str, code_id: int) -> Code:
+def get_code(chain: str, network: str, code_id: int, query_data: dict) -> Code:
     """Get code for a given chain, network, and code_id.
 
     Args:
         chain (str): Chain name.
         network (str): Network name.
         code_id (int): Code ID.
+        query_data (dict): Verified flag.
     """
-    codes_data = load_codes(chain, network)
-    code = next((item for item in codes_data if item["id"] == code_id), None)
+    code = load_codes_index(chain, network).get(code_id)
     if code:
-        return code
-    abort(HTTPStatus.NOT_FOUND, description="Code not found")
+        if query_data["verified"]:
+            code = with_verified("codes", code, chain, network)
+        return serialize_aldus_data(code, Code, "codes", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Code not found")
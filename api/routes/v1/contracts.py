@@ -1,7 +1,20 @@
 from apiflask import APIBlueprint, Schema, abort
-from utils import load_aldus_data
-from typing import List
-from apiflask.fields import String, Integer
+from registry import registry
+from routes.v1.verified import VerifiedFlagQuery, load_with_verified, with_verified
+from utils import (
+    PaginationQuery,
+    data_path,
+    is_paginated,
+    load_aldus_index,
+    paginate,
+    paginate_aldus_data,
+    parse_fields,
+    project_fields,
+    serialize_aldus_data,
+    slice_page,
+)
+from typing import Dict, List, Tuple
+from apiflask.fields import Boolean, String, Integer
 import logging
 from http import HTTPStatus
 
@@ -13,37 +26,124 @@ class Contract(Schema):
     address = String(required=True)
     code = Integer(required=True)
     github = String(required=True)
+    verified = Boolean(
+        metadata={
+            "description": "Whether the code of the contract is verified, only "
+            "returned with the `verified` query parameter"
+        }
+    )
+
+
+class ContractsQuery(PaginationQuery, VerifiedFlagQuery):
+    code = Integer(
+        metadata={"description": "Only return contracts instantiated from this code"}
+    )
 
 
 contracts_bp = APIBlueprint("contracts", __name__)
 
 
-def load_contracts(chain: str, network: str) -> List[dict]:
-    try:
-        return load_aldus_data("contracts", chain, network)
-    except Exception as e:
-        logging.error(f"Error loading data: {e}")
-        abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Internal server error")
+def load_contracts_index(chain: str, network: str) -> Dict[str, dict]:
+    return load_aldus_index("contracts", ("address",), chain, network)
+
+
+def load_contracts_by_code(chain: str, network: str) -> Dict[int, List[dict]]:
+    return load_aldus_index("contracts", ("code",), chain, network, unique=False)
+
+
+def load_sorted_contracts_by_code(
+    chain: str, network: str
+) -> Dict[int, Tuple[List[dict], list]]:
+    """Get the contracts of each code sorted by address, for ``slice_page``.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+
+    Returns:
+        Dict[int, Tuple[List[dict], list]]: The sorted contracts of each code, with their (address, index) keys.
+    """
+
+    def build() -> Dict[int, Tuple[List[dict], list]]:
+        index = {}
+        for code_id, contracts in load_contracts_by_code(chain, network).items():
+            keyed = sorted(
+                ((contract["address"], position), contract)
+                for position, contract in enumerate(contracts)
+            )
+            index[code_id] = (
+                [contract for _, contract in keyed],
+                [key for key, _ in keyed],
+            )
+        return index
+
+    path = data_path("contracts", chain, network)
+    return registry.derive(f"sorted:{path}:code", [path], build)
 
 
 @contracts_bp.route("/<chain>/<network>/contracts", methods=["GET"])
 @contracts_bp.doc(
     summary="Get all contracts",
-    description="Get all contract entries for a given chain and network",
+    description="Get all contract entries for a given chain and network, "
+    "optionally only those instantiated from the `code` query parameter",
 )
+@contracts_bp.input(ContractsQuery, location="query")
 @contracts_bp.output(Contract(many=True), status_code=200)
-def get_contracts(chain: str, network: str) -> List[Contract]:
+def get_contracts(chain: str, network: str, query_data: dict) -> List[Contract]:
     """Get contracts for a given chain and network.
 
     Args:
         chain (str): Chain name.
         network (str): Network name.
+        query_data (dict): Code filter, verified flag, pagination and field projection parameters.
 
     Returns:
-        List[Contract]: List of contracts.
+        List[Contract]: List of contracts, ordered by address when paginated.
     """
-    contracts_data = load_contracts(chain, network)
-    return contracts_data
+    code_id = query_data.get("code")
+    is_verified = query_data["verified"]
+    if code_id is None and not is_verified:
+        return paginate_aldus_data(
+            "contracts",
+            lambda contract: contract["address"],
+            query_data,
+            chain,
+            network,
+            Contract,
+        )
+    path = data_path("contracts", chain, network)
+    if code_id is None:
+        contracts, headers = paginate(
+            f"{path}:verified",
+            [path, data_path("verified", chain, network)],
+            lambda: load_with_verified("contracts", chain, network),
+            lambda contract: contract["address"],
+            query_data,
+        )
+    elif not is_paginated(query_data):
+        contracts = load_contracts_by_code(chain, network).get(code_id, [])
+        headers = {}
+    else:
+        # Codes come from the URL, so their pages are sliced from one index
+        # instead of each deriving a sorted copy
+        items, keys = load_sorted_contracts_by_code(chain, network).get(
+            code_id, ([], [])
+        )
+        contracts, headers = slice_page(items, keys, query_data)
+        if is_verified:
+            contracts = [
+                with_verified("contracts", contract, chain, network)
+                for contract in contracts
+            ]
+    fields = parse_fields(query_data)
+    return serialize_aldus_data(
+        [project_fields(contract, fields) for contract in contracts],
+        Contract,
+        "contracts",
+        chain,
+        network,
+        headers,
+    )
 
 
 @contracts_bp.route("/<chain>/<network>/contracts/<contract_address>", methods=["GET"])
@@ -51,22 +151,25 @@ def get_contracts(chain: str, network: str) -> List[Contract]:
     summary="Get contract by address",
     description="Get a contract entry for a given chain and network by address",
 )
+@contracts_bp.input(VerifiedFlagQuery, location="query")
 @contracts_bp.output(Contract, status_code=200)
-def get_contract(chain: str, network: str, contract_address: str) -> Contract:
+def get_contract(
+    chain: str, network: str, contract_address: str, query_data: dict
+) -> Contract:
     """Get contract for a given chain, network and contract_address.
 
     Args:
         chain (str): Chain name.
         network (str): Network name.
         contract_address (str): Contract address.
+        query_data (dict): Verified flag.
 
     Returns:
         Contract: Contract data.
     """
-    contracts_data = load_contracts(chain, network)
-    contract = next(
-        (c for c in contracts_data if c["address"] == contract_address), None
-    )
+    contract = load_contracts_index(chain, network).get(contract_address)
     if contract:
-        return contract
-    abort(HTTPStatus.NOT_FOUND, description="Contract not found")
+        if query_data["verified"]:
+            contract = with_verified("contracts", contract, chain, network)
+        return serialize_aldus_data(contract, Contract, "contracts", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Contract not found")
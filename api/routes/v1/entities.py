@@ -1,9 +1,20 @@
 from apiflask import APIBlueprint, Schema, abort
-from utils import load_aldus_data, get_query_param
-from constants import ALDUS_URL
-from typing import List
+from registry import registry
+from utils import (
+    NETWORK_DATA_TYPES,
+    NetworkIndex,
+    data_path,
+    StreamQuery,
+    get_query_param,
+    load_aldus_data,
+    load_aldus_index,
+    paginate_aldus_data,
+)
+from typing import Dict, List, Optional, Tuple
 from flask import jsonify
+from logos import LogoQuery, logo_url
 from routes.v1.accounts import Account
+from routes.v1.assets import Asset, load_assets_by_slug
 from routes.v1.codes import Code
 from routes.v1.contracts import Contract
 from apiflask.fields import String, Nested, List
@@ -52,13 +63,48 @@ class RawEntity(Schema):
     modules = List(Nested(Module), required=False)
 
 
+class NetworkFootprint(Schema):
+    chain = String(required=True)
+    network = String(required=True)
+    accounts = List(Nested(Account), required=True)
+    codes = List(Nested(Code), required=True)
+    contracts = List(Nested(Contract), required=True)
+    modules = List(Nested(Module), required=True)
+    assets = List(Nested(Asset), required=True)
+
+
+class EntityFootprint(Schema):
+    slug = String(required=True)
+    details = Nested(EntityDetail, required=True)
+    networks = List(
+        Nested(NetworkFootprint),
+        required=True,
+        metadata={
+            "description": "Every network the entity has any data on, sorted by "
+            "chain and network, with an empty list for each data type it has "
+            "none of there"
+        },
+    )
+
+
+# The related data of an entity on each (chain, network), by data type
+Footprint = Dict[Tuple[str, str], Dict[str, list]]
+
+
 def get_related_data(entity_slug, chain, network, data_type):
-    try:
-        data = load_aldus_data(data_type, chain, network)
-        return [item for item in data if item["slug"] == entity_slug]
-    except Exception as e:
-        logging.error(f"Error loading {data_type} data: {e}")
-        abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Internal server error")
+    """Get the items of a network's data type that belong to an entity.
+
+    Args:
+      entity_slug (str): Entity slug.
+      chain (str): Chain name.
+      network (str): Network name.
+      data_type (str): One of "accounts", "codes", "contracts" or "modules".
+
+    Returns:
+      List[dict]: The items whose slug matches the entity.
+    """
+    groups = load_aldus_index(data_type, ("slug",), chain, network, unique=False)
+    return groups.get(entity_slug, [])
 
 
 def get_entity_by_slug(entity_slug: str) -> dict:
@@ -73,26 +119,143 @@ def get_entity_by_slug(entity_slug: str) -> dict:
     Raises:
       ValueError: If the entity is not found.
     """
-    entities = load_aldus_data("entities")
-    entities_match = [entity for entity in entities if entity["slug"] == entity_slug]
-    if not entities_match:
+    entity_data = load_aldus_index("entities", ("slug",)).get(entity_slug)
+    if entity_data is None:
         raise ValueError(f"Entity with slug {entity_slug} not found")
-    entity_data = entities_match[0]
     return entity_data
 
 
+def get_entity_details(
+    entity: dict, logo_size: int = None, logo_format: str = "png"
+) -> dict:
+    """Build the details of an entity as returned by the network routes.
+
+    Args:
+      entity (dict): Raw entity data.
+      logo_size (int, optional): Size in pixels of the logo. Defaults to the original.
+      logo_format (str, optional): Format of the resized logo, "png" or "webp". Defaults to "png".
+
+    Returns:
+      EntityDetail: The entity details.
+    """
+    return {
+        "name": entity["name"],
+        "description": entity["description"],
+        "website": entity["website"],
+        "logo": logo_url(f"entities/{entity['logo']}", logo_size, logo_format),
+        "github": entity["github"],
+        "socials": entity["socials"],
+    }
+
+
+def load_entity_joins(chain: str, network: str) -> list:
+    """Join every entity with its accounts, codes, contracts and modules.
+
+    The join is computed once per chain and network and rebuilt only when
+    one of the underlying data files is reloaded. Entities without any data
+    on the network are left out.
+
+    Args:
+      chain (str): Chain name.
+      network (str): Network name.
+
+    Returns:
+      List[dict]: The raw entities and all their related data.
+    """
+
+    def build() -> list:
+        joins = []
+        for entity in load_aldus_data("entities"):
+            related = {
+                data_type: get_related_data(entity["slug"], chain, network, data_type)
+                for data_type in NETWORK_DATA_TYPES
+            }
+            if not any(related.values()):
+                continue
+            joins.append(
+                {
+                    "slug": entity["slug"],
+                    "entity": entity,
+                    **related,
+                }
+            )
+        return joins
+
+    paths = [data_path("entities")] + [
+        data_path(data_type, chain, network) for data_type in NETWORK_DATA_TYPES
+    ]
+    return registry.derive(f"entities:{chain}/{network}", paths, build)
+
+
+class EntityFootprints(NetworkIndex):
+    """Global index from entity slug to its data on every network.
+
+    The index covers the accounts, codes, contracts and modules of every
+    chain and network.
+    """
+
+    name = "footprints"
+
+    def get(self, slug: str) -> Footprint:
+        """Get the data of an entity on every network.
+
+        Args:
+            slug (str): Entity slug.
+
+        Returns:
+            Footprint: The related data of each network the entity has data on.
+        """
+        return self._get(slug, {})
+
+    def _load(self, chain: str, network: str) -> Dict[str, Dict[str, list]]:
+        entries: Dict[str, Dict[str, list]] = {}
+        for data_type in NETWORK_DATA_TYPES:
+            groups = load_aldus_index(
+                data_type, ("slug",), chain, network, unique=False
+            )
+            for slug, items in groups.items():
+                if slug:
+                    entries.setdefault(slug, {})[data_type] = items
+        return entries
+
+    def _merge(
+        self,
+        footprint: Optional[Footprint],
+        chain: str,
+        network: str,
+        entry: Optional[Dict[str, list]],
+    ) -> Footprint:
+        footprint = {
+            key: related
+            for key, related in (footprint or {}).items()
+            if key != (chain, network)
+        }
+        if entry:
+            footprint[(chain, network)] = entry
+        return footprint
+
+
+entity_footprints = EntityFootprints()
+registry.subscribe(entity_footprints.refresh)
+
+
 @entities_bp.route("/entities", methods=["GET"])
 @entities_bp.doc(summary="Get entities", description="Get all entity entries")
+@entities_bp.input(StreamQuery, location="query")
 @entities_bp.output(RawEntity(many=True), status_code=200)
-def get_entities():
+def get_entities(query_data: dict):
     """
     Get all entity data.
 
+    Args:
+        query_data (dict): Pagination, field projection and streaming parameters.
+
     Returns:
-        List[RawEntity]: List of RawEntity instances.
+        List[RawEntity]: List of entities, ordered by slug when paginated.
     """
-    entity_data = load_aldus_data("entities")
-    return [RawEntity(**entity) for entity in entity_data]
+    return paginate_aldus_data(
+        "entities", lambda entity: entity["slug"], query_data, schema=RawEntity
+    )
 
 
 @entities_bp.route("<chain>/<network>/entities", methods=["GET"])
@@ -100,14 +263,16 @@ def get_entities():
     summary="Get entities with details",
     description="Get all entities entry and details",
 )
+@entities_bp.input(LogoQuery, location="query")
 @entities_bp.output(Entity(many=True), status_code=200)
-def get_entites_details(chain, network):
+def get_entites_details(chain, network, query_data):
     """
     Retrieves the details of entities based on the specified chain and network.
 
     Args:
         chain (str): The chain of the entities.
         network (str): The network of the entities.
+        query_data (dict): The logo size and format.
 
     Returns:
         List[Entity]: A list of entity details.
@@ -118,56 +283,23 @@ def get_entites_details(chain, network):
     is_codes = get_query_param("codes", default=False, type=bool)
     is_contracts = get_query_param("contracts", default=False, type=bool)
     is_modules = get_query_param("modules", default=False, type=bool)
+    logo_size, logo_format = query_data.get("logo_size"), query_data["logo_format"]
 
-    entities = load_aldus_data("entities", chain, network)
+    included = {
+        "accounts": is_accounts,
+        "codes": is_codes,
+        "contracts": is_contracts,
+        "modules": is_modules,
+    }
     entity_details = []
-    for entity in entities:
-        entity_accounts = [
-            account
-            for account in load_aldus_data("accounts", chain, network)
-            if account["slug"] == entity["slug"]
-        ]
-        entity_codes = [
-            code
-            for code in load_aldus_data("codes", chain, network)
-            if code["slug"] == entity["slug"]
-        ]
-        entity_contracts = [
-            contract
-            for contract in load_aldus_data("contracts", chain, network)
-            if contract["slug"] == entity["slug"]
-        ]
-        entity_modules = [
-            module
-            for module in load_aldus_data("modules", chain, network)
-            if module["slug"] == entity["slug"]
-        ]
-
-        if (
-            not entity_accounts
-            and not entity_codes
-            and not entity_contracts
-            and not entity_modules
-        ):
-            continue
-        entity_entry = {}
-        entity_entry["slug"] = entity["slug"]
-        entity_entry["details"] = {
-            "name": entity["name"],
-            "description": entity["description"],
-            "website": entity["website"],
-            "logo": f'{ALDUS_URL}/assets/entities/{entity["logo"]}',
-            "github": entity["github"],
-            "socials": entity["socials"],
+    for join in load_entity_joins(chain, network):
+        entity_entry = {
+            "slug": join["slug"],
+            "details": get_entity_details(join["entity"], logo_size, logo_format),
         }
-        if is_accounts:
-            entity_entry["accounts"] = entity_accounts
-        if is_codes:
-            entity_entry["codes"] = entity_codes
-        if is_contracts:
-            entity_entry["contracts"] = entity_contracts
-        if is_modules:
-            entity_entry["modules"] = entity_modules
+        for data_type in NETWORK_DATA_TYPES:
+            if included[data_type]:
+                entity_entry[data_type] = join[data_type]
         entity_details.append(entity_entry)
     return entity_details
 
@@ -177,8 +309,11 @@ def get_entites_details(chain, network):
     summary="Get entity details by slug",
     description="Get entity entry and details by slug",
 )
+@entities_bp.input(LogoQuery, location="query")
 @entities_bp.output(Entity, status_code=200)
-def get_entity_by_network(chain: str, network: str, entity_slug: str) -> Entity:
+def get_entity_by_network(
+    chain: str, network: str, entity_slug: str, query_data: dict
+) -> Entity:
     """
     Get entity data for a given chain, network, and entity.
 
@@ -186,6 +321,7 @@ def get_entity_by_network(chain: str, network: str, entity_slug: str) -> Entity:
         chain (str): Chain name.
         network (str): Network name.
         entity_slug (str): Entity slug.
+        query_data (dict): The logo size and format.
 
     Returns:
         Entity: An instance of the Entity class with the entity data.
@@ -197,41 +333,75 @@ def get_entity_by_network(chain: str, network: str, entity_slug: str) -> Entity:
     is_codes = get_query_param("codes", default=False, type=bool)
     is_contracts = get_query_param("contracts", default=False, type=bool)
     is_modules = get_query_param("modules", default=False, type=bool)
+    logo_size, logo_format = query_data.get("logo_size"), query_data["logo_format"]
 
-    entity_entry = get_entity_by_slug(entity_slug)
+    try:
+        entity_entry = get_entity_by_slug(entity_slug)
+    except ValueError:
+        abort(HTTPStatus.NOT_FOUND, message="Entity not found")
     entity = {
         "slug": entity_entry["slug"],
-        "details": {
-            "name": entity_entry["name"],
-            "description": entity_entry["description"],
-            "website": entity_entry["website"],
-            "logo": f"{ALDUS_URL}/assets/entities/{entity_entry['logo']}",
-            "github": entity_entry["github"],
-            "socials": entity_entry["socials"],
-        },
+        "details": get_entity_details(entity_entry, logo_size, logo_format),
     }
     if is_accounts:
-        entity["accounts"] = [
-            account
-            for account in load_aldus_data("accounts", chain, network)
-            if account["slug"] == entity["slug"]
-        ]
+        entity["accounts"] = get_related_data(entity_slug, chain, network, "accounts")
     if is_codes:
-        entity["codes"] = [
-            code
-            for code in load_aldus_data("codes", chain, network)
-            if code["slug"] == entity["slug"]
-        ]
+        entity["codes"] = get_related_data(entity_slug, chain, network, "codes")
     if is_contracts:
-        entity["contracts"] = [
-            contract
-            for contract in load_aldus_data("contracts", chain, network)
-            if contract["slug"] == entity["slug"]
-        ]
+        entity["contracts"] = get_related_data(entity_slug, chain, network, "contracts")
     if is_modules:
-        entity["modules"] = [
-            module
-            for module in load_aldus_data("modules", chain, network)
-            if module["slug"] == entity["slug"]
-        ]
+        entity["modules"] = get_related_data(entity_slug, chain, network, "modules")
     return entity
+
+
+@entities_bp.route("/entities/<entity_slug>/footprint", methods=["GET"])
+@entities_bp.doc(
+    summary="Get entity footprint",
+    description="Get an entity's details with its accounts, codes, contracts, "
+    "modules and assets on every chain and network. Each network the entity has "
+    "any data on is listed with every data type, those it has none of there "
+    "being empty lists, e.g. a network with only assets of the entity has "
+    "empty accounts, codes, contracts and modules",
+)
+@entities_bp.input(LogoQuery, location="query")
+@entities_bp.output(EntityFootprint, status_code=200)
+def get_entity_footprint(entity_slug: str, query_data: dict) -> EntityFootprint:
+    """
+    Get the data of an entity on every chain and network.
+
+    Args:
+        entity_slug (str): Entity slug.
+        query_data (dict): The logo size and format.
+
+    Returns:
+        EntityFootprint: The entity details and its data, grouped by chain and network.
+
+    Raises:
+        NotFoundError: If the entity with the given slug is not found.
+    """
+    logo_size, logo_format = query_data.get("logo_size"), query_data["logo_format"]
+    try:
+        entity_entry = get_entity_by_slug(entity_slug)
+    except ValueError:
+        abort(HTTPStatus.NOT_FOUND, message="Entity not found")
+    footprint = entity_footprints.get(entity_slug)
+    assets = load_assets_by_slug().get(entity_slug, {})
+    networks = []
+    for chain, network in sorted(footprint.keys() | assets.keys()):
+        related = footprint.get((chain, network), {})
+        networks.append(
+            {
+                "chain": chain,
+                "network": network,
+                **{
+                    data_type: related.get(data_type, [])
+                    for data_type in NETWORK_DATA_TYPES
+                },
+                "assets": assets.get((chain, network), []),
+            }
+        )
+    return {
+        "slug": entity_entry["slug"],
+        "details": get_entity_details(entity_entry, logo_size, logo_format),
+        "networks": networks,
+    }
@@ -1,18 +1,57 @@
 from apiflask import APIBlueprint
-from utils import load_aldus_data
+from prices import price_cache
+from utils import (
+    StreamQuery,
+    data_path,
+    is_paginated,
+    json_response,
+    load_aldus_data,
+    paginate,
+    parse_fields,
+    project_fields,
+    stream_collection,
+)
 
 globals_bp = APIBlueprint("globals", __name__)
 
 
 @globals_bp.route("/globals/chains", methods=["GET"])
 @globals_bp.doc(summary="Get all chains", description="Get all chain entries")
-def get_globals_chains() -> list:
-    aldus_chain_data = load_aldus_data("chains")
-    return aldus_chain_data
+@globals_bp.input(StreamQuery, location="query")
+def get_globals_chains(query_data: dict) -> dict:
+    chains, headers = paginate(
+        "chains",
+        [data_path("chains")],
+        lambda: list(load_aldus_data("chains").items()),
+        lambda chain: chain[0],
+        query_data,
+    )
+    streamed = stream_collection(chains, query_data, headers, keyed=True)
+    if streamed is not None:
+        return streamed
+    fields = parse_fields(query_data)
+    return json_response(
+        {name: project_fields(chain, fields) for name, chain in chains},
+        headers=headers,
+    )
 
 
 @globals_bp.route("/globals/assets", methods=["GET"])
 @globals_bp.doc(summary="Get assets", description="Get all asset entries")
-def get_globals_assets() -> list:
-    aldus_asset_data = load_aldus_data("assets")
-    return aldus_asset_data
+@globals_bp.input(StreamQuery, location="query")
+def get_globals_assets(query_data: dict) -> list:
+    assets, headers = paginate(
+        "assets",
+        [data_path("assets")],
+        lambda: load_aldus_data("assets"),
+        lambda asset: (asset["symbol"], asset["name"], asset["coingecko"]),
+        query_data,
+    )
+    assets = price_cache.join(assets, None if is_paginated(query_data) else "assets")
+    streamed = stream_collection(assets, query_data, headers)
+    if streamed is not None:
+        return streamed
+    fields = parse_fields(query_data)
+    return json_response(
+        [project_fields(asset, fields) for asset in assets], headers=headers
+    )
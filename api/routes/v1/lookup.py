@@ -0,0 +1,104 @@
+from http import HTTPStatus
+from typing import Dict, List, Optional, Tuple
+
+from apiflask import APIBlueprint, Schema, abort
+from apiflask.fields import Dict as DictField, String
+from registry import registry
+from utils import NetworkIndex, load_aldus_data
+
+lookup_bp = APIBlueprint("lookup", __name__)
+
+# Data types that are indexed by address, with the kind reported for them
+ADDRESS_DATA_TYPES = {
+    "accounts": "account",
+    "contracts": "contract",
+    "modules": "module",
+    "pools": "pool",
+}
+
+
+class LookupResult(Schema):
+    chain = String(required=True)
+    network = String(required=True)
+    kind = String(required=True)
+    data = DictField(required=True)
+
+
+class AddressIndex(NetworkIndex):
+    """Global index from address to every record with that address.
+
+    The index covers the accounts, contracts, modules and pools of every
+    chain and network.
+    """
+
+    name = "lookup"
+
+    def get(self, address: str) -> Tuple[dict, ...]:
+        """Get every record with the given address.
+
+        Args:
+            address (str): The address, compared case-insensitively.
+
+        Returns:
+            Tuple[dict, ...]: The matching records with their chain, network and kind.
+        """
+        return self._get(address.lower(), ())
+
+    def addresses(self) -> List[str]:
+        """List every indexed address.
+
+        Returns:
+            List[str]: The lowercase addresses, sorted.
+        """
+        return self.keys()
+
+    def _load(self, chain: str, network: str) -> Dict[str, List[dict]]:
+        entries: Dict[str, List[dict]] = {}
+        for data_type, kind in ADDRESS_DATA_TYPES.items():
+            for item in load_aldus_data(data_type, chain, network):
+                address = item.get("address")
+                if not address:
+                    continue
+                entries.setdefault(address.lower(), []).append(
+                    {"chain": chain, "network": network, "kind": kind, "data": item}
+                )
+        return entries
+
+    def _merge(
+        self,
+        records: Optional[Tuple[dict, ...]],
+        chain: str,
+        network: str,
+        entry: Optional[List[dict]],
+    ) -> Tuple[dict, ...]:
+        return tuple(
+            record
+            for record in records or ()
+            if (record["chain"], record["network"]) != (chain, network)
+        ) + tuple(entry or ())
+
+
+address_index = AddressIndex()
+registry.subscribe(address_index.refresh)
+
+
+@lookup_bp.route("/lookup/<address>", methods=["GET"])
+@lookup_bp.doc(
+    summary="Look up an address",
+    description="Get every account, contract, module and pool entry with the "
+    "given address across all chains and networks",
+)
+@lookup_bp.output(LookupResult(many=True), status_code=200)
+def get_lookup(address: str) -> List[LookupResult]:
+    """Get every record with an address on any chain and network.
+
+    Args:
+        address (str): The address.
+
+    Returns:
+        List[LookupResult]: The matching records with their chain, network and kind.
+    """
+    records = address_index.get(address)
+    if not records:
+        abort(HTTPStatus.NOT_FOUND, message="Address not found")
+    return list(records)
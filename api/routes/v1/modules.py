@@ -1,6 +1,11 @@
 from apiflask import APIBlueprint, Schema, abort
-from typing import List
-from utils import load_aldus_data
+from typing import Dict, List, Tuple
+from utils import (
+    PaginationQuery,
+    load_aldus_index,
+    paginate_aldus_data,
+    serialize_aldus_data,
+)
 from apiflask.fields import String
 import logging
 from http import HTTPStatus
@@ -17,12 +22,12 @@ class Module(Schema):
 modules_bp = APIBlueprint("modules", __name__)
 
 
-def load_modules(chain: str, network: str) -> List[dict]:
-    try:
-        return load_aldus_data("modules", chain, network)
-    except Exception as e:
-        logging.error(f"Error loading data: {e}")
-        abort(HTTPStatus.INTERNAL_SERVER_ERROR, description="Internal server error")
+def load_modules_index(chain: str, network: str) -> Dict[Tuple[str, str], dict]:
+    return load_aldus_index("modules", ("address", "name"), chain, network)
+
+
+def load_modules_by_address(chain: str, network: str) -> Dict[str, List[dict]]:
+    return load_aldus_index("modules", ("address",), chain, network, unique=False)
 
 
 @modules_bp.route("/<chain>/<network>/modules", methods=["GET"])
@@ -30,19 +35,27 @@ def load_modules(chain: str, network: str) -> List[dict]:
     summary="Get all modules",
     description="Get all module entries for a given chain and network",
 )
+@modules_bp.input(PaginationQuery, location="query")
 @modules_bp.output(Module(many=True), status_code=200)
-def get_modules(chain: str, network: str) -> List[Module]:
+def get_modules(chain: str, network: str, query_data: dict) -> List[Module]:
     """Get modules for a given chain and network.
 
     Args:
         chain (str): Chain name.
         network (str): Network name.
+        query_data (dict): Pagination and field projection parameters.
 
     Returns:
-        List[Module]: List of modules.
+        List[Module]: List of modules, ordered by address and name when paginated.
     """
-    modules_data = load_modules(chain, network)
-    return modules_data
+    return paginate_aldus_data(
+        "modules",
+        lambda module: (module["address"], module["name"]),
+        query_data,
+        chain,
+        network,
+        Module,
+    )
 
 
 @modules_bp.route(
@@ -67,15 +80,7 @@ def get_module(
     Returns:
         Module: Module data.
     """
-    modules_data = load_modules(chain, network)
-    module = next(
-        (
-            m
-            for m in modules_data
-            if m["address"] == module_address and m["name"] == module_name
-        ),
-        None,
-    )
+    module = load_modules_index(chain, network).get((module_address, module_name))
     if module:
-        return module
-    abort(HTTPStatus.NOT_FOUND, description="Module not found")
+        return serialize_aldus_data(module, Module, "modules", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Module not found")
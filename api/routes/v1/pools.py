@@ -0,0 +1,185 @@
+from http import HTTPStatus
+from typing import Dict, List, Tuple
+
+from apiflask import APIBlueprint, Schema, abort
+from apiflask.fields import Integer, List as ListField, String
+from registry import registry
+from utils import (
+    StreamQuery,
+    data_path,
+    is_aldus_data_prevalidated,
+    load_aldus_data,
+    load_aldus_index,
+    paginate_aldus_data,
+    parse_fields,
+    project_fields,
+    serialize_aldus_data,
+    slice_page,
+    stream_collection,
+)
+
+
+class Pool(Schema):
+    id = Integer(required=True)
+    name = String(required=True)
+    address = String(required=True)
+    assets = ListField(String, required=True)
+
+
+class PoolsQuery(StreamQuery):
+    denoms = ListField(
+        String(),
+        data_key="denom",
+        metadata={
+            "description": "Only return pools containing this denom. Repeat the "
+            "parameter to get the pools of a pair, e.g. `denom=uosmo&denom=uion`"
+        },
+    )
+
+
+pools_bp = APIBlueprint("pools", __name__)
+
+
+def load_pools_index(chain: str, network: str) -> Dict[int, dict]:
+    return load_aldus_index("pools", ("id",), chain, network)
+
+
+def load_pools_by_address(chain: str, network: str) -> Dict[str, dict]:
+    return load_aldus_index("pools", ("address",), chain, network)
+
+
+def load_pools_by_denom(chain: str, network: str) -> Dict[str, Tuple[int, ...]]:
+    """Get the inverted index from denom to the IDs of the pools containing it.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+
+    Returns:
+        Dict[str, Tuple[int, ...]]: The sorted pool IDs of each denom.
+    """
+
+    def build() -> Dict[str, Tuple[int, ...]]:
+        index = {}
+        for pool in load_aldus_data("pools", chain, network):
+            for denom in set(pool["assets"]):
+                index.setdefault(denom, set()).add(pool["id"])
+        return {denom: tuple(sorted(ids)) for denom, ids in index.items()}
+
+    path = data_path("pools", chain, network)
+    return registry.derive(f"pools_by_denom:{path}", [path], build)
+
+
+def find_pools(chain: str, network: str, denoms: List[str]) -> List[dict]:
+    """Get the pools that contain every given denom.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        denoms (List[str]): The denoms.
+
+    Returns:
+        List[Pool]: The matching pools, ordered by ID.
+    """
+    by_denom = load_pools_by_denom(chain, network)
+    postings = sorted((by_denom.get(denom, ()) for denom in denoms), key=len)
+    ids = set(postings[0])
+    for posting in postings[1:]:
+        ids.intersection_update(posting)
+    pools = load_pools_index(chain, network)
+    return [pools[pool_id] for pool_id in sorted(ids)]
+
+
+@pools_bp.route("/<chain>/<network>/pools", methods=["GET"])
+@pools_bp.doc(
+    summary="Get all pools",
+    description="Get all pool entries for a given chain and network, optionally "
+    "only those containing the given denoms",
+)
+@pools_bp.input(PoolsQuery, location="query")
+@pools_bp.output(Pool(many=True), status_code=200)
+def get_pools(chain: str, network: str, query_data: dict) -> List[Pool]:
+    """Get pools for a given chain and network.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        query_data (dict): Denom filter, pagination, field projection and streaming parameters.
+
+    Returns:
+        List[Pool]: List of pools, ordered by ID when filtered or paginated.
+    """
+    denoms = query_data.get("denoms")
+    if not denoms:
+        return paginate_aldus_data(
+            "pools", lambda pool: pool["id"], query_data, chain, network, Pool
+        )
+    pools = find_pools(chain, network, denoms)
+    pools, headers = slice_page(
+        pools, [(pool["id"], index) for index, pool in enumerate(pools)], query_data
+    )
+    streamed = stream_collection(
+        pools,
+        query_data,
+        headers,
+        schema=None
+        if is_aldus_data_prevalidated(Pool, "pools", chain, network)
+        else Pool,
+    )
+    if streamed is not None:
+        return streamed
+    fields = parse_fields(query_data)
+    return serialize_aldus_data(
+        [project_fields(pool, fields) for pool in pools],
+        Pool,
+        "pools",
+        chain,
+        network,
+        headers,
+    )
+
+
+@pools_bp.route("/<chain>/<network>/pools/<int:pool_id>", methods=["GET"])
+@pools_bp.doc(
+    summary="Get pool by ID",
+    description="Get a pool entry for a given chain, network, and pool ID",
+)
+@pools_bp.output(Pool, status_code=200)
+def get_pool(chain: str, network: str, pool_id: int) -> Pool:
+    """Get pool for a given chain, network, and pool_id.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        pool_id (int): Pool ID.
+
+    Returns:
+        Pool: Pool data.
+    """
+    pool = load_pools_index(chain, network).get(pool_id)
+    if pool:
+        return serialize_aldus_data(pool, Pool, "pools", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Pool not found")
+
+
+@pools_bp.route("/<chain>/<network>/pools/by-address/<pool_address>", methods=["GET"])
+@pools_bp.doc(
+    summary="Get pool by address",
+    description="Get a pool entry for a given chain and network by address",
+)
+@pools_bp.output(Pool, status_code=200)
+def get_pool_by_address(chain: str, network: str, pool_address: str) -> Pool:
+    """Get pool for a given chain, network and pool_address.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        pool_address (str): Pool address.
+
+    Returns:
+        Pool: Pool data.
+    """
+    pool = load_pools_by_address(chain, network).get(pool_address)
+    if pool:
+        return serialize_aldus_data(pool, Pool, "pools", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Pool not found")
@@ -0,0 +1,168 @@
+from http import HTTPStatus
+from typing import List
+
+from apiflask import APIBlueprint, Schema, abort
+from apiflask.fields import Boolean, Integer, List as ListField, Nested, String
+from apiflask.validators import Length
+from routes.v1.accounts import Account, load_accounts_index
+from routes.v1.codes import Code, load_codes_index
+from routes.v1.contracts import Contract, load_contracts_index
+from routes.v1.modules import Module, load_modules_by_address
+from utils import list_networks
+
+resolve_bp = APIBlueprint("resolve", __name__)
+
+# Maximum number of addresses, and of code IDs, resolved in one request
+MAX_RESOLVE_ITEMS = 1000
+# Maximum number of networks resolved in one multi-network request
+MAX_RESOLVE_NETWORKS = 32
+
+
+class ResolveQuery(Schema):
+    addresses = ListField(
+        String(), load_default=list, validate=Length(max=MAX_RESOLVE_ITEMS)
+    )
+    code_ids = ListField(
+        Integer(), load_default=list, validate=Length(max=MAX_RESOLVE_ITEMS)
+    )
+
+
+class Network(Schema):
+    chain = String(required=True)
+    network = String(required=True)
+
+
+class MultiResolveQuery(ResolveQuery):
+    networks = ListField(
+        Nested(Network),
+        required=True,
+        validate=Length(min=1, max=MAX_RESOLVE_NETWORKS),
+    )
+
+
+class ResolvedAddress(Schema):
+    address = String(required=True)
+    found = Boolean(required=True)
+    account = Nested(Account, allow_none=True)
+    contract = Nested(Contract, allow_none=True)
+    modules = ListField(Nested(Module), required=True)
+
+
+class ResolvedCode(Schema):
+    id = Integer(required=True)
+    found = Boolean(required=True)
+    code = Nested(Code, allow_none=True)
+
+
+class ResolveResult(Schema):
+    chain = String(required=True)
+    network = String(required=True)
+    addresses = ListField(Nested(ResolvedAddress), required=True)
+    codes = ListField(Nested(ResolvedCode), required=True)
+
+
+def resolve_network(
+    chain: str, network: str, addresses: List[str], code_ids: List[int]
+) -> dict:
+    """Resolve addresses and code IDs against the indexes of one network.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        addresses (List[str]): Addresses to resolve.
+        code_ids (List[int]): Code IDs to resolve.
+
+    Returns:
+        ResolveResult: One entry per requested item, in request order, with
+        ``found`` set to false for items that are not in the registry.
+    """
+    accounts = load_accounts_index(chain, network)
+    contracts = load_contracts_index(chain, network)
+    modules = load_modules_by_address(chain, network)
+    codes = load_codes_index(chain, network)
+
+    resolved_addresses = []
+    for address in addresses:
+        entry = {
+            "address": address,
+            "account": accounts.get(address),
+            "contract": contracts.get(address),
+            "modules": modules.get(address, []),
+        }
+        entry["found"] = bool(entry["account"] or entry["contract"] or entry["modules"])
+        resolved_addresses.append(entry)
+
+    resolved_codes = []
+    for code_id in code_ids:
+        code = codes.get(code_id)
+        resolved_codes.append({"id": code_id, "found": code is not None, "code": code})
+
+    return {
+        "chain": chain,
+        "network": network,
+        "addresses": resolved_addresses,
+        "codes": resolved_codes,
+    }
+
+
+@resolve_bp.route("/<chain>/<network>/resolve", methods=["POST"])
+@resolve_bp.doc(
+    summary="Resolve addresses and codes",
+    description="Get the account, contract, module and code entries for a batch "
+    f"of up to {MAX_RESOLVE_ITEMS} addresses and code IDs on a given chain and "
+    "network. Items that are not found are marked instead of failing the request.",
+)
+@resolve_bp.input(ResolveQuery)
+@resolve_bp.output(ResolveResult, status_code=200)
+def post_resolve(chain: str, network: str, json_data: dict) -> ResolveResult:
+    """Resolve a batch of addresses and code IDs on a chain and network.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        json_data (dict): The addresses and code IDs to resolve.
+
+    Returns:
+        ResolveResult: The resolved entries.
+    """
+    return resolve_network(
+        chain, network, json_data["addresses"], json_data["code_ids"]
+    )
+
+
+@resolve_bp.route("/resolve", methods=["POST"])
+@resolve_bp.doc(
+    summary="Resolve addresses and codes on several networks",
+    description="Get the account, contract, module and code entries for a batch "
+    f"of up to {MAX_RESOLVE_ITEMS} addresses and code IDs on each of up to "
+    f"{MAX_RESOLVE_NETWORKS} chains and networks. Unknown networks are answered "
+    "with 404.",
+)
+@resolve_bp.input(MultiResolveQuery)
+@resolve_bp.output(ResolveResult(many=True), status_code=200)
+def post_resolve_networks(json_data: dict) -> List[ResolveResult]:
+    """Resolve a batch of addresses and code IDs on several networks.
+
+    Args:
+        json_data (dict): The networks, addresses and code IDs to resolve.
+
+    Returns:
+        List[ResolveResult]: The resolved entries of each network, in request order.
+    """
+    # The networks come from the body, so only the ones with data are read
+    networks = set(list_networks())
+    for item in json_data["networks"]:
+        if (item["chain"], item["network"]) not in networks:
+            abort(
+                HTTPStatus.NOT_FOUND,
+                message=f"Network {item['chain']}/{item['network']} not found",
+            )
+    return [
+        resolve_network(
+            item["chain"],
+            item["network"],
+            json_data["addresses"],
+            json_data["code_ids"],
+        )
+        for item in json_data["networks"]
+    ]
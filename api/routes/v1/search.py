@@ -0,0 +1,288 @@
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from apiflask import APIBlueprint, Schema
+from apiflask.fields import Dict as DictField, Float, Integer, String
+from apiflask.validators import Length, Range
+from registry import registry
+from utils import list_networks, load_aldus_data
+
+search_bp = APIBlueprint("search", __name__)
+
+# Weight of a token match in each searchable field
+FIELD_WEIGHTS = {
+    "name": 4.0,
+    "symbol": 4.0,
+    "slug": 3.0,
+    "address": 3.0,
+    "description": 1.0,
+}
+# Matches on a token prefix, rather than the whole token, count half as much
+PREFIX_WEIGHT = 0.5
+# Maximum number of indexed tokens a prefix is expanded to
+MAX_PREFIX_TOKENS = 256
+# Network data types included in the search, with the kind reported for them
+SEARCH_DATA_TYPES = {"accounts": "account", "codes": "code", "contracts": "contract"}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+class SearchQuery(Schema):
+    q = String(required=True, validate=Length(min=1, max=256))
+    chain = String(metadata={"description": "Only return results on this chain"})
+    network = String(metadata={"description": "Only return results on this network"})
+    limit = Integer(load_default=20, validate=Range(min=1, max=100))
+
+
+class SearchResult(Schema):
+    kind = String(required=True)
+    chain = String(allow_none=True)
+    network = String(allow_none=True)
+    score = Float(required=True)
+    data = DictField(required=True)
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        List[str]: The tokens.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchState:
+    """An immutable build of the search index."""
+
+    def __init__(self):
+        # (kind, chain, network, data) of every document
+        self.documents: List[Tuple[str, Optional[str], Optional[str], dict]] = []
+        # Networks of every document, or None if it is not bound to a network
+        self.networks: List[Optional[Set[Tuple[str, str]]]] = []
+        self.postings: Dict[str, Dict[int, float]] = {}
+        self.tokens: List[str] = []
+
+    def add(
+        self,
+        kind: str,
+        data: dict,
+        fields: Dict[str, str],
+        chain: str = None,
+        network: str = None,
+        networks: Set[Tuple[str, str]] = None,
+    ):
+        doc_id = len(self.documents)
+        self.documents.append((kind, chain, network, data))
+        self.networks.append(networks)
+        for field, text in fields.items():
+            weight = FIELD_WEIGHTS[field]
+            for token in tokenize(text):
+                postings = self.postings.setdefault(token, {})
+                if postings.get(doc_id, 0) < weight:
+                    postings[doc_id] = weight
+
+
+class SearchIndex:
+    """Inverted and prefix index over the registry's searchable fields.
+
+    Names, symbols, slugs, descriptions and addresses of entities, assets,
+    and every network's accounts, codes and contracts are split into tokens.
+    Each token maps to the documents containing it, and the sorted token
+    list serves as a prefix index for the last, possibly incomplete, query
+    term. The index is rebuilt whenever a data file is reloaded and swapped
+    in as a whole.
+    """
+
+    def __init__(self):
+        self._state: Optional[SearchState] = None
+        self._lock = threading.Lock()
+
+    def build(self):
+        """Build the index from the current registry snapshots."""
+        start = time.perf_counter()
+        with self._lock:
+            self._state = self._build()
+        registry.record_build("search", time.perf_counter() - start)
+
+    def _build(self) -> SearchState:
+        state = SearchState()
+        for entity in load_aldus_data("entities"):
+            state.add(
+                "entity",
+                entity,
+                {
+                    "name": entity["name"],
+                    "slug": entity["slug"],
+                    "description": entity["description"],
+                },
+            )
+        for asset in load_aldus_data("assets"):
+            networks = {
+                (chain, network)
+                for chain, ids in asset["id"].items()
+                for network in ids
+            }
+            ids = [
+                asset_id for ids in asset["id"].values() for asset_id in ids.values()
+            ]
+            state.add(
+                "asset",
+                asset,
+                {
+                    "name": asset["name"],
+                    "symbol": asset["symbol"],
+                    "slug": " ".join(asset["slugs"]),
+                    "address": " ".join(ids),
+                    "description": asset["description"],
+                },
+                networks=networks,
+            )
+        for chain, network in list_networks():
+            for data_type, kind in SEARCH_DATA_TYPES.items():
+                for item in load_aldus_data(data_type, chain, network):
+                    state.add(
+                        kind,
+                        item,
+                        {
+                            "name": item.get("name", ""),
+                            "slug": item.get("slug", ""),
+                            "address": item.get("address", ""),
+                            "description": item.get("description", ""),
+                        },
+                        chain,
+                        network,
+                        {(chain, network)},
+                    )
+        state.tokens = sorted(state.postings)
+        return state
+
+    def export(self) -> Optional[SearchState]:
+        """Get the picklable state of the index."""
+        return self._state
+
+    def restore(self, state: Optional[SearchState]):
+        """Replace the index with a state returned by ``export``."""
+        with self._lock:
+            self._state = state
+
+    def refresh(self, changed: List[str]):
+        """Rebuild the index after data files are reloaded.
+
+        Args:
+            changed (List[str]): The reloaded file paths.
+        """
+        if self._state is not None:
+            self.build()
+
+    def search(
+        self, query: str, chain: str = None, network: str = None, limit: int = 20
+    ) -> List[dict]:
+        """Find the documents matching every term of a query.
+
+        The last term also matches tokens it is a prefix of, so that the
+        query can be used for typeahead.
+
+        Args:
+            query (str): The search query.
+            chain (str, optional): Only return documents on this chain.
+            network (str, optional): Only return documents on this network.
+            limit (int, optional): Maximum number of results. Defaults to 20.
+
+        Returns:
+            List[SearchResult]: The best scoring documents, best first.
+        """
+        if self._state is None:
+            self.build()
+        state = self._state
+        terms = tokenize(query)
+        if not terms:
+            return []
+
+        scores: Optional[Dict[int, float]] = None
+        for position, term in enumerate(terms):
+            matches = dict(state.postings.get(term, {}))
+            if position == len(terms) - 1:
+                start = bisect_left(state.tokens, term)
+                for token in state.tokens[start : start + MAX_PREFIX_TOKENS]:
+                    if not token.startswith(term):
+                        break
+                    for doc_id, weight in state.postings[token].items():
+                        weight *= PREFIX_WEIGHT
+                        if matches.get(doc_id, 0) < weight:
+                            matches[doc_id] = weight
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    doc_id: score + matches[doc_id]
+                    for doc_id, score in scores.items()
+                    if doc_id in matches
+                }
+            if not scores:
+                return []
+
+        if chain is not None or network is not None:
+            scores = {
+                doc_id: score
+                for doc_id, score in scores.items()
+                if state.networks[doc_id] is None
+                or any(
+                    (chain is None or chain == doc_chain)
+                    and (network is None or network == doc_network)
+                    for doc_chain, doc_network in state.networks[doc_id]
+                )
+            }
+
+        best = heapq.nsmallest(
+            limit, scores.items(), key=lambda item: (-item[1], item[0])
+        )
+        results = []
+        for doc_id, score in best:
+            kind, doc_chain, doc_network, data = state.documents[doc_id]
+            results.append(
+                {
+                    "kind": kind,
+                    "chain": doc_chain,
+                    "network": doc_network,
+                    "score": score,
+                    "data": data,
+                }
+            )
+        return results
+
+
+search_index = SearchIndex()
+registry.subscribe(search_index.refresh)
+
+
+@search_bp.route("/search", methods=["GET"])
+@search_bp.doc(
+    summary="Search the registry",
+    description="Search entities, assets, accounts, codes and contracts by name, "
+    "symbol, slug, description and address. The last query term also matches as "
+    "a prefix.",
+)
+@search_bp.input(SearchQuery, location="query")
+@search_bp.output(SearchResult(many=True), status_code=200)
+def get_search(query_data: dict) -> List[SearchResult]:
+    """Search the registry.
+
+    Args:
+        query_data (dict): The query, optional chain and network scope, and limit.
+
+    Returns:
+        List[SearchResult]: The ranked results.
+    """
+    return search_index.search(
+        query_data["q"],
+        query_data.get("chain"),
+        query_data.get("network"),
+        query_data["limit"],
+    )
@@ -0,0 +1,265 @@
+from http import HTTPStatus
+from typing import Dict, List
+
+from apiflask import APIBlueprint, Schema, abort
+from apiflask.fields import Boolean, Integer, List as ListField, Nested, String
+from apiflask.validators import Length
+from registry import registry
+from utils import (
+    PaginationQuery,
+    data_path,
+    load_aldus_data,
+    load_aldus_index,
+    paginate_aldus_data,
+    serialize_aldus_data,
+)
+
+verified_bp = APIBlueprint("verified", __name__)
+
+# Maximum number of code IDs, and of checksums, looked up in one request
+MAX_VERIFIED_ITEMS = 1000
+# Field of each data type holding the code ID it is verified by
+CODE_ID_FIELDS = {"codes": "id", "contracts": "code"}
+
+
+class Verified(Schema):
+    id = Integer(required=True)
+    checksum = String(required=True)
+    build_info = String(required=True)
+    build_env = String(required=True)
+    module_name = String(required=True)
+    repository = String(required=True)
+    commit_hash = String(required=True)
+    security_contact = String(required=True)
+    schema = Boolean(required=True)
+
+
+class VerifiedFlagQuery(Schema):
+    verified = Boolean(
+        load_default=False,
+        metadata={
+            "description": "Add whether the code has a verification record, "
+            "as the `verified` field"
+        },
+    )
+
+
+class VerifiedLookupQuery(Schema):
+    code_ids = ListField(
+        Integer(), load_default=list, validate=Length(max=MAX_VERIFIED_ITEMS)
+    )
+    checksums = ListField(
+        String(), load_default=list, validate=Length(max=MAX_VERIFIED_ITEMS)
+    )
+
+
+class VerifiedCode(Schema):
+    id = Integer(required=True)
+    verified = Boolean(required=True)
+    verification = Nested(Verified, allow_none=True)
+
+
+class VerifiedChecksum(Schema):
+    checksum = String(required=True)
+    verified = Boolean(required=True)
+    verification = Nested(Verified, allow_none=True)
+
+
+class VerifiedLookupResult(Schema):
+    codes = ListField(Nested(VerifiedCode), required=True)
+    checksums = ListField(Nested(VerifiedChecksum), required=True)
+
+
+def load_verified_index(chain: str, network: str) -> Dict[int, dict]:
+    return load_aldus_index("verified", ("id",), chain, network)
+
+
+def load_verified_by_checksum(chain: str, network: str) -> Dict[str, dict]:
+    """Get the index from checksum to verification record.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+
+    Returns:
+        Dict[str, dict]: The first record of each lowercased checksum.
+    """
+
+    def build() -> Dict[str, dict]:
+        index = {}
+        for verified in load_aldus_data("verified", chain, network):
+            index.setdefault(verified["checksum"].lower(), verified)
+        return index
+
+    path = data_path("verified", chain, network)
+    return registry.derive(f"verified_by_checksum:{path}", [path], build)
+
+
+def load_with_verified(data_type: str, chain: str, network: str) -> List[dict]:
+    """Get copies of the codes or contracts of a network with a ``verified``
+    flag, rebuilt only when either data file is reloaded.
+
+    Args:
+        data_type (str): "codes" or "contracts".
+        chain (str): Chain name.
+        network (str): Network name.
+
+    Returns:
+        List[dict]: The entries, in their original order.
+    """
+    field = CODE_ID_FIELDS[data_type]
+
+    def build() -> List[dict]:
+        verified = load_verified_index(chain, network)
+        return [
+            dict(item, verified=item.get(field) in verified)
+            for item in load_aldus_data(data_type, chain, network)
+        ]
+
+    path = data_path(data_type, chain, network)
+    return registry.derive(
+        f"with_verified:{path}", [path, data_path("verified", chain, network)], build
+    )
+
+
+def with_verified(data_type: str, item: dict, chain: str, network: str) -> dict:
+    """Get a copy of a code or contract with its ``verified`` flag.
+
+    Args:
+        data_type (str): "codes" or "contracts".
+        item (dict): The code or contract.
+        chain (str): Chain name.
+        network (str): Network name.
+
+    Returns:
+        dict: The entry with the flag.
+    """
+    verified = load_verified_index(chain, network)
+    return dict(item, verified=item.get(CODE_ID_FIELDS[data_type]) in verified)
+
+
+@verified_bp.route("/<chain>/<network>/verified", methods=["GET"])
+@verified_bp.doc(
+    summary="Get all verified codes",
+    description="Get the verification records of all verified codes for a given "
+    "chain and network",
+)
+@verified_bp.input(PaginationQuery, location="query")
+@verified_bp.output(Verified(many=True), status_code=200)
+def get_verified_codes(chain: str, network: str, query_data: dict) -> List[Verified]:
+    """Get verification records for a given chain and network.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        query_data (dict): Pagination and field projection parameters.
+
+    Returns:
+        List[Verified]: List of verification records, ordered by code ID when paginated.
+    """
+    return paginate_aldus_data(
+        "verified",
+        lambda verified: verified["id"],
+        query_data,
+        chain,
+        network,
+        Verified,
+    )
+
+
+@verified_bp.route("/<chain>/<network>/verified/<int:code_id>", methods=["GET"])
+@verified_bp.doc(
+    summary="Get verified code by ID",
+    description="Get the verification record of a code for a given chain, "
+    "network, and code ID",
+)
+@verified_bp.output(Verified, status_code=200)
+def get_verified_code(chain: str, network: str, code_id: int) -> Verified:
+    """Get the verification record for a given chain, network, and code_id.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        code_id (int): Code ID.
+
+    Returns:
+        Verified: Verification record.
+    """
+    verified = load_verified_index(chain, network).get(code_id)
+    if verified:
+        return serialize_aldus_data(verified, Verified, "verified", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Verified code not found")
+
+
+@verified_bp.route(
+    "/<chain>/<network>/verified/by-checksum/<checksum>", methods=["GET"]
+)
+@verified_bp.doc(
+    summary="Get verified code by checksum",
+    description="Get the verification record of a code for a given chain and "
+    "network by checksum, compared case-insensitively",
+)
+@verified_bp.output(Verified, status_code=200)
+def get_verified_by_checksum(chain: str, network: str, checksum: str) -> Verified:
+    """Get the verification record for a given chain, network and checksum.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        checksum (str): Code checksum.
+
+    Returns:
+        Verified: Verification record.
+    """
+    verified = load_verified_by_checksum(chain, network).get(checksum.lower())
+    if verified:
+        return serialize_aldus_data(verified, Verified, "verified", chain, network)
+    abort(HTTPStatus.NOT_FOUND, message="Verified code not found")
+
+
+@verified_bp.route("/<chain>/<network>/verified/lookup", methods=["POST"])
+@verified_bp.doc(
+    summary="Look up verified codes",
+    description="Check whether each of a batch of up to "
+    f"{MAX_VERIFIED_ITEMS} code IDs and checksums is verified on a given chain "
+    "and network, with its verification record",
+)
+@verified_bp.input(VerifiedLookupQuery)
+@verified_bp.output(VerifiedLookupResult, status_code=200)
+def post_verified_lookup(
+    chain: str, network: str, json_data: dict
+) -> VerifiedLookupResult:
+    """Look up a batch of code IDs and checksums on a chain and network.
+
+    Args:
+        chain (str): Chain name.
+        network (str): Network name.
+        json_data (dict): The code IDs and checksums to look up.
+
+    Returns:
+        VerifiedLookupResult: One entry per requested item, in request order,
+        with ``verified`` set to false for items without a verification record.
+    """
+    by_id = load_verified_index(chain, network)
+    by_checksum = load_verified_by_checksum(chain, network)
+    codes = []
+    for code_id in json_data["code_ids"]:
+        verification = by_id.get(code_id)
+        codes.append(
+            {
+                "id": code_id,
+                "verified": verification is not None,
+                "verification": verification,
+            }
+        )
+    checksums = []
+    for checksum in json_data["checksums"]:
+        verification = by_checksum.get(checksum.lower())
+        checksums.append(
+            {
+                "checksum": checksum,
+                "verified": verification is not None,
+                "verification": verification,
+            }
+        )
+    return {"codes": codes, "checksums": checksums}
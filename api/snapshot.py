@@ -0,0 +1,139 @@
+"""Compile the registry data and its indexes into one snapshot file.
+
+The API loads the snapshot at startup instead of parsing every JSON file
+and rebuilding every index. Run from the api/ directory:
+
+    python snapshot.py --output ../registry.snapshot
+
+and point the API at the file with the ALDUS_SNAPSHOT environment variable.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import pickle
+import sys
+import time
+
+from registry import registry
+from routes import v1
+from routes.v1.entities import entity_footprints
+from routes.v1.lookup import address_index
+from routes.v1.search import search_index
+from validation import validate_data
+
+# Bumped whenever the layout of the compiled state changes
+SNAPSHOT_FORMAT = 3
+
+
+def compile_snapshot(output: str, strict: bool = False) -> bool:
+    """
+    Validate the data files and write them, with their indexes, to a snapshot.
+
+    Args:
+        output (str): The path of the snapshot file to write.
+        strict (bool, optional): Whether validation errors abort the compilation. Defaults to False.
+
+    Returns:
+        bool: Whether the snapshot was written.
+    """
+    start = time.perf_counter()
+    registry.preload()
+    errors = []
+    for path in registry.discover():
+        errors.extend(validate_data(path, registry.load(path)))
+    for error in errors:
+        logging.warning(error)
+    if errors and strict:
+        logging.error(f"Found {len(errors)} validation errors, not compiling")
+        return False
+
+    v1.build_indexes()
+    state = registry.export()
+    digest = hashlib.sha256()
+    for path, snapshot in sorted(state["snapshots"].items()):
+        digest.update(f"{path}:{snapshot.digest}\n".encode())
+    header = {
+        "format": SNAPSHOT_FORMAT,
+        "python": sys.version_info[:2],
+        "digest": digest.hexdigest(),
+        "compiled_at": time.time(),
+    }
+    body = {
+        "registry": state,
+        "lookup": address_index.export(),
+        "search": search_index.export(),
+        "footprints": entity_footprints.export(),
+    }
+    temp = f"{output}.tmp"
+    with open(temp, "wb") as file:
+        pickle.dump(header, file, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(body, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp, output)
+    logging.info(
+        f"Compiled {len(state['snapshots'])} data files with digest "
+        f"{header['digest'][:12]} to {output} in {time.perf_counter() - start:.3f}s"
+    )
+    return True
+
+
+def load_snapshot(path: str) -> bool:
+    """
+    Restore the registry and its indexes from a compiled snapshot.
+
+    Files that changed on disk since the snapshot was compiled are reloaded
+    right away, so a stale snapshot only costs the parse of those files.
+
+    Args:
+        path (str): The path of the snapshot file.
+
+    Returns:
+        bool: Whether the snapshot was loaded. If not, the caller should fall back to parsing the raw JSON files.
+    """
+    if not path:
+        return False
+    start = time.perf_counter()
+    try:
+        with open(path, "rb") as file:
+            header = pickle.load(file)
+            if header.get("format") != SNAPSHOT_FORMAT or tuple(
+                header.get("python", ())
+            ) != tuple(sys.version_info[:2]):
+                logging.warning(f"Ignoring incompatible snapshot {path}")
+                return False
+            body = pickle.load(file)
+    except FileNotFoundError:
+        logging.warning(f"Snapshot not found: {path}")
+        return False
+    except Exception as e:
+        logging.error(f"Error reading snapshot {path}: {e}")
+        return False
+
+    registry.restore(body["registry"])
+    address_index.restore(body["lookup"])
+    search_index.restore(body["search"])
+    entity_footprints.restore(body["footprints"])
+    registry.refresh()
+    logging.info(
+        f"Loaded snapshot {header['digest'][:12]} from {path} in "
+        f"{time.perf_counter() - start:.3f}s"
+    )
+    return True
+
+
+if __name__ == "__main__":
+    logging.getLogger().setLevel(logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--output",
+        default=os.environ.get("ALDUS_SNAPSHOT") or "../registry.snapshot",
+        help="path of the snapshot file to write",
+    )
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="fail instead of warning when a data file does not match its schema",
+    )
+    args = parser.parse_args()
+    sys.exit(0 if compile_snapshot(args.output, args.strict) else 1)
@@ -1,67 +1,245 @@
-import os
-import logging
+import base64
+import binascii
 import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left, bisect_right
+from http import HTTPStatus
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from apiflask import Schema, abort
+from apiflask.fields import Boolean, Integer, String
+from apiflask.validators import OneOf, Range
+from flask import Response, request
+
+from metrics import metrics, route_label
+from registry import registry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+# Streamed responses are sent in chunks of about this many bytes
+STREAM_CHUNK_BYTES = 64 * 1024
 
-from flask import abort, request
+GLOBAL_DATA_TYPES = ("assets", "chains", "entities")
+# Per-network data types whose entries belong to an entity through their slug
+NETWORK_DATA_TYPES = ("accounts", "codes", "contracts", "modules")
+DATA_TYPES = GLOBAL_DATA_TYPES + NETWORK_DATA_TYPES + ("pools", "verified")
 
 
-def load_aldus_data_raw(path: str) -> list:
+def data_path(data_type: str, chain: str = None, network: str = None) -> str:
     """
-    Load data from a JSON file.
+    Get the path of an Aldus data file relative to the data directory.
 
     Args:
-        path (str): The path to the JSON file.
+        data_type (str): The type of data (e.g., "accounts", "assets", "chains").
+        chain (str, optional): The chain of the data. Defaults to None.
+        network (str, optional): The network of the data. Defaults to None.
 
     Returns:
-        list: The data from the JSON file, or an empty list if the file could not be read.
+        str: The relative path of the data file.
     """
-    if not os.path.exists(path):
-        logging.error(f"File not found: {path}")
-        return []
-    try:
-        with open(path, "r") as file:
-            return json.load(file)
-    except Exception as e:
-        logging.error(f"Error reading file {path}: {e}")
-        return []
+    if data_type in GLOBAL_DATA_TYPES:
+        return f"{data_type}.json"
+    return f"{chain}/{network}/{data_type}.json"
 
 
 def load_aldus_data(data_type: str, chain: str = None, network: str = None) -> list:
     """
     Load Aldus data based on the specified data type, chain, and network.
 
+    The data is served from the in-process registry, which parses each file
+    once and hot reloads it when it changes on disk. The returned list is
+    shared between requests and must not be modified.
+
     Args:
         data_type (str): The type of data to load (e.g., "accounts", "assets", "chains").
         chain (str, optional): The chain to load the data from. Defaults to None.
         network (str, optional): The network to load the data from. Defaults to None.
 
     Returns:
-        list: The loaded Aldus data.
+        list: The loaded Aldus data, or an empty list if the file could not be read.
+    """
+    if data_type not in DATA_TYPES:
+        return []
+    return registry.load(data_path(data_type, chain, network))
+
+
+def load_aldus_index(
+    data_type: str,
+    fields: Tuple[str, ...],
+    chain: str = None,
+    network: str = None,
+    unique: bool = True,
+) -> dict:
+    """
+    Load a hash index over Aldus data keyed by one or more fields.
+
+    Indexes are built once per data file and rebuilt whenever the file is
+    reloaded, so lookups are O(1) on the request path.
+
+    Args:
+        data_type (str): The type of data to index (e.g., "accounts", "codes").
+        fields (Tuple[str, ...]): The fields making up the key. A single field is used as a plain key, several fields as a tuple key.
+        chain (str, optional): The chain of the data. Defaults to None.
+        network (str, optional): The network of the data. Defaults to None.
+        unique (bool, optional): Whether each key maps to the first matching item, or to the list of all matching items. Defaults to True.
+
+    Returns:
+        dict: The index from key to item, or to a list of items if not unique.
+    """
+    path = data_path(data_type, chain, network)
 
-    Raises:
-        FileNotFoundError: If the specified data file is not found.
-
-    """
-    aldus_data = []
-    match data_type:
-        case "accounts":
-            aldus_data = load_aldus_data_raw(f"../data/{chain}/{network}/accounts.json")
-        case "assets":
-            aldus_data = load_aldus_data_raw(f"../data/assets.json")
-        case "chains":
-            aldus_data = load_aldus_data_raw(f"../data/chains.json")
-        case "codes":
-            print("CODES")
-            aldus_data = load_aldus_data_raw(f"../data/{chain}/{network}/codes.json")
-        case "contracts":
-            aldus_data = load_aldus_data_raw(
-                f"../data/{chain}/{network}/contracts.json"
-            )
-        case "entities":
-            aldus_data = load_aldus_data_raw(f"../data/entities.json")
-        case "modules":
-            aldus_data = load_aldus_data_raw(f"../data/{chain}/{network}/modules.json")
-    return aldus_data
+    def build() -> dict:
+        index = {}
+        for item in load_aldus_data(data_type, chain, network):
+            if len(fields) == 1:
+                key = item.get(fields[0])
+            else:
+                key = tuple(item.get(field) for field in fields)
+            if unique:
+                index.setdefault(key, item)
+            else:
+                index.setdefault(key, []).append(item)
+        return index
+
+    kind = "index" if unique else "group"
+    return registry.derive(f"{kind}:{path}:{','.join(fields)}", [path], build)
+
+
+def list_networks() -> List[Tuple[str, str]]:
+    """
+    List every chain and network that has data in the registry.
+
+    Returns:
+        List[Tuple[str, str]]: The (chain, network) pairs, sorted.
+    """
+    networks = set()
+    for path in registry.discover():
+        parts = path.split(os.sep)
+        if len(parts) == 3:
+            networks.add((parts[0], parts[1]))
+    return sorted(networks)
+
+
+class NetworkIndex(ABC):
+    """Global index from a key to its values on every chain and network.
+
+    Subclasses load the entries of one network with ``_load`` and combine
+    them with the values of the other networks with ``_merge``. When a
+    network's files are reloaded only the keys of that network are updated.
+    Updates replace the values of individual keys, so concurrent readers
+    never see a partial network.
+    """
+
+    # Prefix of the build times recorded in the registry for each network
+    name = "index"
+
+    def __init__(self):
+        self._index: Dict[str, Any] = {}
+        self._networks: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._built = False
+
+    def _get(self, key: str, default: Any) -> Any:
+        if not self._built:
+            self.build()
+        return self._index.get(key, default)
+
+    def keys(self) -> List[str]:
+        """List every indexed key.
+
+        Returns:
+            List[str]: The keys, sorted.
+        """
+        if not self._built:
+            self.build()
+        return sorted(self._index)
+
+    def build(self):
+        """Index every chain and network."""
+        with self._lock:
+            for chain, network in list_networks():
+                self._update(chain, network)
+            self._built = True
+
+    def export(self) -> dict:
+        """Get the picklable state of the index."""
+        with self._lock:
+            return {"index": dict(self._index), "networks": dict(self._networks)}
+
+    def restore(self, state: dict):
+        """Replace the index with a state returned by ``export``."""
+        with self._lock:
+            self._index = dict(state["index"])
+            self._networks = dict(state["networks"])
+            self._built = True
+
+    def refresh(self, changed: List[str]):
+        """Re-index the networks of the changed data files.
+
+        Args:
+            changed (List[str]): The reloaded file paths.
+        """
+        networks = set()
+        for path in changed:
+            parts = path.split("/")
+            if len(parts) == 3:
+                networks.add((parts[0], parts[1]))
+        with self._lock:
+            for chain, network in sorted(networks):
+                self._update(chain, network)
+
+    @abstractmethod
+    def _load(self, chain: str, network: str) -> Dict[str, Any]:
+        """Get the entry of every key of a network."""
+
+    @abstractmethod
+    def _merge(self, values: Any, chain: str, network: str, entry: Any) -> Any:
+        """Replace the entry of a network in the values of a key.
+
+        Args:
+            values (Any): The current values of the key, or None.
+            chain (str): The chain name.
+            network (str): The network name.
+            entry (Any): The new entry of the network, or None if it has none.
+
+        Returns:
+            Any: The new values, empty if no network has the key.
+        """
+
+    def _update(self, chain: str, network: str):
+        start = time.perf_counter()
+        entries = self._load(chain, network)
+        previous = self._networks.get((chain, network), {})
+        for key in previous.keys() | entries.keys():
+            values = self._merge(self._index.get(key), chain, network, entries.get(key))
+            if values:
+                self._index[key] = values
+            else:
+                self._index.pop(key, None)
+        if entries:
+            self._networks[(chain, network)] = entries
+        else:
+            self._networks.pop((chain, network), None)
+        registry.record_build(
+            f"{self.name}:{chain}/{network}", time.perf_counter() - start
+        )
 
 
 def get_query_param(
@@ -95,3 +273,474 @@ def get_query_param(
     if type == bool:
         return param.lower() == "true"
     return type(param)
+
+
+def dump_json(data: Any, newline: bool = True) -> bytes:
+    """
+    Encode a response body as compact JSON with sorted keys, like ``jsonify``.
+
+    orjson is used when it is installed, the standard library otherwise.
+
+    Args:
+        data (Any): The JSON serializable data.
+        newline (bool, optional): Whether to append a newline. Defaults to True.
+
+    Returns:
+        bytes: The encoded body.
+    """
+    if orjson is not None:
+        option = orjson.OPT_SORT_KEYS
+        if newline:
+            option |= orjson.OPT_APPEND_NEWLINE
+        try:
+            return orjson.dumps(data, option=option)
+        except TypeError:
+            # orjson rejects some values json accepts, such as 64+ bit integers
+            pass
+    body = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return (body + "\n" if newline else body).encode()
+
+
+def json_response(
+    data: Any, status: int = 200, headers: Dict[str, str] = None
+) -> Response:
+    """
+    Build a JSON response without going through an output schema.
+
+    apiflask passes ``Response`` objects returned by a view through as is, so
+    the route keeps its ``@output`` schema for the OpenAPI document.
+
+    Args:
+        data (Any): The JSON serializable data.
+        status (int, optional): The status code. Defaults to 200.
+        headers (Dict[str, str], optional): Extra response headers. Defaults to None.
+
+    Returns:
+        Response: The response.
+    """
+    start = time.perf_counter()
+    body = dump_json(data)
+    metrics.observe(
+        "aldus_json_encode_seconds",
+        (("route", route_label()),),
+        time.perf_counter() - start,
+    )
+    return Response(body, status=status, headers=headers, mimetype="application/json")
+
+
+def is_prevalidated(
+    schema: type, name: str, paths: Iterable[str], load: Callable[[], list]
+) -> bool:
+    """
+    Check whether a collection can be served without its output schema.
+
+    That is the case when every entry validates against the schema and
+    dumping the entries through it returns them unchanged. The check runs
+    once per reload of the source files rather than on every request.
+
+    Args:
+        schema (type): The output schema class of the entries.
+        name (str): A unique name for the collection.
+        paths (Iterable[str]): The data files the collection is loaded from.
+        load (Callable[[], list]): Loads the collection.
+
+    Returns:
+        bool: Whether the entries are already in their serialized form.
+    """
+
+    def build() -> bool:
+        items = load()
+        many = schema(many=True)
+        return (
+            isinstance(items, list)
+            and not many.validate(items)
+            and (many.dump(items) == items)
+        )
+
+    return registry.derive(f"prevalidated:{name}:{schema.__name__}", paths, build)
+
+
+def is_aldus_data_prevalidated(
+    schema: type, data_type: str, chain: str = None, network: str = None
+) -> bool:
+    """
+    Check whether an Aldus data file can be served without its output schema.
+
+    Args:
+        schema (type): The output schema class of the entries.
+        data_type (str): The type of data (e.g., "accounts", "codes").
+        chain (str, optional): The chain of the data. Defaults to None.
+        network (str, optional): The network of the data. Defaults to None.
+
+    Returns:
+        bool: Whether the entries are already in their serialized form.
+    """
+    path = data_path(data_type, chain, network)
+    return is_prevalidated(
+        schema, path, [path], lambda: load_aldus_data(data_type, chain, network)
+    )
+
+
+def serialize_aldus_data(
+    data: Any,
+    schema: type,
+    data_type: str,
+    chain: str = None,
+    network: str = None,
+    headers: Dict[str, str] = None,
+) -> Union[Response, Tuple[Any, int, Dict[str, str]]]:
+    """
+    Serialize entries of an Aldus data file, skipping the output schema when
+    the file was validated against it.
+
+    Args:
+        data (Any): An entry or list of entries of the data file, or projections of them.
+        schema (type): The output schema class of the route.
+        data_type (str): The type of data (e.g., "accounts", "codes").
+        chain (str, optional): The chain of the data. Defaults to None.
+        network (str, optional): The network of the data. Defaults to None.
+        headers (Dict[str, str], optional): Extra response headers. Defaults to None.
+
+    Returns:
+        Union[Response, Tuple[Any, int, Dict[str, str]]]: The encoded response, or the data, status code and headers for the output schema to serialize.
+    """
+    if is_aldus_data_prevalidated(schema, data_type, chain, network):
+        return json_response(data, headers=headers)
+    return data, 200, headers or {}
+
+
+class PaginationQuery(Schema):
+    limit = Integer(
+        validate=Range(min=1),
+        metadata={"description": "Maximum number of entries to return"},
+    )
+    cursor = String(
+        metadata={
+            "description": "Return the entries after this cursor, taken from the "
+            "X-Next-Cursor header of the previous page"
+        }
+    )
+    fields = String(
+        metadata={
+            "description": "Comma-separated list of the fields to return, "
+            "e.g. `address,name`"
+        }
+    )
+
+
+class StreamQuery(PaginationQuery):
+    format = String(
+        load_default="json",
+        validate=OneOf(["json", "ndjson"]),
+        metadata={
+            "description": "`json` for a JSON document, `ndjson` to stream one "
+            f"JSON entry per line as `{NDJSON_MIMETYPE}`"
+        },
+    )
+    stream = Boolean(
+        load_default=False,
+        metadata={
+            "description": "Stream the JSON document as it is encoded instead of "
+            "sending it at once. Streamed responses are not cached or compressed."
+        },
+    )
+
+
+def iter_chunks(parts: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Join encoded parts into chunks of about ``STREAM_CHUNK_BYTES``.
+
+    Args:
+        parts (Iterable[bytes]): The encoded parts.
+
+    Yields:
+        bytes: The chunks.
+    """
+    chunk = []
+    size = 0
+    for part in parts:
+        chunk.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_BYTES:
+            yield b"".join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield b"".join(chunk)
+
+
+def stream_collection(
+    items: Iterable[Any],
+    query_data: dict,
+    headers: Dict[str, str] = None,
+    keyed: bool = False,
+    schema: type = None,
+) -> Optional[Response]:
+    """
+    Stream a collection if the request asked for it with ``StreamQuery``.
+
+    Entries are projected and encoded one at a time while the response is
+    sent, so memory use does not grow with the size of the collection.
+
+    Args:
+        items (Iterable[Any]): The unprojected entries, or (key, entry) pairs if keyed.
+        query_data (dict): The parsed stream query.
+        headers (Dict[str, str], optional): Extra response headers. Defaults to None.
+        keyed (bool, optional): Whether the collection is a JSON object. Its NDJSON lines are then the entries without their keys. Defaults to False.
+        schema (type, optional): The output schema class each entry is dumped through. Defaults to None.
+
+    Returns:
+        Optional[Response]: The streamed response, or None to send the collection at once.
+    """
+    ndjson = query_data.get("format") == "ndjson"
+    if not ndjson and not query_data.get("stream"):
+        return None
+    fields = parse_fields(query_data)
+    dump = schema().dump if schema is not None else None
+
+    def encode(entry: Any, newline: bool) -> bytes:
+        entry = project_fields(entry, fields)
+        return dump_json(entry if dump is None else dump(entry), newline)
+
+    def generate() -> Iterator[bytes]:
+        if ndjson:
+            for item in items:
+                yield encode(item[1] if keyed else item, True)
+            return
+        yield b"{" if keyed else b"["
+        for position, item in enumerate(items):
+            if position:
+                yield b","
+            if keyed:
+                key, entry = item
+                yield dump_json(key, newline=False) + b":"
+                item = entry
+            yield encode(item, False)
+        yield b"}\n" if keyed else b"]\n"
+
+    return Response(
+        iter_chunks(generate()),
+        headers=headers,
+        mimetype=NDJSON_MIMETYPE if ndjson else "application/json",
+    )
+
+
+def encode_cursor(key: Any) -> str:
+    """
+    Encode the sort key of the last entry of a page as an opaque cursor.
+
+    Args:
+        key (Any): The JSON serializable sort key, with the entry's rank among the entries with an equal key.
+
+    Returns:
+        str: The cursor.
+    """
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """
+    Decode a cursor created by ``encode_cursor``.
+
+    Args:
+        cursor (str): The cursor.
+
+    Returns:
+        Any: The sort key, with JSON arrays converted back to tuples.
+
+    Raises:
+        BadRequest: If the cursor is malformed.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+    except (binascii.Error, ValueError):
+        abort(HTTPStatus.BAD_REQUEST, message="Invalid cursor")
+    # Cursors are (sort key, rank) pairs, and sort keys may be tuples too
+    if (
+        not isinstance(key, list)
+        or len(key) != 2
+        or not isinstance(key[1], int)
+        or key[1] < 0
+    ):
+        abort(HTTPStatus.BAD_REQUEST, message="Invalid cursor")
+    return to_tuples(key)
+
+
+def to_tuples(value: Any) -> Any:
+    """Convert the JSON arrays of a decoded value, nested ones included, to tuples."""
+    if isinstance(value, list):
+        return tuple(to_tuples(item) for item in value)
+    return value
+
+
+def project_fields(item: dict, fields: Optional[Iterable[str]]) -> dict:
+    """
+    Keep only the given fields of an entry.
+
+    Args:
+        item (dict): The entry.
+        fields (Iterable[str], optional): The fields to keep, or None to keep all.
+
+    Returns:
+        dict: The projected entry.
+    """
+    if fields is None:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def parse_fields(query_data: dict) -> Optional[List[str]]:
+    """
+    Parse the comma-separated ``fields`` query parameter.
+
+    Args:
+        query_data (dict): The parsed pagination query.
+
+    Returns:
+        List[str]: The requested fields, or None if all fields are requested.
+    """
+    fields = query_data.get("fields")
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()]
+
+
+def is_paginated(query_data: dict) -> bool:
+    """
+    Check whether a query asks for a page rather than the whole collection.
+
+    Args:
+        query_data (dict): The parsed pagination query.
+
+    Returns:
+        bool: Whether ``limit`` or ``cursor`` is set.
+    """
+    return query_data.get("limit") is not None or query_data.get("cursor") is not None
+
+
+def paginate(
+    name: str,
+    paths: Iterable[str],
+    load: Callable[[], list],
+    sort_key: Callable[[Any], Any],
+    query_data: dict,
+) -> Tuple[list, Dict[str, str]]:
+    """
+    Get a page of entries from a pre-sorted copy of a collection.
+
+    Without ``limit`` and ``cursor`` the whole collection is returned in its
+    original order. Otherwise entries are ordered by ``sort_key``, then by
+    their original index so that entries with equal keys are never skipped.
+    The cursor encodes the key and the rank among equal keys, so pages stay
+    stable across reloads. The sorted copy is derived from the registry and
+    rebuilt only on reload.
+
+    Args:
+        name (str): A unique name for the sorted collection.
+        paths (Iterable[str]): The data files the collection is loaded from.
+        load (Callable[[], list]): Loads the collection.
+        sort_key (Callable[[Any], Any]): Gets the JSON serializable sort key of an entry.
+        query_data (dict): The parsed pagination query.
+
+    Returns:
+        Tuple[list, Dict[str, str]]: The page and the response headers, with X-Next-Cursor set if there are more entries.
+    """
+    if not is_paginated(query_data):
+        return load(), {}
+
+    def build() -> Tuple[list, list]:
+        keyed = sorted(
+            ((sort_key(item), index), item) for index, item in enumerate(load())
+        )
+        return [item for _, item in keyed], [key for key, _ in keyed]
+
+    items, keys = registry.derive(f"sorted:{name}", paths, build)
+    return slice_page(items, keys, query_data)
+
+
+def slice_page(
+    items: list, keys: list, query_data: dict
+) -> Tuple[list, Dict[str, str]]:
+    """
+    Get a page of entries from a collection that is already sorted.
+
+    Args:
+        items (list): The sorted entries.
+        keys (list): The unique (sort key, index) pair of each entry, sorted.
+        query_data (dict): The parsed pagination query.
+
+    Returns:
+        Tuple[list, Dict[str, str]]: The page and the response headers, with X-Next-Cursor set if there are more entries.
+    """
+    limit = query_data.get("limit")
+    cursor = query_data.get("cursor")
+    start = 0
+    if cursor is not None:
+        # Indexes shift when entries are inserted before the cursor, ranks
+        # among the entries with the same key only when those change
+        key, rank = decode_cursor(cursor)
+        try:
+            first = bisect_left(keys, key, key=sort_key_of)
+            start = min(first + rank + 1, bisect_right(keys, key, key=sort_key_of))
+        except TypeError:
+            abort(HTTPStatus.BAD_REQUEST, message="Invalid cursor")
+    end = len(items) if limit is None else min(start + limit, len(items))
+    headers = {}
+    if end < len(items):
+        key = keys[end - 1][0]
+        rank = end - 1 - bisect_left(keys, key, key=sort_key_of)
+        headers["X-Next-Cursor"] = encode_cursor((key, rank))
+    return items[start:end], headers
+
+
+def sort_key_of(key: Tuple[Any, int]) -> Any:
+    """Get the sort key of a (sort key, index) pair."""
+    return key[0]
+
+
+def paginate_aldus_data(
+    data_type: str,
+    sort_key: Callable[[dict], Any],
+    query_data: dict,
+    chain: str = None,
+    network: str = None,
+    schema: type = None,
+) -> Union[Response, Tuple[List[dict], int, Dict[str, str]]]:
+    """
+    Get a page of projected entries of an Aldus data file, streamed if the
+    query is a ``StreamQuery`` asking for it.
+
+    Args:
+        data_type (str): The type of data (e.g., "accounts", "codes").
+        sort_key (Callable[[dict], Any]): Gets the sort key of an entry.
+        query_data (dict): The parsed pagination query.
+        chain (str, optional): The chain of the data. Defaults to None.
+        network (str, optional): The network of the data. Defaults to None.
+        schema (type, optional): The output schema class of the route, see ``serialize_aldus_data``. Defaults to None.
+
+    Returns:
+        Union[Response, Tuple[List[dict], int, Dict[str, str]]]: The encoded response, or the page, status code and headers.
+    """
+    path = data_path(data_type, chain, network)
+    page, headers = paginate(
+        path,
+        [path],
+        lambda: load_aldus_data(data_type, chain, network),
+        sort_key,
+        query_data,
+    )
+    prevalidated = schema is not None and is_aldus_data_prevalidated(
+        schema, data_type, chain, network
+    )
+    streamed = stream_collection(
+        page, query_data, headers, schema=None if prevalidated else schema
+    )
+    if streamed is not None:
+        return streamed
+    fields = parse_fields(query_data)
+    page = [project_fields(item, fields) for item in page]
+    if prevalidated:
+        return json_response(page, headers=headers)
+    return page, 200, headers
@@ -0,0 +1,172 @@
+import os
+from typing import Any, Dict, List, Tuple
+
+from marshmallow import INCLUDE, ValidationError
+
+from routes.v1.accounts import Account
+from routes.v1.assets import RawAsset
+from routes.v1.codes import Code
+from routes.v1.contracts import Contract
+from routes.v1.entities import RawEntity
+from routes.v1.modules import Module
+from routes.v1.pools import Pool
+from routes.v1.verified import Verified
+
+# Schema each data type is validated against, data types without one are skipped
+SCHEMAS = {
+    "accounts": Account,
+    "assets": RawAsset,
+    "codes": Code,
+    "contracts": Contract,
+    "entities": RawEntity,
+    "modules": Module,
+    "pools": Pool,
+    "verified": Verified,
+}
+
+
+def data_type_of(path: str) -> str:
+    """
+    Get the data type of a data file from its path.
+
+    Args:
+        path (str): The path of the data file, e.g. "terra/phoenix-1/codes.json".
+
+    Returns:
+        str: The data type, e.g. "codes".
+    """
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def validate_data(path: str, data: Any) -> List[str]:
+    """
+    Validate the contents of a data file against its API schema.
+
+    Args:
+        path (str): The path of the data file, relative to the data directory.
+        data (Any): The parsed contents of the file.
+
+    Returns:
+        List[str]: One message per invalid field, empty if the data is valid.
+    """
+    schema = SCHEMAS.get(data_type_of(path))
+    if schema is None:
+        return []
+    if not isinstance(data, list):
+        return [f"{path}: expected a list of entries"]
+    errors = schema(many=True).validate(data)
+    messages = []
+    for index, fields in sorted(errors.items()):
+        for field, field_errors in sorted(fields.items()):
+            messages.append(f"{path}[{index}].{field}: {field_errors}")
+    return messages
+
+
+def normalize_data(path: str, data: Any) -> Tuple[Any, List[str]]:
+    """
+    Convert the values of a data file to the types of its API schema, e.g.
+    a code ID stored as "98" to 98.
+
+    Values in another type are still accepted by the schemas, but they are
+    served as stored wherever the raw data is returned, and they keep the
+    file from being served without its output schema.
+
+    Args:
+        path (str): The path of the data file, relative to the data directory.
+        data (Any): The parsed contents of the file.
+
+    Returns:
+        Tuple[Any, List[str]]: The normalized data, and one message per converted value.
+    """
+    schema = SCHEMAS.get(data_type_of(path))
+    if schema is None or not isinstance(data, list):
+        return data, []
+    loader = schema(partial=True, unknown=INCLUDE)
+    normalized = []
+    messages = []
+    for index, entry in enumerate(data):
+        if not isinstance(entry, dict):
+            normalized.append(entry)
+            continue
+        try:
+            loaded = loader.load(entry)
+        except ValidationError as e:
+            # Invalid values are left as they are, for validate_data to report
+            loaded = e.valid_data or {}
+        converted = dict(entry)
+        for field, value in entry.items():
+            if field in loaded and loaded[field] != value:
+                converted[field] = loaded[field]
+                messages.append(
+                    f"{path}[{index}].{field}: {value!r} should be {loaded[field]!r}"
+                )
+        normalized.append(converted)
+    return normalized, messages
+
+
+def collect_references(path: str, data: Any) -> Dict[str, list]:
+    """
+    Get what a data file defines and refers to in other data files.
+
+    Args:
+        path (str): The path of the data file, relative to the data directory.
+        data (Any): The parsed contents of the file.
+
+    Returns:
+        Dict[str, list]: The entity slugs and code IDs the file defines, as
+            ``slugs`` and ``code_ids``, and the ones it refers to, as
+            ``slug_refs`` and ``code_refs`` lists of [location, value].
+    """
+    references = {"slugs": [], "code_ids": [], "slug_refs": [], "code_refs": []}
+    if not isinstance(data, list):
+        return references
+    data_type = data_type_of(path)
+    for index, entry in enumerate(data):
+        if not isinstance(entry, dict):
+            continue
+        location = f"{path}[{index}]"
+        if data_type == "entities":
+            references["slugs"].append(entry.get("slug"))
+        elif data_type == "assets":
+            for position, slug in enumerate(entry.get("slugs") or []):
+                references["slug_refs"].append([f"{location}.slugs[{position}]", slug])
+        elif "slug" in entry:
+            references["slug_refs"].append([f"{location}.slug", entry["slug"]])
+        if data_type == "codes":
+            references["code_ids"].append(entry.get("id"))
+        elif data_type == "contracts" and "code" in entry:
+            references["code_refs"].append([f"{location}.code", entry["code"]])
+    return references
+
+
+def check_references(
+    references: Dict[str, Dict[str, list]]
+) -> Tuple[List[str], List[str]]:
+    """
+    Check the references between data files.
+
+    Every entity slug must exist in entities.json. A contract whose code is
+    not listed in the codes of its network is only a warning, since only
+    notable codes are listed.
+
+    Args:
+        references (Dict[str, Dict[str, list]]): The ``collect_references`` of every data file, by path.
+
+    Returns:
+        Tuple[List[str], List[str]]: The errors and the warnings.
+    """
+    slugs = set(references.get("entities.json", {}).get("slugs", []))
+    errors = []
+    warnings = []
+    for path, file_references in sorted(references.items()):
+        for location, slug in file_references["slug_refs"]:
+            if slug not in slugs:
+                errors.append(f"{location}: unknown entity slug {slug!r}")
+        if not file_references["code_refs"]:
+            continue
+        codes_path = f"{os.path.dirname(path)}/codes.json"
+        code_ids = set(references.get(codes_path, {}).get("code_ids", []))
+        for location, code_id in file_references["code_refs"]:
+            if code_id not in code_ids:
+                warnings.append(f"{location}: code {code_id!r} is not in {codes_path}")
+    return errors, warnings
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_DIR = os.path.join(ROOT_DIR, "api")
+
+# The API reads its settings when it is imported, so they are set before any
+# test module imports it. Tests edit a copy of the registry data, and reload
+# it explicitly instead of through the watcher thread
+TEST_DATA_DIR = tempfile.mkdtemp(prefix="aldus-test-data-")
+shutil.copytree(os.path.join(ROOT_DIR, "data"), TEST_DATA_DIR, dirs_exist_ok=True)
+os.environ.update(
+    {
+        "ALDUS_URL": "https://aldus.test",
+        "ALDUS_DATA_DIR": TEST_DATA_DIR,
+        "ALDUS_RELOAD_INTERVAL": "0",
+        "ALDUS_SNAPSHOT": "",
+        "ALDUS_METRICS_DIR": "",
+        "ALDUS_PROFILE_TOKEN": "",
+        "ALDUS_SLOW_REQUEST_SECONDS": "0",
+        "ALDUS_LOGOS_DIR": "",
+        "ALDUS_PRICES_URL": "",
+    }
+)
+sys.path.insert(0, API_DIR)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(TEST_DATA_DIR, ignore_errors=True)
+
+
+def write_file(path: str, body: bytes):
+    """Write a file with an mtime that always differs from its previous one,
+    so that the registry notices the change even within the same tick."""
+    previous = os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+    with open(path, "wb") as file:
+        file.write(body)
+    mtime = max(time.time_ns(), previous + 1_000_000)
+    os.utime(path, ns=(mtime, mtime))
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app
+
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from cache import response_cache
+
+    response_cache.clear()
+    return app.test_client()
+
+
+@pytest.fixture
+def edit_data(app):
+    """Replace data files of the test registry, and reload it.
+
+    Every edited file is restored, and the registry reloaded again, after the
+    test.
+    """
+    from registry import registry
+
+    originals = {}
+
+    def edit(path: str, data) -> list:
+        full_path = os.path.join(TEST_DATA_DIR, path)
+        if path not in originals:
+            originals[path] = None
+            if os.path.exists(full_path):
+                with open(full_path, "rb") as file:
+                    originals[path] = file.read()
+        if data is None:
+            os.remove(full_path)
+        else:
+            write_file(full_path, json.dumps(data, indent=2).encode())
+        return registry.refresh()
+
+    yield edit
+
+    for path, body in originals.items():
+        full_path = os.path.join(TEST_DATA_DIR, path)
+        if body is None:
+            if os.path.exists(full_path):
+                os.remove(full_path)
+        else:
+            write_file(full_path, body)
+    registry.refresh()
+
+
+@pytest.fixture
+def load_data():
+    """Read a data file of the test registry from disk."""
+
+    def load(path: str):
+        with open(os.path.join(TEST_DATA_DIR, path)) as file:
+            return json.load(file)
+
+    return load
@@ -0,0 +1,106 @@
+import gzip
+
+import brotli
+import pytest
+
+from cache import response_cache
+from constants import COMPRESS_MIN_BYTES
+
+# Large enough to be compressed
+ACCOUNTS_URL = "/v1/terra/phoenix-1/accounts"
+ACCOUNTS = "terra/phoenix-1/accounts.json"
+
+
+def test_repeated_requests_are_served_from_the_cache(client):
+    first = client.get(ACCOUNTS_URL)
+    second = client.get(ACCOUNTS_URL)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.data == first.data
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert second.headers["Content-Type"] == first.headers["Content-Type"]
+
+
+def test_query_strings_are_cached_separately(client):
+    client.get(ACCOUNTS_URL)
+    response = client.get(f"{ACCOUNTS_URL}?limit=1")
+    assert response.headers["X-Cache"] == "MISS"
+    assert len(response.get_json()) == 1
+
+
+def test_matching_etags_get_not_modified(client):
+    etag = client.get(ACCOUNTS_URL).headers["ETag"]
+
+    response = client.get(ACCOUNTS_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+
+    response = client.get(ACCOUNTS_URL, headers={"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, encoding",
+    [
+        ("br;q=0.1, gzip;q=1", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip", "gzip"),
+        ("br;q=0, *", "gzip"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_encoding_follows_accept_encoding_q_values(client, accept_encoding, encoding):
+    identity = client.get(ACCOUNTS_URL)
+    response = client.get(ACCOUNTS_URL, headers={"Accept-Encoding": accept_encoding})
+
+    assert response.headers.get("Content-Encoding") == encoding
+    assert "Accept-Encoding" in response.headers["Vary"]
+    decompress = {"gzip": gzip.decompress, "br": brotli.decompress}.get(
+        encoding, lambda body: body
+    )
+    assert decompress(response.data) == identity.data
+    if encoding is not None:
+        assert response.headers["ETag"] != identity.headers["ETag"]
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get(
+        "/v1/terra/phoenix-1/accounts?limit=1&fields=name",
+        headers={"Accept-Encoding": "gzip, br"},
+    )
+    assert len(response.data) < COMPRESS_MIN_BYTES
+    assert "Content-Encoding" not in response.headers
+
+
+def test_reloads_invalidate_cached_responses(client, edit_data, load_data):
+    first = client.get(ACCOUNTS_URL)
+    accounts = load_data(ACCOUNTS)
+    edit_data(ACCOUNTS, accounts[:1])
+
+    response = client.get(ACCOUNTS_URL)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.get_json() == accounts[:1]
+    assert response.headers["ETag"] != first.headers["ETag"]
+    # The old ETag no longer matches the data
+    response = client.get(
+        ACCOUNTS_URL, headers={"If-None-Match": first.headers["ETag"]}
+    )
+    assert response.status_code == 200
+
+
+def test_errors_are_not_cached(client):
+    for _ in range(2):
+        response = client.get("/v1/terra/phoenix-1/codes/999999999")
+        assert response.status_code == 404
+        assert "X-Cache" not in response.headers
+
+
+def test_bodies_over_the_cache_size_are_served_but_not_cached(client, monkeypatch):
+    monkeypatch.setattr(response_cache, "max_bytes", 100)
+    for _ in range(2):
+        response = client.get(ACCOUNTS_URL, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["X-Cache"] == "MISS"
+        assert "Content-Encoding" not in response.headers
+    assert response_cache.stats()["entries"] == 0
@@ -0,0 +1,138 @@
+import pytest
+
+from registry import registry
+from routes.v1.changes import change_log, diff_records
+
+CODES = "terra/phoenix-1/codes.json"
+
+
+def get_changes(client, since: int, **filters) -> dict:
+    query = "&".join(f"{name}={value}" for name, value in filters.items())
+    response = client.get(f"/v1/changes?since={since}&{query}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def code(id: int, name: str) -> dict:
+    return {"slug": "test", "name": name, "id": id, "description": ""}
+
+
+def test_without_since_only_the_version_is_returned(client):
+    response = client.get("/v1/changes")
+    assert response.get_json() == {
+        "version": registry.version,
+        "since": None,
+        "changes": [],
+    }
+
+
+def test_no_changes_since_the_current_version(client):
+    body = get_changes(client, registry.version)
+    assert body == {
+        "version": registry.version,
+        "since": registry.version,
+        "changes": [],
+    }
+
+
+@pytest.mark.parametrize("offset", [1, 1000])
+def test_versions_from_the_future_are_gone(client, offset):
+    response = client.get(f"/v1/changes?since={registry.version + offset}")
+    assert response.status_code == 410
+
+
+def test_versions_older_than_the_history_are_gone(client):
+    response = client.get(f"/v1/changes?since={change_log.oldest - 1}")
+    assert response.status_code == 410
+    assert "download the full collections" in response.get_json()["message"]
+
+
+def test_added_updated_and_removed_records(client, edit_data, load_data):
+    codes = load_data(CODES)
+    since = registry.version
+    edited = [code(codes[0]["id"], "Renamed")] + codes[2:] + [code(1, "New")]
+    assert edit_data(CODES, edited) == [CODES]
+
+    body = get_changes(client, since)
+    assert body["version"] == registry.version
+    assert body["since"] == since
+    assert body["changes"] == [
+        {
+            "collection": "codes",
+            "chain": "terra",
+            "network": "phoenix-1",
+            "added": [code(1, "New")],
+            "updated": [code(codes[0]["id"], "Renamed")],
+            "removed": [codes[1]],
+        }
+    ]
+
+
+def test_changes_of_several_reloads_are_merged(client, edit_data, load_data):
+    codes = load_data(CODES)
+    since = registry.version
+    edit_data(CODES, codes + [code(1, "First")])
+    middle = registry.version
+    edit_data(CODES, codes + [code(1, "Second")])
+
+    # Added since the first version, then updated since the second
+    assert get_changes(client, since)["changes"][0]["added"] == [code(1, "Second")]
+    changes = get_changes(client, middle)["changes"][0]
+    assert changes["added"] == []
+    assert changes["updated"] == [code(1, "Second")]
+
+
+def test_records_added_then_removed_are_not_listed(client, edit_data, load_data):
+    codes = load_data(CODES)
+    since = registry.version
+    edit_data(CODES, codes + [code(1, "Temporary")])
+    edit_data(CODES, codes)
+
+    assert get_changes(client, since)["changes"] == []
+
+
+def test_changes_are_filtered(client, edit_data, load_data):
+    since = registry.version
+    edit_data(CODES, load_data(CODES)[1:])
+    entities = load_data("entities.json")
+    edit_data("entities.json", entities[1:])
+
+    def listed(**filters):
+        changes = get_changes(client, since, **filters)["changes"]
+        return [(item["collection"], item["chain"]) for item in changes]
+
+    # Sorted by file path
+    assert listed() == [("entities", None), ("codes", "terra")]
+    assert listed(collection="entities") == [("entities", None)]
+    assert listed(chain="terra") == [("codes", "terra")]
+    assert listed(chain="terra", network="pisco-1") == []
+    assert listed(chain="osmosis") == []
+
+
+def test_unknown_collections_are_rejected(client):
+    response = client.get(f"/v1/changes?since={registry.version}&collection=nope")
+    assert response.status_code == 422
+
+
+def test_duplicate_keys_are_replaced_as_a_whole():
+    old = [code(1, "a"), code(1, "b")]
+    new = [code(1, "c")]
+    assert diff_records("codes", old, new) == {(1,): (old, new)}
+
+
+def test_records_without_key_fields_are_identified_by_content():
+    old = [{"id": "uluna"}, {"id": "uatom"}]
+    new = [{"id": "uluna"}, {"id": "uosmo"}]
+    changes = diff_records("assets", old, new)
+    assert sorted(changes.values()) == [
+        ([], [{"id": "uosmo"}]),
+        ([{"id": "uatom"}], []),
+    ]
+
+
+def test_chains_are_keyed_by_name():
+    old = {"terra": {"a": 1}, "osmosis": {"a": 1}}
+    new = {"terra": {"a": 2}, "osmosis": {"a": 1}}
+    assert diff_records("chains", old, new) == {
+        "terra": ([{"terra": {"a": 1}}], [{"terra": {"a": 2}}])
+    }
@@ -0,0 +1,147 @@
+import json
+import os
+import re
+import subprocess
+import sys
+
+from metrics import Metrics, metrics
+
+LABELS = (("route", "/v1/<chain>"),)
+
+
+def sample_lines(text: str, name: str) -> dict:
+    """Get the samples of a metric from an exposition, by their labels."""
+    values = {}
+    for line in text.splitlines():
+        match = re.fullmatch(rf"{name}(\{{.*\}})? (\S+)", line)
+        if match:
+            values[match.group(1) or ""] = float(match.group(2))
+    return values
+
+
+def test_counters_add_up_per_label_set():
+    registry = Metrics()
+    registry.describe("requests_total", "counter", "Requests.")
+    registry.inc("requests_total", LABELS)
+    registry.inc("requests_total", LABELS, 2)
+    registry.inc("requests_total", (("route", "/other"),))
+
+    text = registry.render()
+    assert "# HELP requests_total Requests.\n# TYPE requests_total counter\n" in text
+    assert sample_lines(text, "requests_total") == {
+        '{route="/other"}': 1,
+        '{route="/v1/<chain>"}': 3,
+    }
+
+
+def test_histogram_buckets_are_cumulative_and_ordered():
+    registry = Metrics()
+    registry.describe("duration_seconds", "histogram", "Durations.")
+    for value in (0.5, 2, 10):
+        registry.observe(
+            "duration_seconds", LABELS, value, buckets=(1, 5, float("inf"))
+        )
+
+    text = registry.render()
+    buckets = [
+        line for line in text.splitlines() if line.startswith("duration_seconds_")
+    ]
+    assert buckets == [
+        'duration_seconds_bucket{route="/v1/<chain>",le="1"} 1',
+        'duration_seconds_bucket{route="/v1/<chain>",le="5"} 2',
+        'duration_seconds_bucket{route="/v1/<chain>",le="+Inf"} 3',
+        'duration_seconds_count{route="/v1/<chain>"} 3',
+        'duration_seconds_sum{route="/v1/<chain>"} 12.5',
+    ]
+    assert "# TYPE duration_seconds histogram" in text
+
+
+def test_label_values_are_escaped():
+    registry = Metrics()
+    registry.inc("errors_total", (("message", 'a "b"\\\n'),))
+    assert 'errors_total{message="a \\"b\\"\\\\\\n"} 1' in registry.render()
+
+
+def test_collectors_are_added_when_rendering():
+    registry = Metrics()
+    calls = []
+
+    def collect():
+        calls.append(1)
+        return [("cache_hits_total", (), 4)]
+
+    registry.add_collector(collect)
+    assert calls == []
+    assert sample_lines(registry.render(), "cache_hits_total") == {"": 4}
+
+
+def test_samples_of_live_workers_are_added_up(tmp_path):
+    registry = Metrics(str(tmp_path))
+    registry.inc("requests_total", LABELS, 2)
+    exited = subprocess.run(
+        [sys.executable, "-c", "import os; print(os.getpid())"],
+        capture_output=True,
+        text=True,
+    )
+    for pid in (os.getppid(), int(exited.stdout)):
+        with open(tmp_path / f"{pid}.json", "w") as file:
+            json.dump([["requests_total", [list(LABELS[0])], 5]], file)
+
+    assert sample_lines(registry.render(), "requests_total") == {
+        '{route="/v1/<chain>"}': 7
+    }
+    # The file of the exited worker is removed
+    assert sorted(os.listdir(tmp_path)) == [f"{os.getppid()}.json"]
+
+    registry.flush()
+    with open(tmp_path / f"{os.getpid()}.json") as file:
+        assert json.load(file) == [["requests_total", [list(LABELS[0])], 2]]
+
+
+def test_requests_are_counted_by_route_pattern(client):
+    def count(route: str, status: str) -> float:
+        labels = (
+            ("blueprint", "v1.codes" if route != "<unmatched>" else ""),
+            ("route", route),
+            ("method", "GET"),
+            ("status", status),
+        )
+        return metrics.samples().get(("aldus_http_requests_total", labels), 0)
+
+    route = "/v1/<chain>/<network>/codes/<int:code_id>"
+    before = count(route, "200"), count(route, "404"), count("<unmatched>", "404")
+    for url in ("/v1/terra/phoenix-1/codes/895", "/v1/terra/phoenix-1/codes/896"):
+        assert client.get(url).status_code == 200
+    assert client.get("/v1/terra/phoenix-1/codes/999999999").status_code == 404
+    assert client.get("/nope").status_code == 404
+
+    after = count(route, "200"), count(route, "404"), count("<unmatched>", "404")
+    assert [a - b for a, b in zip(after, before)] == [2, 1, 1]
+
+
+def test_metrics_endpoint_exports_request_and_data_metrics(client):
+    client.get("/v1/terra/phoenix-1/codes")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+
+    text = response.get_data(as_text=True)
+    assert "# TYPE aldus_http_requests_total counter" in text
+    assert "# TYPE aldus_http_request_duration_seconds histogram" in text
+    assert 'path="terra/phoenix-1/codes.json"' in text
+    assert sample_lines(text, "aldus_data_files")[""] > 0
+
+
+def test_index_build_times_have_a_fixed_label_set(client):
+    def indexes() -> set:
+        text = client.get("/metrics").get_data(as_text=True)
+        return set(sample_lines(text, "aldus_index_build_seconds"))
+
+    client.get("/v1/terra/phoenix-1/contracts?code=895&limit=1")
+    before = indexes()
+    for code_id in range(20):
+        client.get(f"/v1/terra/phoenix-1/contracts?code={code_id}&limit=1")
+        client.get(f"/v1/chain{code_id}/network/assets?limit=1")
+
+    assert indexes() == before
+    assert all("/" not in labels and ":" not in labels for labels in before)
@@ -0,0 +1,120 @@
+import pytest
+
+from registry import registry
+from utils import decode_cursor, encode_cursor, slice_page
+
+ACCOUNTS = "terra/phoenix-1/accounts.json"
+
+
+def walk(client, url: str, limit: int) -> list:
+    """Get every entry of a collection, one page at a time."""
+    entries = []
+    cursor = None
+    separator = "&" if "?" in url else "?"
+    while True:
+        query = f"limit={limit}" + (f"&cursor={cursor}" if cursor else "")
+        response = client.get(f"{url}{separator}{query}")
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= limit
+        entries.extend(page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return entries
+
+
+def account(address: str, name: str) -> dict:
+    return {
+        "slug": "terra",
+        "address": address,
+        "name": name,
+        "description": "",
+        "type": "account",
+    }
+
+
+def test_cursors_round_trip_tuple_keys():
+    key = (("terra", 3), 7)
+    assert decode_cursor(encode_cursor(key)) == key
+
+
+def test_slice_page_never_skips_entries_with_equal_keys():
+    items = ["a", "b", "c", "d"]
+    keys = [(1, 0), (1, 1), (1, 2), (2, 3)]
+    page, headers = slice_page(items, keys, {"limit": 2})
+    assert page == ["a", "b"]
+
+    page, headers = slice_page(
+        items, keys, {"limit": 2, "cursor": headers["X-Next-Cursor"]}
+    )
+    assert page == ["c", "d"]
+    assert "X-Next-Cursor" not in headers
+
+
+def test_whole_collection_without_limit_or_cursor(client, load_data):
+    response = client.get("/v1/terra/phoenix-1/accounts")
+    assert response.get_json() == load_data(ACCOUNTS)
+    assert "X-Next-Cursor" not in response.headers
+
+
+@pytest.mark.parametrize("limit", [1, 7, 1000])
+def test_pages_cover_the_collection_in_key_order(client, load_data, limit):
+    accounts = walk(client, "/v1/terra/phoenix-1/accounts", limit)
+    expected = sorted(load_data(ACCOUNTS), key=lambda item: item["address"])
+    assert accounts == expected
+
+
+def test_duplicate_keys_are_paged_in_file_order(client, edit_data):
+    accounts = [account("terra1same", f"Account {index}") for index in range(5)]
+    accounts.insert(2, account("terra1before", "Before"))
+    edit_data(ACCOUNTS, accounts)
+
+    names = [item["name"] for item in walk(client, "/v1/terra/phoenix-1/accounts", 2)]
+    assert names == ["Before"] + [f"Account {index}" for index in range(5)]
+
+
+def test_cursors_resume_after_the_last_key_across_reloads(client, edit_data):
+    edit_data(ACCOUNTS, [account(f"terra1{letter}", letter) for letter in "bdf"])
+    response = client.get("/v1/terra/phoenix-1/accounts?limit=2")
+    assert [item["name"] for item in response.get_json()] == ["b", "d"]
+    cursor = response.headers["X-Next-Cursor"]
+
+    edit_data(ACCOUNTS, [account(f"terra1{letter}", letter) for letter in "abcdef"])
+    response = client.get(f"/v1/terra/phoenix-1/accounts?limit=10&cursor={cursor}")
+    assert [item["name"] for item in response.get_json()] == ["e", "f"]
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "WzFd", "bnVsbA", "W1sxLDJdLDFd"])
+def test_invalid_cursors_are_rejected_with_a_reason(client, cursor):
+    response = client.get(f"/v1/terra/phoenix-1/accounts?limit=1&cursor={cursor}")
+    assert response.status_code == 400
+    assert response.get_json()["message"] == "Invalid cursor"
+
+
+def test_contracts_of_a_code_are_paged_by_address(client, load_data):
+    contracts = load_data("terra/phoenix-1/contracts.json")
+    code_id = max(
+        {contract["code"] for contract in contracts},
+        key=lambda code: sum(contract["code"] == code for contract in contracts),
+    )
+    url = f"/v1/terra/phoenix-1/contracts?code={code_id}"
+
+    whole = client.get(url).get_json()
+    assert whole == [contract for contract in contracts if contract["code"] == code_id]
+    assert walk(client, url, 1) == sorted(whole, key=lambda item: item["address"])
+
+
+def test_unknown_codes_and_networks_do_not_grow_the_registry(client):
+    client.get("/v1/terra/phoenix-1/contracts?code=1&limit=1")
+    client.get("/v1/terra/phoenix-1/assets?limit=1")
+    derived = len(registry.export()["derived"])
+
+    for index in range(20):
+        response = client.get(
+            f"/v1/terra/phoenix-1/contracts?code={10**9 + index}&limit=1"
+        )
+        assert response.get_json() == []
+        response = client.get(f"/v1/chain{index}/network/assets?limit=1")
+        assert response.get_json() == []
+
+    assert len(registry.export()["derived"]) == derived
@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import prices
+from prices import PriceCache, PriceFetchError, fetch_prices
+
+
+class Upstream:
+    """A local price endpoint answering with a canned status and body."""
+
+    def __init__(self):
+        self.status = 200
+        self.body = None
+        self.headers = {}
+        self.requests = []
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+                upstream.requests.append(query)
+                ids = query["ids"][0].split(",")
+                body = upstream.body
+                if body is None:
+                    body = json.dumps({id: {"usd": len(id)} for id in ids})
+                self.send_response(upstream.status)
+                for name, value in upstream.headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/simple/price"
+        threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        ).start()
+
+
+@pytest.fixture
+def upstream():
+    upstream = Upstream()
+    yield upstream
+    upstream.server.shutdown()
+    upstream.server.server_close()
+
+
+@pytest.fixture
+def cache(upstream, monkeypatch):
+    # Refreshed by the tests rather than by the worker thread
+    monkeypatch.setattr(PriceCache, "_start_worker", lambda self: None)
+    return PriceCache(upstream.url, ttl=60, max_age=3600)
+
+
+def test_prices_are_fetched_in_batches(upstream, monkeypatch):
+    monkeypatch.setattr(prices, "PRICE_BATCH_SIZE", 2)
+    ids = ["luna", "osmosis", "cosmos", "juno", "stargaze"]
+
+    assert fetch_prices(f"{upstream.url}?key=secret", ids) == {
+        id: float(len(id)) for id in ids
+    }
+    assert [request["ids"] for request in upstream.requests] == [
+        ["luna,osmosis"],
+        ["cosmos,juno"],
+        ["stargaze"],
+    ]
+    assert all(request["key"] == ["secret"] for request in upstream.requests)
+    assert all(request["vs_currencies"] == ["usd"] for request in upstream.requests)
+
+
+def test_unknown_and_malformed_quotes_are_skipped(upstream):
+    upstream.body = json.dumps(
+        {"luna": {"usd": 0.5}, "juno": {"usd": "1"}, "osmosis": {}, "atom": 3}
+    )
+    assert fetch_prices(upstream.url, ["luna", "juno", "osmosis", "atom"]) == {
+        "luna": 0.5
+    }
+
+
+def test_rate_limits_report_the_retry_after(upstream):
+    upstream.status = 429
+    upstream.headers = {"Retry-After": "30"}
+    with pytest.raises(PriceFetchError) as error:
+        fetch_prices(upstream.url, ["luna"])
+    assert str(error.value) == "HTTP 429"
+    assert error.value.retry_after == 30
+
+
+@pytest.mark.parametrize("body", ["<html>", "[1, 2]", "null"])
+def test_unexpected_responses_are_errors(upstream, body):
+    upstream.body = body
+    with pytest.raises(PriceFetchError) as error:
+        fetch_prices(upstream.url, ["luna"])
+    assert error.value.retry_after is None
+
+
+def test_unreachable_upstreams_are_errors(upstream):
+    url = upstream.url
+    upstream.server.shutdown()
+    upstream.server.server_close()
+    with pytest.raises(PriceFetchError):
+        fetch_prices(url, ["luna"])
+
+
+def test_disabled_prices_leave_the_assets_as_they_are():
+    cache = PriceCache("", ttl=60, max_age=3600)
+    assets = [{"id": "uluna", "coingecko": "terra-luna-2"}]
+    assert cache.join(assets, "assets") is assets
+    assert cache.get() == {}
+
+
+def test_join_adds_prices_to_a_copy(cache):
+    cache._update(time.time(), {"terra-luna-2": 0.5})
+    assets = [{"id": "uluna", "coingecko": "terra-luna-2"}, {"id": "uusd"}]
+
+    assert cache.join(assets) == [
+        {"id": "uluna", "coingecko": "terra-luna-2", "price": 0.5},
+        {"id": "uusd", "price": None},
+    ]
+    assert "price" not in assets[0]
+
+
+def test_named_copies_are_reused_until_the_prices_change(cache):
+    cache._update(time.time(), {"terra-luna-2": 0.5})
+    assets = [{"id": "uluna", "coingecko": "terra-luna-2"}]
+
+    joined = cache.join(assets, "assets")
+    assert cache.join(assets, "assets") is joined
+    # Another list under the same name, such as after a reload, is joined again
+    assert cache.join(list(assets), "assets") is not joined
+
+    cache._update(time.time(), {"terra-luna-2": 0.6})
+    assert cache.join(assets, "assets")[0]["price"] == 0.6
+
+
+def test_unnamed_copies_are_not_kept(cache):
+    cache._update(time.time(), {})
+    assets = [{"id": "uluna"}]
+    assert cache.join(assets) is not cache.join(assets)
+    assert cache._joined == {}
+
+
+def test_refetching_the_same_prices_keeps_the_version(cache):
+    cache._update(time.time(), {"luna": 1.0})
+    version = cache.version()
+    cache._update(time.time(), {"luna": 1.0})
+    assert cache.version() == version
+    cache._update(time.time(), {"luna": 2.0})
+    assert cache.version() > version
+
+
+def test_prices_older_than_the_max_age_are_not_served(cache):
+    cache._update(time.time() - cache.max_age - 1, {"luna": 1.0})
+    assert cache.version() == -1
+    assert cache.get() == {}
+    assert cache.join([{"coingecko": "luna"}]) == [{"coingecko": "luna", "price": None}]
+
+
+def test_refresh_fetches_the_ids_of_assets_json(cache, upstream, load_data):
+    ids = {asset["coingecko"] for asset in load_data("assets.json")}
+    ids.discard(None)
+    ids.discard("")
+    assert ids
+
+    cache.refresh()
+    assert set(cache.get()) == ids
+    assert sorted(upstream.requests[0]["ids"][0].split(",")) == sorted(ids)
+
+
+def test_workers_share_recently_fetched_prices(upstream, monkeypatch, tmp_path):
+    monkeypatch.setattr(PriceCache, "_start_worker", lambda self: None)
+    first = PriceCache(upstream.url, ttl=60, max_age=3600, directory=str(tmp_path))
+    second = PriceCache(upstream.url, ttl=60, max_age=3600, directory=str(tmp_path))
+
+    fetched_at = first.refresh()
+    requests = len(upstream.requests)
+    assert second.refresh() == fetched_at
+    assert second.get() == first.get()
+    assert len(upstream.requests) == requests
+
+    # Shared prices past the TTL are fetched again
+    second.ttl = 0
+    second.refresh()
+    assert len(upstream.requests) > requests
+
+
+def test_assets_are_served_with_prices(client, monkeypatch):
+    from prices import price_cache
+
+    monkeypatch.setattr(price_cache, "url", "http://127.0.0.1:9/price")
+    monkeypatch.setattr(price_cache, "_start_worker", lambda: None)
+    for name, value in (("_prices", {}), ("_fetched_at", 0.0), ("_joined", {})):
+        monkeypatch.setattr(price_cache, name, value)
+    assets = client.get("/v1/globals/assets").get_json()
+    assert all(asset["price"] is None for asset in assets)
+
+    coingecko = next(asset["coingecko"] for asset in assets if asset.get("coingecko"))
+    price_cache._update(time.time(), {coingecko: 1.5})
+    for url in ("/v1/globals/assets", "/v1/globals/assets?limit=1000"):
+        assets = client.get(url).get_json()
+        assert {
+            asset["price"] for asset in assets if asset.get("coingecko") == coingecko
+        } == {1.5}
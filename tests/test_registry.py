@@ -0,0 +1,164 @@
+import json
+import os
+
+import pytest
+
+from conftest import write_file
+from registry import DataPathError, Registry
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / "terra" / "phoenix-1").mkdir(parents=True)
+    write_file(str(tmp_path / "entities.json"), b'[{"slug": "a"}]')
+    write_file(str(tmp_path / "terra" / "phoenix-1" / "codes.json"), b'[{"id": 1}]')
+    return tmp_path
+
+
+@pytest.fixture
+def registry(root):
+    registry = Registry(str(root), interval=0)
+    registry.preload()
+    return registry
+
+
+def write_json(root, path, data):
+    write_file(os.path.join(str(root), path), json.dumps(data).encode())
+
+
+def test_snapshots_are_parsed_once_and_shared(registry):
+    first = registry.get("entities.json")
+    assert first.data == [{"slug": "a"}]
+    assert registry.get("entities.json") is first
+
+
+def test_refresh_reloads_only_changed_files(root, registry):
+    codes = registry.get("terra/phoenix-1/codes.json")
+    version = registry.version
+    write_json(root, "entities.json", [{"slug": "b"}])
+
+    assert registry.refresh() == ["entities.json"]
+    assert registry.load("entities.json") == [{"slug": "b"}]
+    assert registry.version > version
+    assert registry.get("terra/phoenix-1/codes.json") is codes
+    assert registry.reloads == 1
+
+
+def test_touching_a_file_without_changing_it_is_not_a_reload(root, registry):
+    snapshot = registry.get("entities.json")
+    version = registry.version
+    write_file(os.path.join(str(root), "entities.json"), b'[{"slug": "a"}]')
+
+    assert registry.refresh() == []
+    assert registry.version == version
+    assert registry.get("entities.json").data is snapshot.data
+
+
+def test_invalid_json_keeps_the_previous_snapshot(root, registry):
+    write_file(os.path.join(str(root), "entities.json"), b"[{")
+    assert registry.refresh() == []
+    assert registry.load("entities.json") == [{"slug": "a"}]
+
+
+def test_deleted_files_are_served_as_empty_lists(root, registry):
+    os.remove(os.path.join(str(root), "entities.json"))
+    assert registry.refresh() == ["entities.json"]
+    assert registry.load("entities.json") == []
+    assert not registry.get("entities.json").exists
+
+
+def test_derive_is_cached_until_a_source_changes(root, registry):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return [item["slug"] for item in registry.load("entities.json")]
+
+    assert registry.derive("slugs", ["entities.json"], build) == ["a"]
+    assert registry.derive("slugs", ["entities.json"], build) == ["a"]
+    assert len(builds) == 1
+
+    write_json(root, "terra/phoenix-1/codes.json", [{"id": 2}])
+    registry.refresh()
+    assert registry.derive("slugs", ["entities.json"], build) == ["a"]
+    assert len(builds) == 1
+
+    write_json(root, "entities.json", [{"slug": "b"}])
+    registry.refresh()
+    # Derived values are rebuilt by the reload, before any request needs them
+    assert len(builds) == 2
+    assert registry.derive("slugs", ["entities.json"], build) == ["b"]
+    assert len(builds) == 2
+
+
+def test_missing_files_of_known_networks_do_not_invalidate(registry):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return registry.load("entities.json")
+
+    registry.derive("entities", ["entities.json"], build)
+    version = registry.version
+
+    snapshot = registry.get("terra/phoenix-1/verified.json")
+    assert not snapshot.exists
+    assert snapshot.data == []
+    assert registry.version == version
+    assert registry.refresh() == []
+    registry.derive("entities", ["entities.json"], build)
+    assert len(builds) == 1
+
+
+def test_unknown_networks_are_neither_remembered_nor_cached(registry):
+    builds = []
+
+    def build():
+        builds.append(1)
+        return registry.load("nope/nope-1/codes.json")
+
+    for _ in range(2):
+        assert registry.derive("nope", ["nope/nope-1/codes.json"], build) == []
+    assert len(builds) == 2
+    assert "nope/nope-1/codes.json" not in registry.export()["snapshots"]
+    assert "nope" not in registry.export()["derived"]
+
+
+@pytest.mark.parametrize(
+    "path", ["../outside.json", "terra/../../outside.json", "/etc/passwd"]
+)
+def test_paths_outside_the_data_directory_are_rejected(registry, path):
+    with pytest.raises(DataPathError):
+        registry.get(path)
+
+
+def test_symlinks_out_of_the_data_directory_are_rejected(root, tmp_path_factory):
+    outside = tmp_path_factory.mktemp("outside")
+    write_file(str(outside / "codes.json"), b"[]")
+    os.symlink(str(outside), str(root / "terra" / "linked"))
+    registry = Registry(str(root), interval=0)
+    with pytest.raises(DataPathError):
+        registry.get("terra/linked/codes.json")
+
+
+def test_listeners_receive_the_changed_paths(root, registry):
+    calls = []
+    registry.subscribe(calls.append)
+    write_json(root, "terra/phoenix-1/codes.json", [])
+    write_json(root, "terra/phoenix-1/accounts.json", [])
+    registry.refresh()
+    assert calls == [["terra/phoenix-1/accounts.json", "terra/phoenix-1/codes.json"]]
+
+    registry.refresh()
+    assert len(calls) == 1
+
+
+def test_export_and_restore_keep_snapshots_and_derived_values(root, registry):
+    registry.derive("slugs", ["entities.json"], lambda: ["a"])
+    state = registry.export()
+
+    restored = Registry(str(root), interval=0)
+    restored.restore(state)
+    assert restored.get("entities.json") is state["snapshots"]["entities.json"]
+    assert restored.version >= state["version"]
+    assert restored.derive("slugs", ["entities.json"], lambda: ["rebuilt"]) == ["a"]